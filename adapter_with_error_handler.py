@@ -3,14 +3,41 @@
 import sys
 import traceback
 from datetime import datetime
+from typing import Awaitable, Callable, Dict, List
 
 from botbuilder.core import (
     BotFrameworkAdapter,
     BotFrameworkAdapterSettings,
     ConversationState,
+    InvokeResponse,
     TurnContext,
 )
-from botbuilder.schema import ActivityTypes, Activity
+from botbuilder.core.bot_framework_adapter import USER_AGENT
+from botbuilder.schema import ActivityTypes, Activity, DeliveryModes, ResourceResponse
+from botframework.connector.aio import ConnectorClient
+from botframework.connector.auth import (
+    AppCredentials,
+    ClaimsIdentity,
+    MicrosoftAppCredentials,
+)
+
+from auth import (
+    CONNECTOR_CLIENTS,
+    VALIDATED_TOKENS,
+    CachedAppCredentials,
+    ConnectorClientCache,
+    ValidatedTokenCache,
+)
+from helpers.outbound_batch import OUTBOUND_BUFFER_KEY, coalesce_activities
+from telemetry import TRACER, ActivityContext
+
+
+def _is_connector_call(activity: Activity) -> bool:
+    # As BotFrameworkAdapter.send_activities: delays are waited, invoke responses
+    # kept and traces only sent to the emulator.
+    if activity.type in ("delay", ActivityTypes.invoke_response):
+        return False
+    return activity.type != ActivityTypes.trace or activity.channel_id == "emulator"
 
 
 class AdapterWithErrorHandler(BotFrameworkAdapter):
@@ -18,9 +45,20 @@ class AdapterWithErrorHandler(BotFrameworkAdapter):
         self,
         settings: BotFrameworkAdapterSettings,
         conversation_state: ConversationState,
+        batch_outbound: bool = False,
+        connector_clients: ConnectorClientCache = CONNECTOR_CLIENTS,
+        validated_tokens: ValidatedTokenCache = VALIDATED_TOKENS,
     ):
         super().__init__(settings)
         self._conversation_state = conversation_state
+        self._connector_clients = connector_clients
+        self._validated_tokens = validated_tokens
+
+        # With batch_outbound, the replies of a turn are held until it ends, and
+        # consecutive messages are sent as one.
+        self.batch_outbound = batch_outbound
+        self.activities_sent = 0
+        self.connector_sends = 0
 
         # Catch-all for errors.
         async def on_error(context: TurnContext, error: Exception):
@@ -54,3 +92,122 @@ class AdapterWithErrorHandler(BotFrameworkAdapter):
             await self._conversation_state.delete(context)
 
         self.on_turn_error = on_error
+
+    async def authenticate_request(
+        self, activity: Activity, auth_header: str
+    ) -> ClaimsIdentity:
+        """
+        Validates the request as process_activity does, for turns run later with
+        process_activity_with_identity. Raises PermissionError when unauthorized.
+        """
+        return await self._authenticate_request(activity, auth_header or "")
+
+    # Authentication, the turn and the replies sent are timed as spans of the request.
+    async def _authenticate_request(
+        self, request: Activity, auth_header: str
+    ) -> ClaimsIdentity:
+        with TRACER.span("auth"):
+            if not auth_header:
+                return await super()._authenticate_request(request, auth_header)
+
+            # A token sent again is not verified again while it is valid.
+            identity = self._validated_tokens.get(
+                auth_header, request.channel_id, request.service_url
+            )
+            if identity is not None:
+                # As JwtTokenValidation.authenticate_request does for every request.
+                MicrosoftAppCredentials.trust_service_url(request.service_url)
+                return identity
+
+            identity = await super()._authenticate_request(request, auth_header)
+            self._validated_tokens.put(
+                auth_header, request.channel_id, request.service_url, identity
+            )
+            return identity
+
+    async def process_activity_with_identity(
+        self, activity: Activity, identity: ClaimsIdentity, logic: Callable
+    ) -> InvokeResponse:
+        # The telemetry of the turn is tracked with its activity.
+        with TRACER.span("turn"), ActivityContext(activity):
+            return await super().process_activity_with_identity(
+                activity, identity, logic
+            )
+
+    async def run_pipeline(
+        self, context: TurnContext, callback: Callable[[TurnContext], Awaitable] = None
+    ):
+        # ExpectReplies turns already answer with all their replies at once.
+        if (
+            not self.batch_outbound
+            or context.activity is None
+            or context.activity.delivery_mode == DeliveryModes.expect_replies
+        ):
+            return await super().run_pipeline(context, callback)
+
+        # The error handler runs within, its messages are sent with the others.
+        context.turn_state[OUTBOUND_BUFFER_KEY] = []
+        try:
+            return await super().run_pipeline(context, callback)
+        finally:
+            await self._flush(context)
+
+    async def send_activities(
+        self, context: TurnContext, activities: List[Activity]
+    ) -> List[ResourceResponse]:
+        buffer = context.turn_state.get(OUTBOUND_BUFFER_KEY)
+        if buffer is None:
+            return await self._send(context, activities)
+
+        # Invoke responses are kept in the turn state, not sent.
+        responses = []
+        for activity in activities:
+            if activity.type == ActivityTypes.invoke_response:
+                responses.extend(await self._send(context, [activity]))
+            else:
+                buffer.append(activity)
+                responses.append(ResourceResponse())
+        return responses
+
+    async def create_connector_client(
+        self, service_url: str, identity: ClaimsIdentity = None, audience: str = None
+    ) -> ConnectorClient:
+        client = await super().create_connector_client(service_url, identity, audience)
+        # The token is fetched now, off the event loop, rather than as the first
+        # reply is signed; it is then read from the cache.
+        credentials = client.config.credentials
+        if isinstance(credentials, CachedAppCredentials):
+            await credentials.ensure_token()
+        return client
+
+    def _get_or_create_connector_client(
+        self, service_url: str, credentials: AppCredentials
+    ) -> ConnectorClient:
+        if not credentials:
+            credentials = MicrosoftAppCredentials.empty()
+
+        def create() -> ConnectorClient:
+            client = ConnectorClient(credentials, base_url=service_url)
+            client.config.add_user_agent(USER_AGENT)
+            return client
+
+        return self._connector_clients.get(service_url, credentials, create)
+
+    def outbound_stats(self) -> Dict[str, int]:
+        return {
+            "activities_sent": self.activities_sent,
+            "connector_sends": self.connector_sends,
+        }
+
+    async def _flush(self, context: TurnContext) -> None:
+        buffer = context.turn_state.pop(OUTBOUND_BUFFER_KEY)
+        if buffer:
+            await self._send(context, coalesce_activities(buffer), len(buffer))
+
+    async def _send(
+        self, context: TurnContext, activities: List[Activity], sent: int = None
+    ) -> List[ResourceResponse]:
+        self.activities_sent += len(activities) if sent is None else sent
+        self.connector_sends += sum(map(_is_connector_call, activities))
+        with TRACER.span("send"):
+            return await super().send_activities(context, activities)
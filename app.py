@@ -8,91 +8,413 @@ This sample shows how to create a bot that demonstrates the following:
 - Handle user interruptions for such things as `Help` or `Cancel`.
 - Prompt for and validate requests for information from the user.
 """
+import time
+
+STARTED_AT = time.perf_counter()
+
+# pylint: disable=wrong-import-position
+import asyncio
+import sys
 from http import HTTPStatus
+from typing import Dict
 
 from aiohttp import web
 from aiohttp.web import Request, Response, json_response
 from botbuilder.core import (
     BotFrameworkAdapterSettings,
-    ConversationState,
     MemoryStorage,
-    UserState,
     TelemetryLoggerMiddleware,
 )
 from botbuilder.core.integration import aiohttp_error_middleware
-from botbuilder.schema import Activity
-from botbuilder.applicationinsights import ApplicationInsightsTelemetryClient
-from botbuilder.integration.applicationinsights.aiohttp import (
-    AiohttpTelemetryProcessor,
-    bot_telemetry_middleware,
-)
+from botbuilder.schema import Activity, ActivityTypes, DeliveryModes
+from botframework.connector.auth import AuthenticationConstants, ChannelValidation
 
 from config import DefaultConfig
 from dialogs import MainDialog, BookingDialog
-from bots import DialogAndWelcomeBot
+from bots import CardCache, DialogAndWelcomeBot
 
 from adapter_with_error_handler import AdapterWithErrorHandler
+from auth import (
+    CONNECTOR_CLIENTS,
+    TOKEN_CACHE,
+    VALIDATED_TOKENS,
+    CachedAppCredentials,
+    OpenIdMetadataCache,
+)
 from flight_booking_recognizer import FlightBookingRecognizer
+from helpers.datetime_models import DATETIME_MODELS
+from helpers.startup_timer import StartupTimer
+from server import BackgroundTurns, TurnRejected, TurnScheduler
+from storage import TrackedConversationState, TrackedUserState
+from telemetry import (
+    BatchingTelemetryClient,
+    BotTelemetryClientExporter,
+    DropPolicy,
+    FileExporter,
+    HttpExporter,
+    SamplingTelemetryClient,
+    SLOW_TURN_EVENT,
+    TRACER,
+    render_metrics,
+)
+from telemetry.prometheus import CONTENT_TYPE as METRICS_CONTENT_TYPE
+
+# Startup phases are timed from the process start, see /api/startup.
+STARTUP = StartupTimer(STARTED_AT)
+STARTUP.record("imports", time.perf_counter() - STARTED_AT)
 
 CONFIG = DefaultConfig()
 
-# Create adapter.
-# See https://aka.ms/about-bot-adapter to learn more about how bots work.
-SETTINGS = BotFrameworkAdapterSettings(CONFIG.APP_ID, CONFIG.APP_PASSWORD)
+# With Workers > 1, everything below is built once and inherited by each forked
+# worker: it must not start threads, open connections or bind an event loop until
+# the application starts (see start_telemetry, warm_up).
+
+with STARTUP.phase("adapter"):
+    # Create adapter.
+    # See https://aka.ms/about-bot-adapter to learn more about how bots work.
+    # Tokens of the replies are cached for the process and refreshed before expiry,
+    # for every service URL and OAuth scope.
+    TOKEN_CACHE.refresh_margin = CONFIG.TOKEN_REFRESH_MARGIN
+    APP_CREDENTIALS = (
+        CachedAppCredentials(CONFIG.APP_ID, CONFIG.APP_PASSWORD, TOKEN_CACHE)
+        if CONFIG.APP_ID and CONFIG.APP_PASSWORD
+        else None
+    )
+    SETTINGS = BotFrameworkAdapterSettings(
+        CONFIG.APP_ID, CONFIG.APP_PASSWORD, app_credentials=APP_CREDENTIALS
+    )
+    # Requests are authenticated with signing keys fetched ahead and refreshed in
+    # the background, and a token already validated is not verified again.
+    if CONFIG.CHANNEL_OPENID_METADATA_URL:
+        ChannelValidation.open_id_metadata_endpoint = CONFIG.CHANNEL_OPENID_METADATA_URL
+    VALIDATED_TOKENS.max_size = CONFIG.VALIDATED_TOKEN_CACHE_SIZE
+    SIGNING_KEYS = OpenIdMetadataCache(
+        CONFIG.CHANNEL_OPENID_METADATA_URL
+        or AuthenticationConstants.TO_BOT_FROM_CHANNEL_OPEN_ID_METADATA_URL,
+        refresh_interval=CONFIG.SIGNING_KEY_REFRESH_INTERVAL,
+        on_keys_removed=VALIDATED_TOKENS.discard_signed_by,
+    )
+    SIGNING_KEYS.install()
 
-# Create MemoryStorage, UserState and ConversationState
-MEMORY = MemoryStorage()
-USER_STATE = UserState(MEMORY)
-CONVERSATION_STATE = ConversationState(MEMORY)
+    # Create the state storage, UserState and ConversationState. Both state scopes
+    # skip the storage write of turns that left them unchanged.
+    # State is kept in SQLite when StateStoragePath is set, in memory otherwise.
+    if CONFIG.STATE_STORAGE_PATH:
+        from storage import SqliteStorage  # pylint: disable=import-outside-toplevel
 
-# Create adapter.
-# See https://aka.ms/about-bot-adapter to learn more about how bots work.
-ADAPTER = AdapterWithErrorHandler(SETTINGS, CONVERSATION_STATE)
+        MEMORY = SqliteStorage(
+            CONFIG.STATE_STORAGE_PATH,
+            shards=CONFIG.STATE_STORAGE_SHARDS,
+            flush_interval=CONFIG.STATE_STORAGE_FLUSH_INTERVAL,
+        )
+    else:
+        MEMORY = MemoryStorage()
+    USER_STATE = TrackedUserState(MEMORY)
+    CONVERSATION_STATE = TrackedConversationState(MEMORY)
+
+    # Create adapter.
+    # See https://aka.ms/about-bot-adapter to learn more about how bots work.
+    # With OutboundBatching, the replies of a turn are sent together when it ends.
+    ADAPTER = AdapterWithErrorHandler(
+        SETTINGS, CONVERSATION_STATE, batch_outbound=CONFIG.OUTBOUND_BATCHING
+    )
 
 # Create telemetry client.
-# Note the small 'client_queue_size'.  This is for demonstration purposes.  Larger queue sizes
-# result in fewer calls to ApplicationInsights, improving bot performance at the expense of
-# less frequent updates.
+# Track calls only fill a buffer, exported in batches by a background task, so
+# telemetry never waits on Application Insights during a turn.
+# Application Insights loads the Django and Flask integrations, most of the import
+# time: it is only imported when telemetry is exported to it.
 INSTRUMENTATION_KEY = CONFIG.APPINSIGHTS_INSTRUMENTATION_KEY
-TELEMETRY_CLIENT = ApplicationInsightsTelemetryClient(
-    INSTRUMENTATION_KEY, telemetry_processor=AiohttpTelemetryProcessor(), client_queue_size=1
-)
+with STARTUP.phase("telemetry"):
+    if CONFIG.TELEMETRY_EXPORT_FILE:
+        TELEMETRY_EXPORTER = FileExporter(CONFIG.TELEMETRY_EXPORT_FILE)
+    elif CONFIG.TELEMETRY_EXPORT_URL:
+        TELEMETRY_EXPORTER = HttpExporter(CONFIG.TELEMETRY_EXPORT_URL)
+    else:
+        # pylint: disable=import-outside-toplevel
+        from botbuilder.applicationinsights import ApplicationInsightsTelemetryClient
+        from telemetry.application_insights import ActivityTelemetryProcessor
+
+        TELEMETRY_EXPORTER = BotTelemetryClientExporter(
+            ApplicationInsightsTelemetryClient(
+                INSTRUMENTATION_KEY,
+                telemetry_processor=ActivityTelemetryProcessor(),
+                client_queue_size=CONFIG.TELEMETRY_BATCH_SIZE,
+            )
+        )
+    TELEMETRY_BATCHER = BatchingTelemetryClient(
+        TELEMETRY_EXPORTER,
+        max_queue_size=CONFIG.TELEMETRY_QUEUE_SIZE,
+        batch_size=CONFIG.TELEMETRY_BATCH_SIZE,
+        flush_interval=CONFIG.TELEMETRY_FLUSH_INTERVAL,
+        drop_policy=DropPolicy(CONFIG.TELEMETRY_DROP_POLICY),
+    )
+    # High-volume dialog events are sampled before they are buffered.
+    TELEMETRY_CLIENT = SamplingTelemetryClient(
+        TELEMETRY_BATCHER,
+        rates=CONFIG.TELEMETRY_SAMPLING_RATES,
+        target_per_second=CONFIG.TELEMETRY_TARGET_PER_SECOND,
+        always_keep=("BOOKING NOT CONFIRMED", SLOW_TURN_EVENT),
+    )
+
+# Spans of every request feed the latency histograms of /metrics, slow requests are
+# tracked with their spans.
+TRACER.enabled = CONFIG.TRACING
+TRACER.slow_turn_threshold = CONFIG.SLOW_TURN_THRESHOLD
+TRACER.telemetry_client = TELEMETRY_CLIENT
 
 # Code for enabling activity and personal information logging.
 # TELEMETRY_LOGGER_MIDDLEWARE = TelemetryLoggerMiddleware(telemetry_client=TELEMETRY_CLIENT, log_personal_information=True)
 # ADAPTER.use(TELEMETRY_LOGGER_MIDDLEWARE)
 
 # Create dialogs and Bot
-RECOGNIZER = FlightBookingRecognizer(CONFIG)
-BOOKING_DIALOG = BookingDialog()
-DIALOG = MainDialog(RECOGNIZER, BOOKING_DIALOG, telemetry_client=TELEMETRY_CLIENT)
-BOT = DialogAndWelcomeBot(CONVERSATION_STATE, USER_STATE, DIALOG, TELEMETRY_CLIENT)
+with STARTUP.phase("recognizer"):
+    RECOGNIZER = FlightBookingRecognizer(CONFIG, telemetry_client=TELEMETRY_CLIENT)
+with STARTUP.phase("dialogs"):
+    BOOKING_DIALOG = BookingDialog()
+    DIALOG = MainDialog(RECOGNIZER, BOOKING_DIALOG, telemetry_client=TELEMETRY_CLIENT)
+    BOT = DialogAndWelcomeBot(
+        CONVERSATION_STATE,
+        USER_STATE,
+        DIALOG,
+        TELEMETRY_CLIENT,
+        card_cache=CardCache(reload=CONFIG.CARD_RELOAD),
+    )
+
+# Turns of a conversation run one at a time, so they never race on its dialog state.
+TURN_SCHEDULER = TurnScheduler(
+    max_in_flight=CONFIG.MAX_TURNS_IN_FLIGHT,
+    max_queued=CONFIG.MAX_QUEUED_TURNS,
+    max_queued_per_conversation=CONFIG.MAX_QUEUED_TURNS_PER_CONVERSATION,
+    max_wait=CONFIG.TURN_QUEUE_TIMEOUT,
+)
+# With AsyncTurns, the same scheduler runs the turns after the request is answered.
+BACKGROUND_TURNS = BackgroundTurns(TURN_SCHEDULER, TELEMETRY_CLIENT)
+
+# Statistics of the components served on /metrics next to the span histograms.
+METRIC_SOURCES = {
+    "turn_scheduler": TURN_SCHEDULER.stats,
+    "background_turns": BACKGROUND_TURNS.stats,
+    "outbound": ADAPTER.outbound_stats,
+    "connector_clients": CONNECTOR_CLIENTS.stats,
+    "connector_tokens": TOKEN_CACHE.stats,
+    "validated_tokens": VALIDATED_TOKENS.stats,
+    "signing_keys": SIGNING_KEYS.stats,
+    "conversation_state_saves": CONVERSATION_STATE.save_stats.stats,
+    "user_state_saves": USER_STATE.save_stats.stats,
+    "recognition_cache": RECOGNIZER.cache.stats,
+    "luis_breaker": RECOGNIZER.breaker.stats,
+    "luis_single_flight": RECOGNIZER.single_flight.stats,
+    "telemetry_batcher": TELEMETRY_BATCHER.stats,
+    "telemetry_sampler": TELEMETRY_CLIENT.stats,
+}
+if RECOGNIZER.transport is not None:
+    METRIC_SOURCES["luis_transport"] = RECOGNIZER.transport.stats
+if CONFIG.STATE_STORAGE_PATH:
+    METRIC_SOURCES["state_storage"] = MEMORY.stats
+
+
+def can_run_in_background(activity: Activity) -> bool:
+    # Invokes and expectReplies activities are answered with the turn's replies.
+    return (
+        activity.type != ActivityTypes.invoke
+        and activity.delivery_mode != DeliveryModes.expect_replies
+    )
+
+
+def rejected(rejection: TurnRejected) -> Response:
+    return Response(
+        status=rejection.status,
+        reason=rejection.reason,
+        headers={"Retry-After": str(rejection.retry_after)},
+    )
 
 
 # Listen for incoming requests on /api/messages.
 async def messages(req: Request) -> Response:
+    with TRACER.trace("request"):
+        return await handle_activity(req)
+
+
+async def handle_activity(req: Request) -> Response:
     # Main bot message handler.
-    if "application/json" in req.headers["Content-Type"]:
-        body = await req.json()
-    else:
+    if "application/json" not in req.headers["Content-Type"]:
         return Response(status=HTTPStatus.UNSUPPORTED_MEDIA_TYPE)
+    with TRACER.span("deserialize"):
+        body = await req.json()
+        activity = Activity().deserialize(body)
 
-    activity = Activity().deserialize(body)
     auth_header = req.headers["Authorization"] if "Authorization" in req.headers else ""
+    conversation_id = activity.conversation.id if activity.conversation else ""
+
+    if CONFIG.ASYNC_TURNS and can_run_in_background(activity):
+        # Only the authentication is done before answering.
+        identity = await ADAPTER.authenticate_request(activity, auth_header)
+
+        async def background_turn():
+            with TRACER.trace("background_turn"):
+                return await ADAPTER.process_activity_with_identity(
+                    activity, identity, BOT.on_turn
+                )
 
-    response = await ADAPTER.process_activity(activity, auth_header, BOT.on_turn)
+        try:
+            BACKGROUND_TURNS.submit(conversation_id, background_turn)
+        except TurnRejected as rejection:
+            return rejected(rejection)
+        return Response(status=HTTPStatus.ACCEPTED)
+
+    try:
+        response = await TURN_SCHEDULER.run(
+            conversation_id,
+            lambda: ADAPTER.process_activity(activity, auth_header, BOT.on_turn),
+        )
+    except TurnRejected as rejection:
+        return rejected(rejection)
     if response:
         return json_response(data=response.body, status=response.status)
     return Response(status=HTTPStatus.OK)
 
 
+# Startup timing report on /api/startup.
+async def startup(req: Request) -> Response:
+    return json_response(data=STARTUP.report())
+
+
+# Span latency histograms and component statistics on /metrics, in the Prometheus
+# text format. With Workers > 1, each scrape is answered by one of the workers.
+async def metrics(req: Request) -> Response:
+    return Response(
+        body=render_metrics(TRACER, METRIC_SOURCES).encode("utf-8"),
+        headers={"Content-Type": METRICS_CONTENT_TYPE},
+    )
+
+
+async def warm_up():
+    # Builds what the first turns would otherwise pay for. The date models are
+    # built on a worker thread so the event loop keeps serving meanwhile.
+    loop = asyncio.get_event_loop()
+    with STARTUP.phase("warm_datetime_models"):
+        await loop.run_in_executor(
+            None, DATETIME_MODELS.warm, CONFIG.DATETIME_CULTURES
+        )
+    with STARTUP.phase("warm_cards"):
+        BOT.warm()
+    with STARTUP.phase("warm_luis_connection"):
+        await RECOGNIZER.warm()
+    with STARTUP.phase("warm_connector_token"):
+        if APP_CREDENTIALS is not None:
+            await APP_CREDENTIALS.warm()
+    with STARTUP.phase("warm_signing_keys"):
+        # Without an app id, the channels send no tokens to validate.
+        if CONFIG.APP_ID:
+            await SIGNING_KEYS.warm()
+            SIGNING_KEYS.start()
+    STARTUP.mark_ready()
+    STARTUP.log()
+
+
+def state_saves() -> Dict[str, int]:
+    # Process counters of both state scopes.
+    conversation = CONVERSATION_STATE.save_stats.stats()
+    user = USER_STATE.save_stats.stats()
+    return {name: conversation[name] + user[name] for name in conversation}
+
+
+async def report_turn_metrics():
+    # Queue depth, with its peak over the interval, and rejections per interval.
+    # State bytes written and writes skipped per interval, rather than per turn.
+    rejected = 0
+    saves = state_saves()
+    while True:
+        await asyncio.sleep(CONFIG.TURN_METRICS_INTERVAL)
+        stats = TURN_SCHEDULER.stats()
+        TURN_SCHEDULER.reset_peak()
+        TELEMETRY_CLIENT.track_metric(
+            "TurnQueueDepth", stats["queued"], max_val=stats["queued_peak"]
+        )
+        TELEMETRY_CLIENT.track_metric("TurnsInFlight", stats["in_flight"])
+        TELEMETRY_CLIENT.track_metric("TurnsRejected", stats["rejected"] - rejected)
+        rejected = stats["rejected"]
+
+        previous, saves = saves, state_saves()
+        if saves["saves"] > previous["saves"]:
+            TELEMETRY_CLIENT.track_metric(
+                "StateSaveBytes", saves["bytes"] - previous["bytes"]
+            )
+        if saves["skipped"] > previous["skipped"]:
+            TELEMETRY_CLIENT.track_metric(
+                "StateSavesSkipped", saves["skipped"] - previous["skipped"]
+            )
+
+
+async def start_telemetry(app: web.Application):
+    TELEMETRY_BATCHER.start()
+    app["turn_metrics"] = asyncio.ensure_future(report_turn_metrics())
+
+
+async def start_warm_up(app: web.Application):
+    if CONFIG.PREWARM_IN_BACKGROUND:
+        app["warm_up"] = asyncio.ensure_future(warm_up())
+    else:
+        await warm_up()
+
+
+async def close_resources(app: web.Application):
+    for name in ("warm_up", "turn_metrics"):
+        task = app.get(name)
+        if task is not None and not task.done():
+            task.cancel()
+    # The accepted background turns still need the recognizer and storage.
+    await BACKGROUND_TURNS.close(CONFIG.WORKER_SHUTDOWN_TIMEOUT)
+    await RECOGNIZER.close()
+    await TOKEN_CACHE.close()
+    await CONNECTOR_CLIENTS.close()
+    await SIGNING_KEYS.close()
+    if CONFIG.STATE_STORAGE_PATH:
+        await MEMORY.close()
+    # Last, so the telemetry of the shutdown itself is exported.
+    await TELEMETRY_BATCHER.close()
+
+
 def init_func(argv):
-    APP = web.Application(middlewares=[bot_telemetry_middleware, aiohttp_error_middleware])
+    APP = web.Application(middlewares=[aiohttp_error_middleware])
     APP.router.add_post("/api/messages", messages)
+    APP.router.add_get("/api/startup", startup)
+    APP.router.add_get("/metrics", metrics)
+    APP.on_startup.append(start_telemetry)
+    APP.on_startup.append(start_warm_up)
+    APP.on_cleanup.append(close_resources)
     return APP
 
 
+def run_workers() -> int:
+    # Each worker keeps its own copy of the state cache, only storage on disk is
+    # seen by all of them.
+    if not CONFIG.STATE_STORAGE_PATH:
+        raise SystemExit("Workers > 1 needs StateStoragePath, MemoryStorage is per worker")
+
+    # Preload: the date models and cards are built once here and shared by the
+    # workers' memory pages, instead of once per worker.
+    with STARTUP.phase("preload"):
+        DATETIME_MODELS.warm(CONFIG.DATETIME_CULTURES)
+        BOT.warm()
+
+    from server import WorkerSupervisor  # pylint: disable=import-outside-toplevel
+
+    return WorkerSupervisor(
+        lambda: init_func(None),
+        host="0.0.0.0",
+        port=CONFIG.PORT,
+        workers=CONFIG.WORKERS,
+        heartbeat_timeout=CONFIG.WORKER_HEARTBEAT_TIMEOUT,
+        shutdown_timeout=CONFIG.WORKER_SHUTDOWN_TIMEOUT,
+    ).run()
+
+
 if __name__ == "__main__":
+    if CONFIG.WORKERS > 1:
+        sys.exit(run_workers())
+
     APP = init_func(None)
 
     try:
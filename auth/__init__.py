@@ -0,0 +1,21 @@
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License.
+"""Authentication module."""
+
+from .connector_clients import CONNECTOR_CLIENTS, ConnectorClientCache
+from .signing_keys import OpenIdMetadataCache, SigningKey
+from .token_cache import TOKEN_CACHE, AccessToken, CachedAppCredentials, TokenCache
+from .validated_tokens import VALIDATED_TOKENS, ValidatedTokenCache
+
+__all__ = [
+    "AccessToken",
+    "CachedAppCredentials",
+    "CONNECTOR_CLIENTS",
+    "ConnectorClientCache",
+    "OpenIdMetadataCache",
+    "SigningKey",
+    "TOKEN_CACHE",
+    "TokenCache",
+    "VALIDATED_TOKENS",
+    "ValidatedTokenCache",
+]
@@ -0,0 +1,66 @@
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License.
+"""Connector clients of the process, one per service URL and bot identity."""
+
+from collections import OrderedDict
+from typing import Callable, Dict, Tuple
+
+from botframework.connector.aio import ConnectorClient
+from botframework.connector.auth import AppCredentials
+
+ClientKey = Tuple[str, str, str]
+
+
+class ConnectorClientCache:
+    """
+    Connector clients by service URL, app id and OAuth scope, so each keeps its
+    connections and serializers from turn to turn. The least recently used client
+    is dropped once `max_size` are kept; turns still holding it finish with it.
+    """
+
+    def __init__(self, max_size: int = 256):
+        self.max_size = max_size
+        self._clients: "OrderedDict[ClientKey, ConnectorClient]" = OrderedDict()
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "size": len(self._clients),
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+        }
+
+    def get(
+        self,
+        service_url: str,
+        credentials: AppCredentials,
+        create: Callable[[], ConnectorClient],
+    ) -> ConnectorClient:
+        key = (service_url, credentials.microsoft_app_id, credentials.oauth_scope)
+        client = self._clients.get(key)
+        if client is not None:
+            self.hits += 1
+            self._clients.move_to_end(key)
+            return client
+
+        self.misses += 1
+        client = self._clients[key] = create()
+        if len(self._clients) > self.max_size:
+            self._clients.popitem(last=False)
+            self.evictions += 1
+        return client
+
+    async def close(self) -> None:
+        """Close the connections of every client."""
+        clients = list(self._clients.values())
+        self._clients.clear()
+        for client in clients:
+            await client.__aexit__(None, None, None)
+
+
+# Connector clients of the process, shared by every adapter.
+CONNECTOR_CLIENTS = ConnectorClientCache()
@@ -0,0 +1,165 @@
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License.
+"""Signing keys of the tokens sent to the bot, fetched ahead and refreshed in the background."""
+
+import asyncio
+import json
+import time
+from typing import Any, Callable, Dict, List, NamedTuple, Set
+
+import aiohttp
+from botframework.connector.auth import JwtTokenExtractor
+from jwt.algorithms import RSAAlgorithm
+
+from helpers.single_flight import SingleFlight
+
+
+class SigningKey(NamedTuple):
+    # As the SDK's _OpenIdConfig, read by JwtTokenExtractor.
+    public_key: Any
+    endorsements: List[str]
+
+
+class OpenIdMetadataCache:
+    """
+    The signing keys published by an OpenID metadata URL, in place of the SDK's
+    _OpenIdMetadata once `install`ed.
+
+    The SDK fetches the keys as a request needs them, with blocking calls on the
+    event loop, and parses the key of each request again. Here the keys are parsed
+    once, fetched by `warm` before the first request and then every
+    `refresh_interval` seconds in the background, so requests only wait on a fetch
+    for a key that is not published yet. Those fetches, and the retries of a failed
+    refresh, are `min_refresh_interval` seconds apart; until one succeeds, the keys
+    of the last fetch are kept. `on_keys_removed` is called with the key ids a
+    refresh no longer lists.
+    """
+
+    def __init__(
+        self,
+        url: str,
+        refresh_interval: float = 24 * 3600.0,
+        min_refresh_interval: float = 300.0,
+        timeout: float = 10.0,
+        on_keys_removed: Callable[[Set[str]], None] = None,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.url = url
+        self.refresh_interval = refresh_interval
+        self.min_refresh_interval = min_refresh_interval
+        self.timeout = timeout
+        self.on_keys_removed = on_keys_removed
+        self._clock = clock
+        self._keys: Dict[str, SigningKey] = {}
+        # Clock times of the last fetch, and of the last one that succeeded.
+        self._attempted_at = float("-inf")
+        self._refreshed_at = float("-inf")
+        self._single_flight = SingleFlight()
+        self._session: aiohttp.ClientSession = None
+        self._task: asyncio.Future = None
+
+        self.refreshes = 0
+        self.refresh_failures = 0
+        self.unknown_keys = 0
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "keys": len(self._keys),
+            "refreshes": self.refreshes,
+            "refresh_failures": self.refresh_failures,
+            "unknown_keys": self.unknown_keys,
+        }
+
+    def install(self) -> None:
+        """Validate the tokens of `url` with these keys rather than the SDK's."""
+        JwtTokenExtractor.metadataCache[self.url] = self
+
+    async def get(self, key_id: str) -> SigningKey:
+        """The key `key_id`, as JwtTokenExtractor asks for it."""
+        key = self._keys.get(key_id)
+        if key is None and (
+            not self._keys
+            or self._clock() >= self._attempted_at + self.min_refresh_interval
+        ):
+            # A key published since the last refresh.
+            await self.refresh()
+            key = self._keys.get(key_id)
+        if key is None:
+            self.unknown_keys += 1
+            raise PermissionError(f"Unauthorized. Unknown signing key {key_id}")
+        return key
+
+    async def refresh(self) -> None:
+        await self._single_flight.do(self.url, self._fetch)
+
+    async def warm(self) -> bool:
+        # Fetches the keys before the first request waits on them.
+        try:
+            await self.refresh()
+        except Exception:  # pylint: disable=broad-except
+            return False
+        return True
+
+    def start(self) -> None:
+        """Refresh the keys in the background until `close`."""
+        if self._task is None or self._task.done():
+            self._task = asyncio.ensure_future(self._refresh_periodically())
+
+    async def close(self) -> None:
+        if self._task is not None and not self._task.done():
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+        self._task = None
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
+
+    def _next_refresh_in(self) -> float:
+        if self._attempted_at > self._refreshed_at:
+            due = self._attempted_at + self.min_refresh_interval
+        else:
+            due = self._refreshed_at + self.refresh_interval
+        return max(0.0, due - self._clock())
+
+    async def _refresh_periodically(self) -> None:
+        while True:
+            await asyncio.sleep(self._next_refresh_in())
+            # Unless a request refreshed the keys meanwhile.
+            if self._next_refresh_in() > 0:
+                continue
+            try:
+                await self.refresh()
+            except Exception:  # pylint: disable=broad-except
+                # Counted, and retried after min_refresh_interval.
+                pass
+
+    async def _fetch(self) -> None:
+        self._attempted_at = self._clock()
+        try:
+            metadata = await self._get_json(self.url)
+            jwks = await self._get_json(metadata["jwks_uri"])
+            keys = {
+                key["kid"]: SigningKey(
+                    RSAAlgorithm.from_jwk(json.dumps(key)), key.get("endorsements", [])
+                )
+                for key in jwks["keys"]
+            }
+        except Exception:
+            self.refresh_failures += 1
+            raise
+
+        removed = self._keys.keys() - keys.keys()
+        self._keys = keys
+        self._refreshed_at = self._attempted_at
+        self.refreshes += 1
+        if removed and self.on_keys_removed is not None:
+            self.on_keys_removed(removed)
+
+    async def _get_json(self, url: str) -> dict:
+        if self._session is None or self._session.closed:
+            self._session = aiohttp.ClientSession(
+                timeout=aiohttp.ClientTimeout(total=self.timeout)
+            )
+        async with self._session.get(url) as response:
+            response.raise_for_status()
+            return await response.json(content_type=None)
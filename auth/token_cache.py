@@ -0,0 +1,193 @@
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License.
+"""Bearer tokens of the bot's replies, refreshed before they expire."""
+
+import asyncio
+import time
+from typing import Awaitable, Callable, Dict, Hashable, NamedTuple, Optional, Set, Tuple
+
+from botframework.connector.auth import MicrosoftAppCredentials
+from msal import ConfidentialClientApplication
+
+from helpers.single_flight import SingleFlight
+
+
+class AccessToken(NamedTuple):
+    value: str
+    # Seconds the token is valid for, from its request.
+    expires_in: float
+
+
+class TokenCache:
+    """
+    Bearer tokens by key, e.g. app id and OAuth scope.
+
+    A token is fetched when missing or expired, once for all the callers waiting on
+    it. Within `refresh_margin` seconds of its expiry, it is still handed out while
+    a new one is fetched in the background, so callers only wait for the first
+    token, or when the refresh keeps failing until the token expires.
+    """
+
+    def __init__(
+        self,
+        refresh_margin: float = 300.0,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.refresh_margin = refresh_margin
+        self._clock = clock
+        # Token and the clock time it expires at, by key.
+        self._tokens: Dict[Hashable, Tuple[str, float]] = {}
+        self._single_flight = SingleFlight()
+        self._refreshes: Set[asyncio.Future] = set()
+
+        self.hits = 0
+        self.misses = 0
+        self.fetches = 0
+        self.background_refreshes = 0
+        self.fetch_failures = 0
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "tokens": len(self._tokens),
+            "hits": self.hits,
+            "misses": self.misses,
+            "fetches": self.fetches,
+            "background_refreshes": self.background_refreshes,
+            "fetch_failures": self.fetch_failures,
+        }
+
+    def peek(self, key: Hashable) -> Optional[str]:
+        """The cached token of `key`, None when missing or expired."""
+        token, expires_at = self._tokens.get(key, (None, 0.0))
+        if token is None or self._clock() >= expires_at:
+            return None
+        self.hits += 1
+        return token
+
+    def put(self, key: Hashable, token: AccessToken, requested_at: float = None) -> None:
+        if requested_at is None:
+            requested_at = self._clock()
+        self._tokens[key] = token.value, requested_at + token.expires_in
+
+    async def get(
+        self, key: Hashable, fetch: Callable[[], Awaitable[AccessToken]]
+    ) -> str:
+        """The token of `key`, fetched with `fetch` when missing or expired."""
+        token, expires_at = self._tokens.get(key, (None, 0.0))
+        now = self._clock()
+        if token is not None and now < expires_at:
+            self.hits += 1
+            if now >= expires_at - self.refresh_margin:
+                self._refresh_in_background(key, fetch)
+            return token
+
+        self.misses += 1
+        return await self._single_flight.do(key, lambda: self._fetch(key, fetch))
+
+    async def close(self) -> None:
+        """Cancel the background refreshes."""
+        for refresh in list(self._refreshes):
+            refresh.cancel()
+        await asyncio.gather(*self._refreshes, return_exceptions=True)
+
+    def _refresh_in_background(
+        self, key: Hashable, fetch: Callable[[], Awaitable[AccessToken]]
+    ) -> None:
+        if self._single_flight.is_in_flight(key):
+            return
+        self.background_refreshes += 1
+        refresh = asyncio.ensure_future(
+            self._single_flight.do(key, lambda: self._fetch(key, fetch))
+        )
+        self._refreshes.add(refresh)
+        refresh.add_done_callback(self._refreshed)
+
+    def _refreshed(self, refresh: asyncio.Future) -> None:
+        self._refreshes.discard(refresh)
+        # The current token stays until it expires, the failure is counted.
+        if not refresh.cancelled():
+            refresh.exception()
+
+    async def _fetch(
+        self, key: Hashable, fetch: Callable[[], Awaitable[AccessToken]]
+    ) -> str:
+        self.fetches += 1
+        requested_at = self._clock()
+        try:
+            token = await fetch()
+        except Exception:
+            self.fetch_failures += 1
+            raise
+        self.put(key, token, requested_at)
+        return token.value
+
+
+class CachedAppCredentials(MicrosoftAppCredentials):
+    """
+    MicrosoftAppCredentials whose tokens are kept in `token_cache`, shared by every
+    connector client of the process.
+
+    The connector clients read the token synchronously as they sign each request;
+    `ensure_token` is awaited beforehand, so the token is read from the cache and
+    fetched from AAD on a worker thread rather than on the event loop.
+    """
+
+    def __init__(
+        self,
+        app_id: str,
+        password: str,
+        token_cache: TokenCache,
+        channel_auth_tenant: str = None,
+        oauth_scope: str = None,
+    ):
+        super().__init__(app_id, password, channel_auth_tenant, oauth_scope)
+        self.token_cache = token_cache
+
+    @property
+    def cache_key(self) -> Hashable:
+        return self.oauth_endpoint, self.microsoft_app_id, self.oauth_scope
+
+    async def ensure_token(self) -> str:
+        return await self.token_cache.get(self.cache_key, self._fetch_token)
+
+    async def warm(self) -> bool:
+        # Fetches the first token before any reply waits on it.
+        try:
+            await self.ensure_token()
+        except Exception:  # pylint: disable=broad-except
+            return False
+        return True
+
+    def get_access_token(self, force_refresh: bool = False) -> str:
+        token = None if force_refresh else self.token_cache.peek(self.cache_key)
+        if token is None:
+            # Outside of ensure_token, e.g. a proactive message: fetched in place.
+            token = self._acquire_token()
+            self.token_cache.put(self.cache_key, token)
+            return token.value
+        return token
+
+    async def _fetch_token(self) -> AccessToken:
+        return await asyncio.get_event_loop().run_in_executor(None, self._acquire_token)
+
+    def _acquire_token(self) -> AccessToken:
+        result = self._msal_app().acquire_token_for_client(scopes=self.scopes)
+        if "access_token" not in result:
+            raise PermissionError(
+                f"No token for {self.microsoft_app_id}: "
+                f"{result.get('error_description') or result.get('error')}"
+            )
+        return AccessToken(result["access_token"], float(result["expires_in"]))
+
+    def _msal_app(self) -> ConfidentialClientApplication:
+        if not self.app:
+            self.app = ConfidentialClientApplication(
+                client_id=self.microsoft_app_id,
+                client_credential=self.microsoft_app_password,
+                authority=self.oauth_endpoint,
+            )
+        return self.app
+
+
+# Tokens of the process, shared by the connector clients of all service URLs.
+TOKEN_CACHE = TokenCache()
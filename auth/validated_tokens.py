@@ -0,0 +1,110 @@
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License.
+"""Identities of the Authorization headers already validated, until their tokens expire."""
+
+import hashlib
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, Iterable, NamedTuple, Optional
+
+import jwt
+from botframework.connector.auth import ClaimsIdentity
+
+
+class _Validated(NamedTuple):
+    identity: ClaimsIdentity
+    # Wall clock time of the token's exp claim.
+    expires_at: float
+    key_id: Optional[str]
+
+
+class ValidatedTokenCache:
+    """
+    The identity each Authorization header was validated to, so the token a channel
+    sends with every activity is only verified once.
+
+    The validation also checks the token's endorsements and service URL claim against
+    the activity, so the identity is kept by a hash of the header together with the
+    channel id and service URL it was validated for. It is kept until the token's exp
+    claim, or until its signing key is withdrawn; tokens without an exp claim are not
+    kept. The least recently used identity is dropped once `max_size` are kept.
+    """
+
+    def __init__(self, max_size: int = 1024, clock: Callable[[], float] = time.time):
+        self.max_size = max_size
+        self._clock = clock
+        self._identities: "OrderedDict[bytes, _Validated]" = OrderedDict()
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.revocations = 0
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "size": len(self._identities),
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "revocations": self.revocations,
+        }
+
+    def get(
+        self, auth_header: str, channel_id: str, service_url: str
+    ) -> Optional[ClaimsIdentity]:
+        key = self._key(auth_header, channel_id, service_url)
+        validated = self._identities.get(key)
+        if validated is None or self._clock() >= validated.expires_at:
+            if validated is not None:
+                del self._identities[key]
+            self.misses += 1
+            return None
+        self.hits += 1
+        self._identities.move_to_end(key)
+        return validated.identity
+
+    def put(
+        self,
+        auth_header: str,
+        channel_id: str,
+        service_url: str,
+        identity: ClaimsIdentity,
+    ) -> None:
+        expires_at = identity.get_claim_value("exp")
+        if (
+            not isinstance(expires_at, (int, float))
+            or expires_at <= self._clock()
+            or self.max_size <= 0
+        ):
+            return
+
+        _, _, token = auth_header.partition(" ")
+        try:
+            key_id = jwt.get_unverified_header(token).get("kid")
+        except jwt.InvalidTokenError:
+            key_id = None
+
+        key = self._key(auth_header, channel_id, service_url)
+        self._identities[key] = _Validated(identity, float(expires_at), key_id)
+        self._identities.move_to_end(key)
+        if len(self._identities) > self.max_size:
+            self._identities.popitem(last=False)
+            self.evictions += 1
+
+    def discard_signed_by(self, key_ids: Iterable[str]) -> None:
+        """Forget the tokens signed with `key_ids`, e.g. keys no longer published."""
+        key_ids = set(key_ids)
+        for key, validated in list(self._identities.items()):
+            if validated.key_id in key_ids:
+                del self._identities[key]
+                self.revocations += 1
+
+    @staticmethod
+    def _key(auth_header: str, channel_id: str, service_url: str) -> bytes:
+        return hashlib.sha256(
+            "\n".join((auth_header, channel_id or "", service_url or "")).encode("utf-8")
+        ).digest()
+
+
+# Identities validated by the process, shared by every adapter.
+VALIDATED_TOKENS = ValidatedTokenCache()
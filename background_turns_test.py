@@ -0,0 +1,142 @@
+import asyncio
+
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+from aiounittest import AsyncTestCase
+
+from botbuilder.core import (
+    BotFrameworkAdapterSettings,
+    ConversationState,
+    MemoryStorage,
+    NullTelemetryClient,
+    TurnContext,
+)
+from botbuilder.schema import (
+    Activity,
+    ActivityTypes,
+    ChannelAccount,
+    ConversationAccount,
+)
+
+from adapter_with_error_handler import AdapterWithErrorHandler
+from server import BackgroundTurns, TurnScheduler
+
+
+class MetricsClient(NullTelemetryClient):
+    def __init__(self):
+        self.metrics = []
+        self.exceptions = []
+
+    def track_metric(self, name: str, value: float, *args, **kwargs) -> None:
+        self.metrics.append(name)
+
+    def track_exception(self, exception_type=None, value=None, *args, **kwargs):
+        self.exceptions.append(value)
+
+
+class StubConnector:
+    """Connector service receiving the replies of the bot."""
+
+    def __init__(self):
+        self.replies = []
+
+    async def reply(self, request: web.Request) -> web.Response:
+        self.replies.append(
+            (request.match_info["conversation_id"], (await request.json())["text"])
+        )
+        return web.json_response({"id": str(len(self.replies))})
+
+    def app(self) -> web.Application:
+        app = web.Application()
+        app.router.add_post(
+            "/v3/conversations/{conversation_id}/activities/{activity_id}", self.reply
+        )
+        return app
+
+
+def message(text: str, conversation_id: str, service_url: str) -> Activity:
+    return Activity(
+        type=ActivityTypes.message,
+        id=text,
+        text=text,
+        channel_id="test",
+        service_url=service_url,
+        from_property=ChannelAccount(id="user"),
+        recipient=ChannelAccount(id="bot"),
+        conversation=ConversationAccount(id=conversation_id),
+    )
+
+
+class BackgroundTurnsTest(AsyncTestCase):
+    """
+    This class contains tests of the background turns:
+    - replies sent through the conversation reference, in order per conversation
+    - queue time and duration metrics, failed turns reported
+    - close waiting for the accepted turns
+    """
+
+    async def test_replies(self):
+        connector = StubConnector()
+        server = TestServer(connector.app())
+        await server.start_server()
+        try:
+            await self._reply_in_order(str(server.make_url("")).rstrip("/"), connector)
+        finally:
+            await server.close()
+
+    async def _reply_in_order(self, service_url: str, connector: StubConnector):
+        adapter = AdapterWithErrorHandler(
+            BotFrameworkAdapterSettings("", ""), ConversationState(MemoryStorage())
+        )
+        telemetry = MetricsClient()
+        turns = BackgroundTurns(TurnScheduler(max_in_flight=4), telemetry)
+
+        async def echo(turn_context: TurnContext):
+            # Later messages would overtake the first ones if not serialized.
+            await asyncio.sleep(0.05 if turn_context.activity.text.endswith("1") else 0)
+            await turn_context.send_activity(f"echo {turn_context.activity.text}")
+
+        for text, conversation_id in (("a1", "a"), ("a2", "a"), ("b1", "b")):
+            activity = message(text, conversation_id, service_url)
+            identity = await adapter.authenticate_request(activity, "")
+            turns.submit(
+                conversation_id,
+                lambda activity=activity, identity=identity: (
+                    adapter.process_activity_with_identity(activity, identity, echo)
+                ),
+            )
+        self.assertEqual(3, turns.stats()["pending"])
+
+        await turns.close()
+        self.assertEqual(
+            [("a", "echo a1"), ("a", "echo a2")],
+            [reply for reply in connector.replies if reply[0] == "a"],
+        )
+        self.assertIn(("b", "echo b1"), connector.replies)
+        self.assertEqual(
+            {"pending": 0, "accepted": 3, "completed": 3, "failed": 0}, turns.stats()
+        )
+        self.assertEqual(3, telemetry.metrics.count("TurnQueueTime"))
+        self.assertEqual(3, telemetry.metrics.count("TurnDuration"))
+
+    async def test_failed_turn(self):
+        telemetry = MetricsClient()
+        turns = BackgroundTurns(TurnScheduler(), telemetry)
+
+        async def fail():
+            raise ValueError("unreachable channel")
+
+        turns.submit("a", fail)
+        await turns.close()
+
+        self.assertEqual(1, turns.failed)
+        self.assertIsInstance(telemetry.exceptions[0], ValueError)
+        self.assertIn("TurnDuration", telemetry.metrics)
+
+    async def test_close_timeout(self):
+        turns = BackgroundTurns(TurnScheduler())
+        turns.submit("a", lambda: asyncio.sleep(10))
+
+        await turns.close(timeout=0.01)
+        self.assertEqual(0, turns.stats()["pending"])
+        self.assertEqual(0, turns.scheduler.in_flight)
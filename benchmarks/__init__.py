@@ -0,0 +1,3 @@
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License.
+"""Benchmarks of the bot hot paths, run with `python -m benchmarks.<name>`."""
@@ -0,0 +1,110 @@
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License.
+"""
+Serialization cost and size of BookingDetails in the dialog state, against the
+former plain class. Run with `python -m benchmarks.booking_details_benchmark`.
+"""
+
+import timeit
+from decimal import Decimal
+
+import jsonpickle
+from jsonpickle.pickler import Pickler
+
+from booking_details import BookingDetails
+from helpers.budget_parser import Budget
+
+
+class LegacyBookingDetails:
+    """BookingDetails before slots and explicit encoding."""
+
+    def __init__(self, **fields):
+        self.initial_message = None
+        self.destination = None
+        self.origin = None
+        self.str_date = None
+        self.end_date = None
+        self.budget = None
+        self.unsupported_airports = []
+        for name, value in fields.items():
+            setattr(self, name, value)
+
+
+FIELDS = {
+    "initial_message": "book a flight from Paris to Berlin on August 18th 2022",
+    "destination": "Berlin",
+    "origin": "Paris",
+    "str_date": "2022-08-18",
+    "end_date": "2022-08-25",
+    "budget": Budget(Decimal("1200"), "EUR", "1,200 euros"),
+}
+
+
+def dialog_state(booking_details: object) -> dict:
+    """Conversation state of a booking waterfall holding `booking_details`."""
+    return {
+        "DialogState": {
+            "dialog_stack": [
+                {
+                    "id": "BookingDialog",
+                    "state": {"options": booking_details, "values": {}},
+                },
+                {
+                    "id": "WaterfallDialog",
+                    "state": {
+                        "options": booking_details,
+                        "values": {"instanceId": "7f2c"},
+                        "stepIndex": 4,
+                    },
+                },
+            ]
+        }
+    }
+
+
+def measure(name: str, booking_details: object, number: int = 2000) -> dict:
+    state = dialog_state(booking_details)
+    document = jsonpickle.encode(state)
+    results = {
+        "bytes": len(document.encode("utf-8")),
+        "encode_us": timeit.timeit(lambda: jsonpickle.encode(state), number=number)
+        / number
+        * 1e6,
+        "decode_us": timeit.timeit(lambda: jsonpickle.decode(document), number=number)
+        / number
+        * 1e6,
+        # BotState flattens the state to detect changes.
+        "flatten_us": timeit.timeit(
+            lambda: str(Pickler().flatten(state)), number=number
+        )
+        / number
+        * 1e6,
+    }
+    print(
+        "%-8s %5d bytes  encode %7.1f us  decode %7.1f us  flatten %7.1f us"
+        % (
+            name,
+            results["bytes"],
+            results["encode_us"],
+            results["decode_us"],
+            results["flatten_us"],
+        )
+    )
+    return results
+
+
+def main():
+    legacy = measure("legacy", LegacyBookingDetails(**FIELDS))
+    slotted = measure("slotted", BookingDetails(**FIELDS))
+    print(
+        "size %.0f%%, encode %.0f%%, decode %.0f%% of legacy"
+        % (
+            100 * slotted["bytes"] / legacy["bytes"],
+            100 * slotted["encode_us"] / legacy["encode_us"],
+            100 * slotted["decode_us"] / legacy["decode_us"],
+        )
+    )
+
+
+if __name__ == "__main__":
+    main()
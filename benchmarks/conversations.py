@@ -0,0 +1,127 @@
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License.
+"""Scripted users booking flights, shared by the load test and the dialog benchmark."""
+
+import random
+from datetime import date, timedelta
+from typing import List, Optional
+
+from config import DefaultConfig
+from helpers.local_recognizer import load_luis_utterances
+from helpers.luis_helper import Intent
+
+CITIES = [
+    "Paris",
+    "London",
+    "Berlin",
+    "Madrid",
+    "Rome",
+    "Lisbon",
+    "Dublin",
+    "Vienna",
+    "Prague",
+    "Amsterdam",
+]
+BUDGETS = ["500 euros", "$1200", "2k EUR", "900 dollars", "around 1,500 euros"]
+
+# Bot messages the simulated user answers, by the start of their text.
+PROMPTS = {
+    "What can I help you with today?": "request",
+    "To what city would you like to travel?": "destination",
+    "From what city will you be travelling?": "origin",
+    "On what date would you like your departure": "departure",
+    "On what date would you like to come back": "return",
+    "I'm sorry, for best results, please enter your travel date": "date_again",
+    "What is your budget?": "budget",
+    "I'm sorry, please enter your budget": "budget",
+    "Please confirm": "confirm",
+    "What else can I do for you?": "done",
+    # Help does not reprompt, the question asked before still stands.
+    "Show Help...": "help",
+}
+ERROR_REPLY = "The bot encountered an error or bug."
+
+# Share of the conversations following each script.
+SCENARIOS = {
+    "booking": 0.7,
+    "help": 0.1,
+    "cancel": 0.1,
+    "bad_date": 0.05,
+    "bad_budget": 0.05,
+}
+
+
+def booking_requests(model_path: str = DefaultConfig.LOCAL_RECOGNIZER_MODEL) -> List[str]:
+    """The flight-booking utterances of the LUIS model, opening the conversations."""
+    return [
+        text
+        for text, intent, _ in load_luis_utterances(model_path)
+        if intent == Intent.BOOK_FLIGHT.value
+    ]
+
+
+def prompt_of(text: str) -> Optional[str]:
+    """
+    The answer key of a bot message, None when it asks nothing. Messages sent as one
+    by OutboundBatching are read paragraph by paragraph, the last question stands.
+    """
+    asked = None
+    for paragraph in text.split("\n\n"):
+        for start, prompt in PROMPTS.items():
+            if paragraph.startswith(start):
+                asked = prompt
+                break
+    return asked
+
+
+class BookingScript:
+    """
+    The answers of a user booking one flight, until the bot asks "What else can I do
+    for you?". Some users ask for help, cancel, or give an invalid date or budget
+    once, as `scenario` says; everything is drawn from `rng`.
+    """
+
+    def __init__(self, request: str, scenario: str, rng: random.Random = random):
+        self.request = request
+        self.scenario = scenario
+
+        destination, origin = rng.sample(CITIES, 2)
+        departure = date.today() + timedelta(days=rng.randint(30, 300))
+        self.answers = {
+            "request": request,
+            "destination": destination,
+            "origin": origin,
+            "departure": departure.strftime("%B %d %Y"),
+            "return": (departure + timedelta(days=rng.randint(2, 20))).strftime(
+                "%B %d %Y"
+            ),
+            "budget": rng.choice(BUDGETS),
+            "confirm": "yes",
+        }
+        self.answers["date_again"] = self.answers["departure"]
+        self._asked = "request"
+        self._interrupted = False
+
+    def answer(self, prompt: str) -> str:
+        """What the user says to `prompt`, a key of PROMPTS other than "done"."""
+        if prompt == "help":
+            prompt = self._asked
+        self._asked = prompt
+        answer = None if self._interrupted else self._interruption(prompt)
+        if answer is None:
+            return self.answers[prompt]
+        self._interrupted = True
+        return answer
+
+    def _interruption(self, prompt: str) -> Optional[str]:
+        if prompt in ("request", "confirm"):
+            return None
+        if self.scenario == "help":
+            return "help"
+        if self.scenario == "cancel":
+            return "cancel"
+        if self.scenario == "bad_date" and prompt == "departure":
+            return "sometime soon"
+        if self.scenario == "bad_budget" and prompt == "budget":
+            return "cheap"
+        return None
@@ -0,0 +1,450 @@
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License.
+"""
+Cost of the dialog layer alone: scripted users book flights through
+DialogAndWelcomeBot on TestAdapters, without HTTP, the local recognizer standing in
+for LUIS. Run with
+
+    python -m benchmarks.dialog_benchmark --conversations 2000 --concurrency 200
+
+The conversations follow the load test scripts: full bookings, help and cancel
+interruptions, and date and budget answers failing validation, then reprompted.
+Reports turns/s and CPU per turn over concurrent conversations, then, running a
+sample of them one at a time, the memory each turn allocates and the CPU time of
+each dialog. The figures are compared with the baseline recorded by
+`--save-baseline`; the exit status is 1 when one regressed beyond `--tolerance`.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import sys
+import time
+import tracemalloc
+from collections import Counter, defaultdict
+from contextlib import contextmanager, nullcontext
+from typing import Callable, ContextManager, Dict, List, Optional, TextIO
+
+from botbuilder.core import MemoryStorage, NullTelemetryClient
+from botbuilder.core.adapters import TestAdapter
+from botbuilder.dialogs import ComponentDialog, Dialog, DialogExtensions
+from botbuilder.schema import (
+    Activity,
+    ActivityTypes,
+    ChannelAccount,
+    ConversationAccount,
+)
+
+from bots import DialogAndWelcomeBot
+from config import DefaultConfig
+from dialogs import BookingDialog, CancelAndHelpDialog, MainDialog
+from flight_booking_recognizer import FlightBookingRecognizer
+from helpers.datetime_models import DATETIME_MODELS
+from storage import TrackedConversationState, TrackedUserState
+
+from .conversations import SCENARIOS, BookingScript, booking_requests, prompt_of
+
+BASELINE_PATH = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), "baselines", "dialog_benchmark.json"
+)
+
+# Figures compared with the baseline, and whether a larger value is better.
+COMPARED = {
+    "turns_per_s": True,
+    "cpu_us_per_turn": False,
+    "allocated_kb_per_turn": False,
+    "retained_kb_per_turn": False,
+}
+
+# A conversation still going after this many turns is stuck in a loop.
+MAX_TURNS = 40
+
+
+class BenchmarkConfig(DefaultConfig):
+    """The deployed configuration without LUIS: the local recognizer answers alone."""
+
+    LUIS_APP_ID = ""
+    LUIS_API_KEY = ""
+    LUIS_API_HOST_NAME = ""
+
+
+def build_bot(config: DefaultConfig = None) -> DialogAndWelcomeBot:
+    """The bot of app.py, on memory storage and without telemetry."""
+    storage = MemoryStorage()
+    recognizer = FlightBookingRecognizer(config or BenchmarkConfig())
+    bot = DialogAndWelcomeBot(
+        TrackedConversationState(storage),
+        TrackedUserState(storage),
+        MainDialog(recognizer, BookingDialog()),
+        NullTelemetryClient(),
+    )
+    bot.warm()
+    return bot
+
+
+def booking_scripts(count: int, seed: int = 0) -> List[BookingScript]:
+    rng = random.Random(seed)
+    requests = booking_requests()
+    scenarios = rng.choices(list(SCENARIOS), weights=list(SCENARIOS.values()), k=count)
+    return [
+        BookingScript(rng.choice(requests), scenario, rng) for scenario in scenarios
+    ]
+
+
+class ScriptedConversation:
+    """Plays a BookingScript against the bot on a TestAdapter of its own."""
+
+    def __init__(
+        self,
+        bot: DialogAndWelcomeBot,
+        script: BookingScript,
+        index: int,
+        turn_meter: Callable[[], ContextManager] = nullcontext,
+    ):
+        self.script = script
+        self.turn_meter = turn_meter
+        self.turns = 0
+        # The question the bot ended each turn with.
+        self.prompts: List[Optional[str]] = []
+        self.user = ChannelAccount(id=f"user-{index}")
+        self.adapter = TestAdapter(
+            bot.on_turn,
+            Activity(
+                channel_id="benchmark",
+                service_url="https://test.com",
+                from_property=self.user,
+                recipient=ChannelAccount(id="bot"),
+                conversation=ConversationAccount(id=f"benchmark-{index}"),
+                locale="en-US",
+            ),
+        )
+
+    async def run(self) -> None:
+        await self._turn(
+            Activity(type=ActivityTypes.conversation_update, members_added=[self.user])
+        )
+        prompt = await self._turn(Activity(type=ActivityTypes.message, text="hi"))
+        while prompt != "done":
+            if prompt is None:
+                raise RuntimeError(
+                    f"{self.script.scenario} conversation left without a question"
+                )
+            if self.turns >= MAX_TURNS:
+                raise RuntimeError(f"{self.script.scenario} conversation never ended")
+            prompt = await self._turn(
+                Activity(type=ActivityTypes.message, text=self.script.answer(prompt))
+            )
+
+    async def _turn(self, activity: Activity) -> Optional[str]:
+        """Run the turn of `activity` and return the last question of the bot."""
+        self.turns += 1
+        with self.turn_meter():
+            await self.adapter.receive_activity(activity)
+        prompt = None
+        for reply in self.adapter.activity_buffer:
+            prompt = prompt_of(reply.text or "") or prompt
+        self.adapter.activity_buffer.clear()
+        self.prompts.append(prompt)
+        return prompt
+
+
+class DialogProfiler:
+    """
+    Exclusive CPU time of the dialogs of a tree, of the recognizer and of the bot
+    state: each instrumented call is charged its process time, less that of the
+    instrumented calls it makes. Only meaningful while one turn runs at a time, as
+    an await would let other turns run on the clock of the call.
+    """
+
+    def __init__(self):
+        self.cpu: Dict[str, float] = defaultdict(float)
+        self.calls: Counter = Counter()
+        # [start, CPU of the instrumented calls made] of the calls in progress.
+        self._stack: List[List[float]] = []
+        self._patched = []
+
+    def instrument_bot(self, bot: DialogAndWelcomeBot) -> None:
+        self.wrap(bot, "on_turn", type(bot).__name__)
+        self.wrap(DialogExtensions, "run_dialog", "DialogExtensions.run_dialog")
+        for state in (bot.conversation_state, bot.user_state):
+            self.wrap(state, "load", type(state).__name__ + ".load")
+            self.wrap(state, "save_changes", type(state).__name__ + ".save_changes")
+        self.instrument_dialog(bot.dialog)
+        # pylint: disable=protected-access
+        recognizer = bot.dialog._luis_recognizer
+        self.wrap(recognizer, "recognize", type(recognizer).__name__)
+
+    def instrument_dialog(self, dialog: Dialog, path: str = "") -> None:
+        name = path + dialog.id
+        for method in (
+            "begin_dialog",
+            "continue_dialog",
+            "resume_dialog",
+            "reprompt_dialog",
+        ):
+            self.wrap(dialog, method, name)
+        if isinstance(dialog, CancelAndHelpDialog):
+            self.wrap(dialog, "interrupt", name + " interrupt")
+        if isinstance(dialog, ComponentDialog):
+            # pylint: disable=protected-access
+            for child in dialog._dialogs._dialogs.values():
+                self.instrument_dialog(child, name + "/")
+
+    def wrap(self, owner: object, method: str, name: str) -> None:
+        """Time the coroutine method `method` of `owner`, an instance or a class."""
+        original = getattr(owner, method)
+
+        async def timed(*args, **kwargs):
+            call = [time.process_time(), 0.0]
+            self._stack.append(call)
+            try:
+                return await original(*args, **kwargs)
+            finally:
+                self._stack.pop()
+                elapsed = time.process_time() - call[0]
+                self.cpu[name] += elapsed - call[1]
+                self.calls[name] += 1
+                if self._stack:
+                    self._stack[-1][1] += elapsed
+
+        if isinstance(owner, type):
+            self._patched.append((owner, method, owner.__dict__[method]))
+            setattr(owner, method, staticmethod(timed))
+        else:
+            self._patched.append((owner, method, None))
+            setattr(owner, method, timed)
+
+    def restore(self) -> None:
+        while self._patched:
+            owner, method, descriptor = self._patched.pop()
+            if descriptor is None:
+                delattr(owner, method)
+            else:
+                setattr(owner, method, descriptor)
+
+    def report(self, turns: int) -> Dict[str, Dict[str, float]]:
+        return {
+            name: {
+                "calls": self.calls[name],
+                "us_per_call": cpu / self.calls[name] * 1e6,
+                "us_per_turn": cpu / turns * 1e6,
+            }
+            for name, cpu in sorted(self.cpu.items(), key=lambda item: -item[1])
+        }
+
+
+class AllocationMeter:
+    """
+    Memory allocated by each turn, as traced by tracemalloc: the most it held at
+    once beyond what was allocated when it started, and what it still holds at the
+    end, mostly the conversation state kept in storage.
+    """
+
+    def __init__(self):
+        self.turns = 0
+        self.allocated = 0
+        self.retained = 0
+
+    @contextmanager
+    def turn(self):
+        tracemalloc.reset_peak()
+        start, _ = tracemalloc.get_traced_memory()
+        yield
+        current, peak = tracemalloc.get_traced_memory()
+        self.turns += 1
+        self.allocated += peak - start
+        self.retained += current - start
+
+
+async def run_concurrently(
+    bot: DialogAndWelcomeBot, scripts: List[BookingScript], concurrency: int
+) -> dict:
+    """Each of `concurrency` users plays the next script once done with the last."""
+    conversations = [
+        ScriptedConversation(bot, script, index) for index, script in enumerate(scripts)
+    ]
+    remaining = iter(conversations)
+    errors = Counter()
+
+    async def user():
+        for conversation in remaining:
+            try:
+                await conversation.run()
+            except Exception as error:  # pylint: disable=broad-except
+                errors[f"{conversation.script.scenario}: {error}"] += 1
+
+    cpu_started = time.process_time()
+    started = time.perf_counter()
+    await asyncio.gather(*(user() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+    cpu = time.process_time() - cpu_started
+
+    turns = sum(conversation.turns for conversation in conversations)
+    return {
+        "conversations": len(conversations),
+        "completed": len(conversations) - sum(errors.values()),
+        "turns": turns,
+        "scenarios": dict(Counter(script.scenario for script in scripts)),
+        "errors": dict(errors),
+        "elapsed_s": elapsed,
+        "turns_per_s": turns / elapsed,
+        "cpu_us_per_turn": cpu / turns * 1e6,
+    }
+
+
+async def run_profiled(scripts: List[BookingScript]) -> dict:
+    """CPU per dialog, then allocations per turn, playing `scripts` one at a time."""
+    bot = build_bot()
+    profiler = DialogProfiler()
+    profiler.instrument_bot(bot)
+    try:
+        turns = 0
+        for index, script in enumerate(scripts):
+            conversation = ScriptedConversation(bot, script, index)
+            await conversation.run()
+            turns += conversation.turns
+    finally:
+        profiler.restore()
+
+    # A bot of its own, so the allocations exclude the state of the profiled run.
+    bot = build_bot()
+    meter = AllocationMeter()
+    tracemalloc.start()
+    try:
+        for index, script in enumerate(scripts):
+            await ScriptedConversation(bot, script, index, meter.turn).run()
+    finally:
+        tracemalloc.stop()
+
+    return {
+        "profiled_turns": turns,
+        "allocated_kb_per_turn": meter.allocated / meter.turns / 1024,
+        "retained_kb_per_turn": meter.retained / meter.turns / 1024,
+        "dialogs": profiler.report(turns),
+    }
+
+
+async def run_benchmark(args: argparse.Namespace) -> dict:
+    DATETIME_MODELS.warm(DefaultConfig.DATETIME_CULTURES)
+    scripts = booking_scripts(args.conversations, args.seed)
+    report = await run_concurrently(build_bot(), scripts, args.concurrency)
+    report.update(await run_profiled(scripts[: args.profile_conversations]))
+    report["python"] = platform.python_version()
+    return report
+
+
+def compare(
+    report: dict, baseline: dict, tolerance: float, out: TextIO = sys.stdout
+) -> List[str]:
+    """Print the changes since `baseline` and return the figures that regressed."""
+    regressed = []
+    print(f"against the baseline (tolerance {100 * tolerance:.0f} %)", file=out)
+    if baseline.get("python") != report["python"]:
+        print(
+            f"  recorded with Python {baseline.get('python')}, "
+            f"running {report['python']}",
+            file=out,
+        )
+    for figure, higher_is_better in COMPARED.items():
+        old, new = baseline[figure], report[figure]
+        change = (new - old) / old if old else 0.0
+        worse = -change if higher_is_better else change
+        if worse > tolerance:
+            regressed.append(figure)
+        print(
+            f"  {figure:<24} {old:10.1f} -> {new:10.1f} ({100 * change:+6.1f} %)"
+            f"{'  REGRESSED' if worse > tolerance else ''}",
+            file=out,
+        )
+    # Per dialog changes only point at the cause, their smaller samples are noisier.
+    for name, cpu in report["dialogs"].items():
+        old = baseline.get("dialogs", {}).get(name)
+        if old and old["us_per_turn"] and cpu["us_per_turn"] >= 1:
+            change = cpu["us_per_turn"] / old["us_per_turn"] - 1
+            if abs(change) > tolerance:
+                print(f"  {name:<60} {100 * change:+6.1f} % us/turn", file=out)
+    return regressed
+
+
+def print_report(report: dict) -> None:
+    errors = ", ".join("%s: %d" % item for item in sorted(report["errors"].items()))
+    print(
+        f"{report['completed']}/{report['conversations']} conversations, "
+        f"{report['turns']} turns in {report['elapsed_s']:.1f} s"
+        f"{' (errors ' + errors + ')' if errors else ''}"
+    )
+    print(
+        f"  throughput    {report['turns_per_s']:.0f} turns/s, "
+        f"{report['cpu_us_per_turn']:.0f} us CPU per turn"
+    )
+    print(
+        f"  allocations   {report['allocated_kb_per_turn']:.1f} KB per turn, "
+        f"{report['retained_kb_per_turn']:.1f} KB retained"
+    )
+    print(f"CPU per dialog, exclusive, over {report['profiled_turns']} turns")
+    print(f"  {'':<60} {'calls':>7} {'us/call':>9} {'us/turn':>9}")
+    for name, cpu in report["dialogs"].items():
+        print(
+            f"  {name:<60} {cpu['calls']:7d} {cpu['us_per_call']:9.1f} "
+            f"{cpu['us_per_turn']:9.1f}"
+        )
+
+
+def parse_args(argv: List[str] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--conversations", type=int, default=1000)
+    parser.add_argument(
+        "--concurrency", type=int, default=100, help="users conversing at once"
+    )
+    parser.add_argument(
+        "--profile-conversations",
+        type=int,
+        default=200,
+        help="conversations played one at a time to profile the dialogs",
+    )
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--baseline", default=BASELINE_PATH)
+    parser.add_argument(
+        "--save-baseline", action="store_true", help="record this run as the baseline"
+    )
+    parser.add_argument(
+        "--tolerance",
+        type=float,
+        default=0.25,
+        help="relative change of a figure counted as a regression",
+    )
+    parser.add_argument("--json", action="store_true", help="print the report as JSON")
+    return parser.parse_args(argv)
+
+
+def main(argv: List[str] = None) -> int:
+    args = parse_args(argv)
+    report = asyncio.get_event_loop().run_until_complete(run_benchmark(args))
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        print_report(report)
+
+    if args.save_baseline:
+        os.makedirs(os.path.dirname(args.baseline), exist_ok=True)
+        with open(args.baseline, "w") as baseline_file:
+            json.dump(report, baseline_file, indent=2)
+            baseline_file.write("\n")
+        return 0
+    if not os.path.exists(args.baseline):
+        return 0
+    with open(args.baseline) as baseline_file:
+        regressed = compare(
+            report,
+            json.load(baseline_file),
+            args.tolerance,
+            sys.stderr if args.json else sys.stdout,
+        )
+    return 1 if regressed or report["errors"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
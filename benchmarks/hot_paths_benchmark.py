@@ -0,0 +1,546 @@
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License.
+"""
+Microbenchmarks of the small functions run on every turn, each timed over a large,
+varied corpus. LuisHelper.execute_luis_query reads recorded LUIS v2 predictions,
+benchmarks/fixtures/luis_v2_predictions.json. Run with
+
+    python -m benchmarks.hot_paths_benchmark
+
+Reports the CPU ns/op of the best of `--repeat` passes and the bytes each op
+allocates, and compares them with the baseline recorded by `--save-baseline`; the
+exit status is 1 when one regressed beyond `--tolerance`, or
+`--allocation-tolerance` for the allocations. `--record-fixtures` records the
+predictions again, from the LUIS stand-in of the load test.
+"""
+
+import argparse
+import gc
+import json
+import os
+import platform
+import random
+import sys
+import time
+import tracemalloc
+from datetime import date, timedelta
+from typing import Callable, Dict, List, NamedTuple, TextIO
+
+from azure.cognitiveservices.language.luis.runtime.models import LuisResult
+from botbuilder.ai.luis.luis_util import LuisUtil
+from botbuilder.core import (
+    ConversationState,
+    MemoryStorage,
+    RecognizerResult,
+    TurnContext,
+)
+from botbuilder.core.adapters import TestAdapter
+from botbuilder.dialogs import DialogContext, DialogSet, DialogState
+from botbuilder.dialogs.prompts import (
+    DateTimeResolution,
+    PromptOptions,
+    PromptRecognizerResult,
+    PromptValidatorContext,
+)
+from botbuilder.schema import (
+    Activity,
+    ActivityTypes,
+    ChannelAccount,
+    ConversationAccount,
+    ResourceResponse,
+)
+
+from dialogs import BookingDialog, CancelAndHelpDialog, DateResolverDialog
+from dialogs.budget_dialog import BudgetDialog
+from helpers.activity_helper import create_activity_reply
+from helpers.luis_helper import LuisHelper, top_intent
+from telemetry import Tracer
+
+from .conversations import BUDGETS, CITIES
+
+BENCHMARKS_DIR = os.path.dirname(os.path.abspath(__file__))
+FIXTURES_PATH = os.path.join(BENCHMARKS_DIR, "fixtures", "luis_v2_predictions.json")
+BASELINE_PATH = os.path.join(BENCHMARKS_DIR, "baselines", "hot_paths.json")
+
+# Intents of the LUIS app.
+LUIS_INTENTS = ["book", "Cancel", "None"]
+
+
+class Case(NamedTuple):
+    """`op` called with each argument tuple of `corpus`."""
+
+    name: str
+    op: Callable
+    corpus: List[tuple]
+
+
+def complete(coroutine):
+    """The result of a coroutine that never suspends, run without an event loop."""
+    try:
+        coroutine.send(None)
+    except StopIteration as stop:
+        return stop.value
+    coroutine.close()
+    raise RuntimeError("the benchmarked coroutine suspended")
+
+
+class DiscardingAdapter(TestAdapter):
+    """Drops the activities sent, which TestAdapter would keep forever."""
+
+    async def send_activities(self, context, activities):
+        return [ResourceResponse(id="") for _ in activities]
+
+
+class FixtureRecognizer:
+    """Answers each recorded query with its recorded prediction."""
+
+    def __init__(self, results: Dict[str, RecognizerResult]):
+        self._results = results
+
+    async def recognize(self, turn_context: TurnContext) -> RecognizerResult:
+        return self._results[turn_context.activity.text]
+
+
+def recognizer_result(prediction: dict) -> RecognizerResult:
+    """The RecognizerResult the LUIS v2 recognizer builds from `prediction`."""
+    luis_result = LuisResult.deserialize(prediction)
+    result = RecognizerResult(
+        text=prediction["query"],
+        altered_text=luis_result.altered_query,
+        intents=LuisUtil.get_intents(luis_result),
+        entities=LuisUtil.extract_entities_and_metadata(
+            luis_result.entities, luis_result.composite_entities, True
+        ),
+    )
+    LuisUtil.add_properties(luis_result, result)
+    return result
+
+
+def load_predictions(path: str = FIXTURES_PATH) -> List[dict]:
+    with open(path) as fixtures:
+        return json.load(fixtures)
+
+
+def booking_utterances(rng: random.Random, count: int) -> List[str]:
+    """Queries the LUIS app sees: booking requests and answers, cancellations, chit-chat."""
+    dates = ["May 5th 2023", "next friday", "tomorrow", "august 18", "12/03/2023"]
+    templates = [
+        "book a flight from {origin} to {destination}",
+        "book flight to {destination} on {date}",
+        "I want to fly from {origin} to {destination} on {date} for {budget}",
+        "fly me to {destination} leaving {date} and coming back {end_date}",
+        "travel to {destination} from {origin} between {date} and {end_date} "
+        "with a budget of {budget}",
+        "{destination} please",
+        "from {origin}",
+        "what's the weather like in {destination}",
+        "cancel",
+        "never mind, quit",
+        "hello there",
+        "I don't know yet",
+    ]
+    utterances = []
+    for index in range(count):
+        destination, origin = rng.sample(CITIES, 2)
+        first, last = rng.sample(dates, 2)
+        utterances.append(
+            templates[index % len(templates)].format(
+                origin=origin,
+                destination=destination,
+                date=first,
+                end_date=last,
+                budget=rng.choice(BUDGETS),
+            )
+        )
+    return utterances
+
+
+def record_predictions(count: int = 600, path: str = FIXTURES_PATH) -> None:
+    """Record the LUIS stand-in's prediction of `count` queries, one per line."""
+    # Imported here only, the stand-in compiles the local recognizer on creation.
+    from .stubs import StubLuis  # pylint: disable=import-outside-toplevel
+
+    rng = random.Random(0)
+    stub = StubLuis(latency=0)
+    predictions = []
+    for query in dict.fromkeys(booking_utterances(rng, count)):
+        prediction = stub.prediction(query)
+        # The bot asks for the top intent only (verbose=false), LUIS then leaves out
+        # the scores of the other intents.
+        del prediction["intents"]
+        predictions.append(prediction)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w") as fixtures:
+        fixtures.write(
+            "[\n" + ",\n".join(json.dumps(item) for item in predictions) + "\n]\n"
+        )
+    print(f"recorded {len(predictions)} predictions in {path}")
+
+
+def turn_context(text: str, activity_type: str = ActivityTypes.message) -> TurnContext:
+    activity = Activity(
+        type=activity_type,
+        text=text,
+        channel_id="benchmark",
+        from_property=ChannelAccount(id="user"),
+        recipient=ChannelAccount(id="bot"),
+        conversation=ConversationAccount(id="conversation"),
+    )
+    return TurnContext(DiscardingAdapter(), activity)
+
+
+def budget_answers(rng: random.Random, count: int) -> List[str]:
+    formats = [
+        "{amount}",
+        "${amount}",
+        "{amount}$",
+        "€{amount}",
+        "{amount}€",
+        "{amount} dollars",
+        "euros {amount}",
+        "{amount} EUR",
+        "around {amount} euros max",
+        "{thousands}k EUR",
+    ]
+    invalid = ["cheap", "not much", "whatever is cheapest", "idk", "a lot"]
+    answers = []
+    for index in range(count):
+        if index % 5 == 4:
+            answers.append(rng.choice(invalid))
+            continue
+        amount = rng.randint(50, 5000)
+        answers.append(
+            rng.choice(formats).format(
+                amount=f"{amount:,}" if rng.random() < 0.3 else amount,
+                thousands=amount // 1000 + 1,
+            )
+        )
+    return answers
+
+
+def timexes(rng: random.Random, count: int, distinct: int = 300) -> List[str]:
+    """
+    Definite dates, partial ones, weekdays, ranges and date times, drawn from
+    `distinct` expressions since the dates of a day's conversations repeat.
+    """
+    shapes = [
+        lambda day: day.isoformat(),
+        lambda day: day.isoformat(),
+        lambda day: "XXXX-" + day.strftime("%m-%d"),
+        lambda day: day.strftime("%Y-%m"),
+        lambda day: f"XXXX-WXX-{day.isoweekday()}",
+        lambda day: f"{day.isoformat()}T{rng.randint(0, 23):02d}:{rng.choice(['00', '30'])}",
+        lambda day: f"({day.isoformat()},{(day + timedelta(days=4)).isoformat()},P4D)",
+    ]
+    start = date(2021, 1, 1)
+    pool = [
+        rng.choice(shapes)(start + timedelta(days=rng.randint(0, 1500)))
+        for _ in range(distinct)
+    ]
+    return [rng.choice(pool) for _ in range(count)]
+
+
+def create_cases(predictions: List[dict], seed: int = 0, size: int = 2000) -> List[Case]:
+    rng = random.Random(seed)
+
+    results = {item["query"]: recognizer_result(item) for item in predictions}
+    recognizer = FixtureRecognizer(results)
+    contexts = [turn_context(query) for query in results]
+
+    budget_contexts = [
+        PromptValidatorContext(
+            turn_context(answer),
+            PromptRecognizerResult(True, answer),
+            {},
+            PromptOptions(),
+        )
+        for answer in budget_answers(rng, size)
+    ]
+
+    date_timexes = timexes(rng, size)
+    date_contexts = [
+        PromptValidatorContext(
+            turn_context(timex),
+            # Every tenth answer is not a date.
+            PromptRecognizerResult(True, [DateTimeResolution(timex=timex)])
+            if index % 10
+            else PromptRecognizerResult(False),
+            {},
+            PromptOptions(),
+        )
+        for index, timex in enumerate(date_timexes)
+    ]
+
+    queries = list(results)
+    activities = [
+        Activity(
+            type=ActivityTypes.message,
+            id=str(index),
+            text=queries[index % len(queries)],
+            channel_id=rng.choice(["msteams", "webchat", "directline", "slack"]),
+            service_url="https://smba.trafficmanager.net/emea/",
+            from_property=ChannelAccount(id=f"user-{index}", name=f"User {index}"),
+            recipient=ChannelAccount(id="bot", name="Bot")
+            if index % 7
+            else None,
+            conversation=ConversationAccount(
+                id=f"conversation-{index}", is_group=index % 3 == 0, name=None
+            ),
+            locale=rng.choice(["en-US", "en-GB", "fr-FR"]),
+        )
+        for index in range(size)
+    ]
+
+    interruptions = ["help", "?", "cancel", "quit", "Help", "CANCEL"]
+    interrupt_texts = [
+        rng.choice(interruptions) if index % 10 == 0 else rng.choice(queries)
+        for index in range(size)
+    ]
+    dialog_set = DialogSet(
+        ConversationState(MemoryStorage()).create_property("DialogState")
+    )
+    interrupt_contexts = [
+        DialogContext(
+            dialog_set,
+            turn_context(text)
+            if index % 25
+            else turn_context(None, ActivityTypes.conversation_update),
+            DialogState(),
+        )
+        for index, text in enumerate(interrupt_texts)
+    ]
+    cancel_and_help = CancelAndHelpDialog("benchmark")
+    booking_dialog = BookingDialog()
+
+    # Spans named as the ones of a turn, timed into a tracer of their own.
+    tracer = Tracer()
+    span_names = ["state.load", "dialog", "state.save", "recognize", "send"] + [
+        f"step BookingDialog.{step}"
+        for step in ("destination_step", "origin_step", "budget_step", "confirm_step")
+    ]
+
+    def span(name: str) -> None:
+        with tracer.span(name):
+            pass
+
+    return [
+        Case(
+            "LuisHelper.execute_luis_query",
+            lambda context: complete(LuisHelper.execute_luis_query(recognizer, context)),
+            [(context,) for context in contexts],
+        ),
+        Case(
+            "top_intent",
+            top_intent,
+            [
+                ([(intent, rng.random()) for intent in rng.sample(LUIS_INTENTS, 3)],)
+                for _ in range(size)
+            ],
+        ),
+        Case(
+            "BudgetDialog.budget_validator",
+            lambda context: complete(BudgetDialog.budget_validator(context)),
+            [(context,) for context in budget_contexts],
+        ),
+        Case(
+            "BookingDialog.is_ambiguous",
+            booking_dialog.is_ambiguous,
+            [(timex,) for timex in date_timexes],
+        ),
+        Case(
+            "DateResolverDialog.datetime_prompt_validator",
+            lambda context: complete(DateResolverDialog.datetime_prompt_validator(context)),
+            [(context,) for context in date_contexts],
+        ),
+        Case(
+            "create_activity_reply",
+            create_activity_reply,
+            [(activity,) for activity in activities],
+        ),
+        Case(
+            "CancelAndHelpDialog.interrupt",
+            lambda dialog_context: complete(cancel_and_help.interrupt(dialog_context)),
+            [(dialog_context,) for dialog_context in interrupt_contexts],
+        ),
+        Case(
+            "Tracer.span",
+            span,
+            [(rng.choice(span_names),) for _ in range(size)],
+        ),
+    ]
+
+
+def run_pass(case: Case, passes: int) -> float:
+    """
+    CPU seconds taken by `passes` runs over the corpus, without garbage collection.
+    CPU rather than wall time, which also counts the time other processes run.
+    """
+    op, corpus = case.op, case.corpus
+    gc_was_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        started = time.process_time()
+        for _ in range(passes):
+            for args in corpus:
+                op(*args)
+        return time.process_time() - started
+    finally:
+        if gc_was_enabled:
+            gc.enable()
+
+
+def allocated_bytes(case: Case) -> float:
+    """
+    Bytes allocated per op, as traced by tracemalloc: the most each op held at once
+    beyond what was allocated when it started.
+    """
+    allocated = 0
+    tracemalloc.start()
+    try:
+        for args in case.corpus:
+            tracemalloc.reset_peak()
+            start, _ = tracemalloc.get_traced_memory()
+            case.op(*args)
+            allocated += tracemalloc.get_traced_memory()[1] - start
+    finally:
+        tracemalloc.stop()
+    return allocated / len(case.corpus)
+
+
+def measure(case: Case, repeat: int = 15, min_time: float = 0.05) -> Dict[str, float]:
+    # Warm up caches and imports, then run enough passes to last `min_time`.
+    run_pass(case, 1)
+    passes = 1
+    while run_pass(case, passes) < min_time and passes < 1 << 16:
+        passes *= 2
+    best = min(run_pass(case, passes) for _ in range(repeat))
+    return {
+        "ops": len(case.corpus),
+        "ns_per_op": best / (passes * len(case.corpus)) * 1e9,
+        "allocated_bytes_per_op": allocated_bytes(case),
+    }
+
+
+def compare(
+    report: dict,
+    baseline: dict,
+    tolerance: float,
+    allocation_tolerance: float,
+    out: TextIO = sys.stdout,
+) -> List[str]:
+    """Print the changes since `baseline` and return the figures that regressed."""
+    regressed = []
+    tolerances = {
+        "ns_per_op": tolerance,
+        "allocated_bytes_per_op": allocation_tolerance,
+    }
+    print(
+        f"against the baseline (tolerance {100 * tolerance:.0f} % for time, "
+        f"{100 * allocation_tolerance:.0f} % for allocations)",
+        file=out,
+    )
+    if baseline.get("python") != report["python"]:
+        print(
+            f"  recorded with Python {baseline.get('python')}, "
+            f"running {report['python']}",
+            file=out,
+        )
+    for name, figures in report["functions"].items():
+        old_figures = baseline["functions"].get(name)
+        if old_figures is None:
+            continue
+        for figure, figure_tolerance in tolerances.items():
+            old, new = old_figures[figure], figures[figure]
+            change = (new - old) / old if old else 0.0
+            worse = change > figure_tolerance
+            if worse:
+                regressed.append(f"{name} {figure}")
+            print(
+                f"  {name:<46} {figure:<24} {old:10.1f} -> {new:10.1f} "
+                f"({100 * change:+6.1f} %){'  REGRESSED' if worse else ''}",
+                file=out,
+            )
+    return regressed
+
+
+def print_report(report: dict) -> None:
+    print(f"  {'':<46} {'ops':>6} {'ns/op':>10} {'bytes/op':>10}")
+    for name, figures in report["functions"].items():
+        print(
+            f"  {name:<46} {figures['ops']:6d} {figures['ns_per_op']:10.1f} "
+            f"{figures['allocated_bytes_per_op']:10.1f}"
+        )
+
+
+def parse_args(argv: List[str] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--size", type=int, default=2000, help="generated corpora size")
+    parser.add_argument("--repeat", type=int, default=15)
+    parser.add_argument(
+        "--min-time", type=float, default=0.05, help="seconds per timed pass, at least"
+    )
+    parser.add_argument("--filter", default="", help="only the functions named so")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--fixtures", default=FIXTURES_PATH)
+    parser.add_argument("--record-fixtures", action="store_true")
+    parser.add_argument("--baseline", default=BASELINE_PATH)
+    parser.add_argument(
+        "--save-baseline", action="store_true", help="record this run as the baseline"
+    )
+    parser.add_argument(
+        "--tolerance",
+        type=float,
+        default=0.3,
+        help="relative slowdown counted as a regression",
+    )
+    parser.add_argument(
+        "--allocation-tolerance",
+        type=float,
+        default=0.1,
+        help="relative growth of the allocations counted as a regression",
+    )
+    parser.add_argument("--json", action="store_true", help="print the report as JSON")
+    return parser.parse_args(argv)
+
+
+def main(argv: List[str] = None) -> int:
+    args = parse_args(argv)
+    if args.record_fixtures:
+        record_predictions(path=args.fixtures)
+        return 0
+
+    cases = create_cases(load_predictions(args.fixtures), args.seed, args.size)
+    report = {
+        "python": platform.python_version(),
+        "functions": {
+            case.name: measure(case, args.repeat, args.min_time)
+            for case in cases
+            if args.filter in case.name
+        },
+    }
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        print_report(report)
+
+    if args.save_baseline:
+        os.makedirs(os.path.dirname(args.baseline), exist_ok=True)
+        with open(args.baseline, "w") as baseline_file:
+            json.dump(report, baseline_file, indent=2)
+            baseline_file.write("\n")
+        return 0
+    if not os.path.exists(args.baseline):
+        return 0
+    with open(args.baseline) as baseline_file:
+        regressed = compare(
+            report,
+            json.load(baseline_file),
+            args.tolerance,
+            args.allocation_tolerance,
+            sys.stderr if args.json else sys.stdout,
+        )
+    return 1 if regressed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
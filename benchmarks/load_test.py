@@ -0,0 +1,394 @@
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License.
+"""
+HTTP load test of /api/messages: simulated users book flights through multi-turn
+conversations, against local stand-ins for the Bot Connector and LUIS, so it runs
+offline. The bot is served in this process from `app.init_func` unless `--url`
+points at a running one. Run with
+
+    python -m benchmarks.load_test --conversations 500 --concurrency 50
+
+or with `--rate 20` to start 20 conversations per second whatever the latency.
+Reports throughput, turn latency percentiles, errors and memory growth.
+"""
+
+import argparse
+import asyncio
+import importlib
+import json
+import logging
+import os
+import random
+import resource
+import sys
+import time
+import uuid
+from collections import Counter
+from typing import Dict, List, Optional
+
+import aiohttp
+from aiohttp.test_utils import TestServer
+
+from .conversations import (
+    ERROR_REPLY,
+    SCENARIOS,
+    BookingScript,
+    booking_requests,
+    prompt_of,
+)
+from .stubs import StubConnector, StubLuis
+
+
+class TurnError(Exception):
+    def __init__(self, kind: str):
+        super(TurnError, self).__init__(kind)
+        self.kind = kind
+
+
+def memory_mb() -> float:
+    """Resident memory of this process, or its peak where /proc is missing."""
+    try:
+        with open("/proc/self/statm") as statm:
+            return int(statm.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2 ** 20
+    except OSError:
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def percentile(values: List[float], rank: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(rank / 100 * len(ordered)))]
+
+
+class LoadStats:
+    def __init__(self):
+        self.latencies: List[float] = []
+        self.errors: Counter = Counter()
+        self.turns = 0
+        self.conversations = 0
+        self.completed = 0
+
+    def report(self, elapsed: float, memory_start: float, memory_end: float) -> dict:
+        failed_turns = sum(self.errors.values())
+        return {
+            "conversations": self.conversations,
+            "completed": self.completed,
+            "turns": self.turns,
+            "elapsed_s": elapsed,
+            "turns_per_s": self.turns / elapsed if elapsed else 0.0,
+            "conversations_per_s": self.completed / elapsed if elapsed else 0.0,
+            "latency_ms": {
+                "p50": percentile(self.latencies, 50) * 1000,
+                "p95": percentile(self.latencies, 95) * 1000,
+                "p99": percentile(self.latencies, 99) * 1000,
+                "max": max(self.latencies, default=0.0) * 1000,
+            },
+            "errors": dict(self.errors),
+            "error_rate": failed_turns / self.turns if self.turns else 0.0,
+            "memory_mb": {
+                "start": memory_start,
+                "end": memory_end,
+                "growth": memory_end - memory_start,
+            },
+        }
+
+
+class SimulatedUser:
+    """
+    Books one flight, answering the bot's prompts until it asks "What else can I do
+    for you?". Some users ask for help, cancel, or give an invalid date or budget
+    first, as `scenario` says.
+    """
+
+    def __init__(
+        self,
+        session: aiohttp.ClientSession,
+        bot_url: str,
+        connector: StubConnector,
+        connector_url: str,
+        stats: LoadStats,
+        request: str,
+        scenario: str,
+        turn_timeout: float,
+        think_time: float,
+    ):
+        self.session = session
+        self.bot_url = bot_url
+        self.connector = connector
+        self.connector_url = connector_url
+        self.stats = stats
+        self.request = request
+        self.scenario = scenario
+        self.turn_timeout = turn_timeout
+        self.think_time = think_time
+
+        self.conversation_id = "load-" + uuid.uuid4().hex
+        self.user_id = "user-" + uuid.uuid4().hex[:8]
+        self.script = BookingScript(request, scenario)
+
+    async def run(self) -> None:
+        self.stats.conversations += 1
+        replies = self.connector.replies(self.conversation_id)
+        try:
+            await self._turn(self._activity("conversationUpdate"), replies, wait_for=None)
+            prompt = await self._turn(self._message("hi"), replies)
+            while prompt != "done":
+                answer = self.script.answer(prompt)
+                if self.think_time:
+                    await asyncio.sleep(random.expovariate(1 / self.think_time))
+                prompt = await self._turn(self._message(answer), replies)
+            self.stats.completed += 1
+        except TurnError as error:
+            self.stats.errors[error.kind] += 1
+        finally:
+            self.connector.forget(self.conversation_id)
+
+    async def _turn(
+        self, activity: dict, replies: asyncio.Queue, wait_for: str = "prompt"
+    ) -> Optional[str]:
+        """Send `activity` and return the bot's next prompt, timing the turn."""
+        self.stats.turns += 1
+        started = time.perf_counter()
+        post = asyncio.ensure_future(self._post(activity))
+        try:
+            if wait_for is None:
+                await asyncio.wait_for(asyncio.shield(post), self.turn_timeout)
+                prompt = None
+            else:
+                prompt = await self._next_prompt(post, replies)
+        except asyncio.TimeoutError:
+            raise TurnError("timeout")
+        finally:
+            if not post.done():
+                post.cancel()
+        self.stats.latencies.append(time.perf_counter() - started)
+        return prompt
+
+    async def _post(self, activity: dict) -> None:
+        async with self.session.post(self.bot_url, json=activity) as response:
+            await response.read()
+            if response.status >= 300:
+                raise TurnError("http %d" % response.status)
+
+    async def _next_prompt(self, post: asyncio.Future, replies: asyncio.Queue) -> str:
+        deadline = time.perf_counter() + self.turn_timeout
+        while True:
+            reply = asyncio.ensure_future(replies.get())
+            done, _ = await asyncio.wait(
+                {post, reply},
+                timeout=deadline - time.perf_counter(),
+                return_when=asyncio.FIRST_COMPLETED,
+            )
+            if post in done and post.exception() is not None:
+                reply.cancel()
+                raise post.exception()
+            if reply not in done:
+                if not done:
+                    reply.cancel()
+                    raise asyncio.TimeoutError()
+                # The request is answered, the replies may still be on their way.
+                done, _ = await asyncio.wait(
+                    {reply}, timeout=deadline - time.perf_counter()
+                )
+                if not done:
+                    reply.cancel()
+                    raise asyncio.TimeoutError()
+
+            text = reply.result().get("text") or ""
+            if ERROR_REPLY in text:
+                raise TurnError("bot error")
+            prompt = prompt_of(text)
+            if prompt is not None:
+                return prompt
+
+    def _activity(self, activity_type: str, **fields) -> dict:
+        activity = {
+            "type": activity_type,
+            "id": uuid.uuid4().hex,
+            "channelId": "loadtest",
+            "serviceUrl": self.connector_url,
+            "from": {"id": self.user_id},
+            "recipient": {"id": "bot"},
+            "conversation": {"id": self.conversation_id},
+            "locale": "en-US",
+        }
+        if activity_type == "conversationUpdate":
+            activity["membersAdded"] = [{"id": self.user_id}]
+        activity.update(fields)
+        return activity
+
+    def _message(self, text: str) -> dict:
+        return self._activity("message", text=text)
+
+
+async def run_load(args: argparse.Namespace) -> dict:
+    random.seed(args.seed)
+    requests = booking_requests()
+
+    stub_luis = StubLuis(latency=args.luis_latency, jitter=args.luis_jitter)
+    luis_server = TestServer(stub_luis.app(), port=args.luis_port)
+    connector = StubConnector()
+    connector_server = TestServer(connector.app())
+    await luis_server.start_server()
+    await connector_server.start_server()
+    luis_url = str(luis_server.make_url("")).rstrip("/")
+    connector_url = str(connector_server.make_url("")).rstrip("/")
+
+    bot_server = None
+    if args.url:
+        bot_url = args.url
+        print(f"LUIS stand-in on {luis_url}, set LuisAPIHostName to it", file=sys.stderr)
+    else:
+        bot_server = TestServer(load_app(luis_url, args).init_func(None))
+        await bot_server.start_server()
+        bot_url = str(bot_server.make_url("/api/messages"))
+
+    stats = LoadStats()
+    scenarios = random.choices(
+        list(SCENARIOS), weights=list(SCENARIOS.values()), k=args.conversations
+    )
+    session = aiohttp.ClientSession(
+        connector=aiohttp.TCPConnector(limit=0),
+        timeout=aiohttp.ClientTimeout(total=args.turn_timeout),
+    )
+
+    def user(index: int) -> SimulatedUser:
+        return SimulatedUser(
+            session,
+            bot_url,
+            connector,
+            connector_url,
+            stats,
+            random.choice(requests),
+            scenarios[index],
+            args.turn_timeout,
+            args.think_time,
+        )
+
+    memory_start = memory_mb()
+    started = time.perf_counter()
+    try:
+        if args.rate:
+            # Open loop: conversations start on schedule, however slow the bot is.
+            tasks = []
+            for index in range(args.conversations):
+                tasks.append(asyncio.ensure_future(user(index).run()))
+                await asyncio.sleep(random.expovariate(args.rate))
+            await asyncio.gather(*tasks)
+        else:
+            # Closed loop: each of `concurrency` users starts a new conversation once
+            # the previous one is over.
+            indexes = iter(range(args.conversations))
+
+            async def loop():
+                for index in indexes:
+                    await user(index).run()
+
+            await asyncio.gather(*(loop() for _ in range(args.concurrency)))
+        elapsed = time.perf_counter() - started
+        report = stats.report(elapsed, memory_start, memory_mb())
+        report["luis_predictions"] = stub_luis.predictions
+        report["replies"] = connector.received
+    finally:
+        await session.close()
+        if bot_server is not None:
+            await bot_server.close()
+        await connector_server.close()
+        await luis_server.close()
+    return report
+
+
+def load_app(luis_url: str, args: argparse.Namespace):
+    """Import app.py configured for the stand-ins; the configuration is read on import."""
+    os.environ["LuisAPIHostName"] = luis_url
+    os.environ["LuisAppId"] = str(uuid.UUID(int=0))
+    os.environ["LuisAPIKey"] = str(uuid.UUID(int=1))
+    os.environ["MicrosoftAppId"] = ""
+    os.environ["MicrosoftAppPassword"] = ""
+    os.environ["PrewarmInBackground"] = "false"
+    os.environ["OutboundBatching"] = str(args.outbound_batching).lower()
+    # Telemetry goes nowhere rather than to Application Insights.
+    os.environ.setdefault("TelemetryExportFile", os.devnull)
+    os.environ.setdefault("AppInsightsInstrumentationKey", str(uuid.UUID(int=0)))
+    if args.no_local_recognizer:
+        os.environ["LocalRecognizerModel"] = ""
+    importlib.reload(sys.modules["config"])
+    return importlib.import_module("app")
+
+
+def print_report(report: dict) -> None:
+    latency = report["latency_ms"]
+    memory = report["memory_mb"]
+    errors = ", ".join("%s: %d" % item for item in sorted(report["errors"].items()))
+    print(
+        f"{report['completed']}/{report['conversations']} conversations, "
+        f"{report['turns']} turns in {report['elapsed_s']:.1f} s"
+    )
+    print(
+        f"  throughput    {report['turns_per_s']:.1f} turns/s, "
+        f"{report['conversations_per_s']:.2f} conversations/s"
+    )
+    print(
+        f"  turn latency  p50 {latency['p50']:.1f} ms, p95 {latency['p95']:.1f} ms, "
+        f"p99 {latency['p99']:.1f} ms, max {latency['max']:.1f} ms"
+    )
+    print(
+        f"  errors        {sum(report['errors'].values())} "
+        f"({100 * report['error_rate']:.2f} %){': ' + errors if errors else ''}"
+    )
+    print(
+        f"  memory        {memory['start']:.1f} MB -> {memory['end']:.1f} MB "
+        f"({memory['growth']:+.1f} MB)"
+    )
+    print(
+        f"  stand-ins     {report['luis_predictions']} LUIS predictions, "
+        f"{report['replies']} replies "
+        f"({report['replies'] / report['turns'] if report['turns'] else 0:.2f} per turn)"
+    )
+
+
+def parse_args(argv: List[str] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--conversations", type=int, default=200)
+    parser.add_argument(
+        "--concurrency", type=int, default=20, help="users conversing at once"
+    )
+    parser.add_argument(
+        "--rate", type=float, default=0, help="conversations started per second"
+    )
+    parser.add_argument("--think-time", type=float, default=0, help="seconds, mean")
+    parser.add_argument("--turn-timeout", type=float, default=30)
+    parser.add_argument("--luis-latency", type=float, default=0.05, help="seconds")
+    parser.add_argument("--luis-jitter", type=float, default=0.5)
+    parser.add_argument("--luis-port", type=int, default=None)
+    parser.add_argument(
+        "--no-local-recognizer",
+        action="store_true",
+        help="send every recognition to the LUIS stand-in",
+    )
+    parser.add_argument(
+        "--outbound-batching",
+        action="store_true",
+        help="send the replies of a turn together, see OutboundBatching",
+    )
+    parser.add_argument("--url", help="/api/messages of a running bot")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", action="store_true", help="print the report as JSON")
+    return parser.parse_args(argv)
+
+
+def main(argv: List[str] = None) -> Dict[str, object]:
+    args = parse_args(argv)
+    # The connector client warns on every timestamp it serializes.
+    logging.getLogger("msrest.serialization").setLevel(logging.ERROR)
+    report = asyncio.get_event_loop().run_until_complete(run_load(args))
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        print_report(report)
+    return report
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,204 @@
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License.
+"""
+Local stand-ins for the Bot Connector service, LUIS and the Bot Framework token
+signing keys, for offline load tests.
+"""
+
+import asyncio
+import json
+import random
+import time
+import uuid
+from typing import Dict, List
+
+import jwt
+from aiohttp import web
+from botframework.connector.auth import AuthenticationConstants
+from cryptography.hazmat.backends import default_backend
+from cryptography.hazmat.primitives.asymmetric import rsa
+from jwt.algorithms import RSAAlgorithm
+
+from config import DefaultConfig
+from helpers.city_gazetteer import CityGazetteer
+from helpers.local_recognizer import LocalRecognizer
+
+
+class StubLuis:
+    """
+    LUIS v2 prediction endpoint answering after `latency` seconds, give or take
+    `jitter` of it. Predictions come from the LocalRecognizer compiled from the LUIS
+    app export, so they label the flight-booking utterances like the deployed app.
+    """
+
+    def __init__(
+        self,
+        latency: float = 0.05,
+        jitter: float = 0.5,
+        model_path: str = DefaultConfig.LOCAL_RECOGNIZER_MODEL,
+        gazetteer_path: str = DefaultConfig.CITY_GAZETTEER,
+    ):
+        self.latency = latency
+        self.jitter = jitter
+        self._recognizer = LocalRecognizer.from_luis_model(
+            model_path, gazetteer=CityGazetteer.from_file(gazetteer_path)
+        )
+        self.predictions = 0
+
+    def app(self) -> web.Application:
+        app = web.Application()
+        app.router.add_post("/luis/v2.0/apps/{app_id}", self._predict)
+        # The recognizer opens its first connection with a HEAD request.
+        app.router.add_get("/", self._ping)
+        return app
+
+    def prediction(self, query: str) -> dict:
+        """The v2 prediction JSON of `query`."""
+        result = self._recognizer.recognize_text(query)
+        intent, score = next(iter(result.intents.items()))
+        instances = result.entities.get("$instance", {})
+        return {
+            "query": query,
+            "topScoringIntent": {"intent": intent, "score": score.score},
+            "intents": [{"intent": intent, "score": score.score}],
+            "entities": [
+                {
+                    "entity": instance["text"].lower(),
+                    "type": entity,
+                    # v2 end indexes are inclusive.
+                    "startIndex": instance["startIndex"],
+                    "endIndex": instance["endIndex"] - 1,
+                    "score": instance["score"],
+                }
+                for entity, entity_instances in instances.items()
+                for instance in entity_instances
+            ],
+        }
+
+    async def _predict(self, request: web.Request) -> web.Response:
+        query = await request.json()
+        self.predictions += 1
+        if self.latency:
+            await asyncio.sleep(
+                self.latency * random.uniform(1 - self.jitter, 1 + self.jitter)
+            )
+        return web.json_response(self.prediction(query))
+
+    async def _ping(self, request: web.Request) -> web.Response:
+        return web.Response()
+
+
+class StubConnector:
+    """
+    Bot Connector endpoints receiving the bot's replies. Each reply is queued for its
+    conversation, where the simulated user reads it, from the first call to `replies`
+    until `forget`.
+    """
+
+    def __init__(self):
+        self.received = 0
+        self._replies: Dict[str, asyncio.Queue] = {}
+
+    def app(self) -> web.Application:
+        app = web.Application()
+        app.router.add_post("/v3/conversations/{conversation_id}/activities", self._send)
+        app.router.add_post(
+            "/v3/conversations/{conversation_id}/activities/{activity_id}", self._send
+        )
+        return app
+
+    def replies(self, conversation_id: str) -> asyncio.Queue:
+        return self._replies.setdefault(conversation_id, asyncio.Queue())
+
+    def forget(self, conversation_id: str) -> List[dict]:
+        """Stop collecting the replies of a conversation, returning the unread ones."""
+        queue = self._replies.pop(conversation_id, None)
+        unread = []
+        while queue is not None and not queue.empty():
+            unread.append(queue.get_nowait())
+        return unread
+
+    async def _send(self, request: web.Request) -> web.Response:
+        activity = await request.json()
+        self.received += 1
+        queue = self._replies.get(request.match_info["conversation_id"])
+        if queue is not None:
+            queue.put_nowait(activity)
+        return web.json_response({"id": str(self.received)})
+
+
+class StubKeyServer:
+    """
+    OpenID metadata and signing keys of the Bot Framework channels, with the channel
+    tokens they verify: `issue_token` signs an Authorization header for the bot as
+    the Bot Connector service does, with the key last made by `rotate`. The keys of
+    the last `keep` rotations are published.
+    """
+
+    METADATA_PATH = "/v1/.well-known/openidconfiguration"
+    KEYS_PATH = "/v1/.well-known/keys"
+
+    def __init__(self, endorsements: List[str] = None, keep: int = 2):
+        self.endorsements = endorsements or ["test", "emulator", "webchat", "msteams"]
+        self.keep = keep
+        self._keys: List[tuple] = []
+        self.rotate()
+
+        self.metadata_requests = 0
+        self.key_requests = 0
+
+    def app(self) -> web.Application:
+        app = web.Application()
+        app.router.add_get(self.METADATA_PATH, self._metadata)
+        app.router.add_get(self.KEYS_PATH, self._jwks)
+        return app
+
+    def rotate(self) -> str:
+        """Sign with a new key from now on, returning its id."""
+        key_id = uuid.uuid4().hex
+        private_key = rsa.generate_private_key(
+            public_exponent=65537, key_size=2048, backend=default_backend()
+        )
+        self._keys = ([(key_id, private_key)] + self._keys)[: self.keep]
+        return key_id
+
+    def issue_token(
+        self, app_id: str, service_url: str, expires_in: float = 3600.0
+    ) -> str:
+        """The Authorization header of a channel activity sent to `app_id`."""
+        key_id, private_key = self._keys[0]
+        now = int(time.time())
+        token = jwt.encode(
+            {
+                "iss": AuthenticationConstants.TO_BOT_FROM_CHANNEL_TOKEN_ISSUER,
+                "aud": app_id,
+                "serviceurl": service_url,
+                "nbf": now,
+                "exp": now + int(expires_in),
+            },
+            private_key,
+            algorithm="RS256",
+            headers={"kid": key_id},
+        )
+        if isinstance(token, bytes):
+            token = token.decode("ascii")
+        return f"Bearer {token}"
+
+    async def _metadata(self, request: web.Request) -> web.Response:
+        self.metadata_requests += 1
+        return web.json_response(
+            {
+                "issuer": AuthenticationConstants.TO_BOT_FROM_CHANNEL_TOKEN_ISSUER,
+                "jwks_uri": f"{request.scheme}://{request.host}{self.KEYS_PATH}",
+                "id_token_signing_alg_values_supported": ["RS256"],
+            }
+        )
+
+    async def _jwks(self, request: web.Request) -> web.Response:
+        self.key_requests += 1
+        keys = []
+        for key_id, private_key in self._keys:
+            key = json.loads(RSAAlgorithm.to_jwk(private_key.public_key()))
+            key.update(kid=key_id, use="sig", endorsements=self.endorsements)
+            keys.append(key)
+        return web.json_response({"keys": keys})
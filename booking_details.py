@@ -1,8 +1,34 @@
 # Copyright (c) Microsoft Corporation. All rights reserved.
 # Licensed under the MIT License.
 
+from typing import TYPE_CHECKING, List
+
+if TYPE_CHECKING:
+    # Imported for annotations only, helpers imports this module.
+    from helpers.budget_parser import Budget
+
 
 class BookingDetails:
+    """
+    Booking gathered by the booking dialog. It travels in the dialog options, so it
+    is saved with the dialog state on every turn: it keeps its fields in slots and
+    is pickled as the compact, versioned list of `encode`.
+    """
+
+    # Layout of the encoded list, to bump when it changes. `decode` keeps reading
+    # every earlier version, version 0 being the attribute dict of the former class.
+    VERSION = 1
+
+    __slots__ = (
+        "initial_message",
+        "destination",
+        "origin",
+        "str_date",
+        "end_date",
+        "budget",
+        "unsupported_airports",
+    )
+
     def __init__(
         self,
         initial_message: str = None,
@@ -10,7 +36,7 @@ class BookingDetails:
         origin: str = None,
         str_date: str = None,
         end_date: str = None,
-        budget: str = None,
+        budget: "Budget" = None,
         unsupported_airports=None,
     ):
         if unsupported_airports is None:
@@ -22,3 +48,51 @@ class BookingDetails:
         self.end_date = end_date
         self.budget = budget
         self.unsupported_airports = unsupported_airports
+
+    def encode(self) -> list:
+        return [
+            self.VERSION,
+            self.initial_message,
+            self.destination,
+            self.origin,
+            self.str_date,
+            self.end_date,
+            self.budget.encode() if self.budget is not None else None,
+            list(self.unsupported_airports),
+        ]
+
+    @staticmethod
+    def decode(data) -> "BookingDetails":
+        booking_details = BookingDetails.__new__(BookingDetails)
+        booking_details.__setstate__(data)
+        return booking_details
+
+    def __getstate__(self) -> list:
+        return self.encode()
+
+    def __setstate__(self, state) -> None:
+        from helpers.budget_parser import Budget  # pylint: disable=import-outside-toplevel
+
+        if isinstance(state, dict):
+            # Version 0: attribute dict of the former class, budget already decoded.
+            for name in self.__slots__:
+                setattr(self, name, state.get(name))
+            self.unsupported_airports = list(self.unsupported_airports or [])
+            return
+
+        if state[0] > self.VERSION:
+            raise ValueError(
+                "BookingDetails version %s is newer than %s" % (state[0], self.VERSION)
+            )
+        (
+            _,
+            self.initial_message,
+            self.destination,
+            self.origin,
+            self.str_date,
+            self.end_date,
+            budget,
+            unsupported_airports,
+        ) = state
+        self.budget = Budget.decode(budget) if budget is not None else None
+        self.unsupported_airports = list(unsupported_airports)
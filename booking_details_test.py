@@ -0,0 +1,71 @@
+import unittest
+from decimal import Decimal
+
+import jsonpickle
+
+from booking_details import BookingDetails
+from helpers.budget_parser import Budget
+
+LEGACY_STATE = (
+    '{"py/object": "booking_details.BookingDetails", "py/state": {'
+    '"initial_message": "book", "destination": "Berlin", "origin": "Paris", '
+    '"str_date": "2022-08-18", "end_date": null, "budget": {"py/object": '
+    '"helpers.budget_parser.Budget", "py/newargs": {"py/tuple": [{"py/reduce": '
+    '[{"py/type": "decimal.Decimal"}, {"py/tuple": ["500"]}]}, "USD", "500 usd"]}, '
+    '"py/state": null}, "unsupported_airports": ["XYZ"]}}'
+)
+
+
+def fields(booking_details: BookingDetails) -> dict:
+    return {name: getattr(booking_details, name) for name in BookingDetails.__slots__}
+
+
+class BookingDetailsTest(unittest.TestCase):
+    """
+    This class contains tests of the BookingDetails serialization:
+    - versioned encode/decode and jsonpickle round trips
+    - decoding the state saved by the former class
+    - refusing state from a newer version
+    """
+
+    def setUp(self):
+        self.booking_details = BookingDetails(
+            "book",
+            "Berlin",
+            "Paris",
+            "2022-08-18",
+            "2022-08-25",
+            Budget(Decimal("500"), "USD", "500 usd"),
+            ["XYZ"],
+        )
+
+    def test_slots(self):
+        self.assertFalse(hasattr(self.booking_details, "__dict__"))
+
+    def test_round_trip(self):
+        encoded = self.booking_details.encode()
+        self.assertEqual(BookingDetails.VERSION, encoded[0])
+        self.assertEqual(
+            fields(self.booking_details), fields(BookingDetails.decode(encoded))
+        )
+
+        document = jsonpickle.encode(self.booking_details)
+        self.assertEqual(
+            fields(self.booking_details), fields(jsonpickle.decode(document))
+        )
+
+        empty = jsonpickle.decode(jsonpickle.encode(BookingDetails()))
+        self.assertEqual(fields(BookingDetails()), fields(empty))
+
+    def test_legacy_state(self):
+        legacy = jsonpickle.decode(LEGACY_STATE)
+        self.booking_details.end_date = None
+
+        self.assertEqual(fields(self.booking_details), fields(legacy))
+
+    def test_newer_version(self):
+        encoded = self.booking_details.encode()
+        encoded[0] = BookingDetails.VERSION + 1
+
+        with self.assertRaises(ValueError):
+            BookingDetails.decode(encoded)
@@ -2,7 +2,8 @@
 # Licensed under the MIT License.
 """bots module."""
 
+from .card_cache import CardCache
 from .dialog_bot import DialogBot
 from .dialog_and_welcome_bot import DialogAndWelcomeBot
 
-__all__ = ["DialogBot", "DialogAndWelcomeBot"]
+__all__ = ["CardCache", "DialogBot", "DialogAndWelcomeBot"]
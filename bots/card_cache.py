@@ -0,0 +1,123 @@
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License.
+"""Adaptive Card assets loaded once and served as pre-built attachments."""
+
+import json
+import os
+import threading
+from string import Template
+from typing import Dict, Mapping, Tuple
+
+from botbuilder.schema import Attachment
+
+ADAPTIVE_CARD_CONTENT_TYPE = "application/vnd.microsoft.card.adaptive"
+DEFAULT_CARDS_PATH = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), "resources"
+)
+
+
+class CardCache:
+    """
+    Loads and validates every `<name>[.<locale>].json` card of a directory once.
+
+    `attachment` returns a pre-built Attachment shared by all callers, so it must not
+    be modified. The card of a locale falls back to its language ("fr-ca" -> "fr"),
+    then to the card without locale. With `reload`, changed files are reloaded on
+    access, which is meant for development only.
+    """
+
+    def __init__(self, path: str = DEFAULT_CARDS_PATH, reload: bool = False):
+        self.path = path
+        self.reload = reload
+        # (name, locale) -> Attachment, locale "" for the default card.
+        self._attachments: Dict[Tuple[str, str], Attachment] = {}
+        self._mtimes: Dict[str, float] = {}
+        self._loaded = False
+        self._lock = threading.Lock()
+
+    def load(self) -> None:
+        """Read all cards now. Invalid cards raise ValueError naming their file."""
+        with self._lock:
+            attachments = {}
+            mtimes = {}
+            for file_name in sorted(os.listdir(self.path)):
+                if not file_name.endswith(".json"):
+                    continue
+                file_path = os.path.join(self.path, file_name)
+                name, _, locale = file_name[: -len(".json")].partition(".")
+                attachments[(name, locale.lower())] = self._load_card(file_path)
+                mtimes[file_path] = os.path.getmtime(file_path)
+
+            self._attachments = attachments
+            self._mtimes = mtimes
+            self._loaded = True
+
+    def attachment(
+        self, name: str, locale: str = None, data: Mapping[str, object] = None
+    ) -> Attachment:
+        """
+        Return the `name` card for `locale`. With `data`, ${key} placeholders of the
+        card texts are filled in a new Attachment.
+        """
+        if not self._loaded or (self.reload and self._is_stale()):
+            self.load()
+
+        attachment = None
+        for candidate in self._locales(locale):
+            attachment = self._attachments.get((name, candidate))
+            if attachment is not None:
+                break
+        if attachment is None:
+            raise KeyError("Card '%s' not found in %s" % (name, self.path))
+
+        if data is None:
+            return attachment
+        return Attachment(
+            content_type=attachment.content_type,
+            content=_fill(attachment.content, data),
+        )
+
+    def _is_stale(self) -> bool:
+        try:
+            return any(
+                os.path.getmtime(path) != mtime for path, mtime in self._mtimes.items()
+            ) or len(
+                [name for name in os.listdir(self.path) if name.endswith(".json")]
+            ) != len(self._mtimes)
+        except OSError:
+            return True
+
+    @staticmethod
+    def _locales(locale: str):
+        if locale:
+            locale = locale.lower()
+            yield locale
+            language = locale.split("-")[0]
+            if language != locale:
+                yield language
+        yield ""
+
+    @staticmethod
+    def _load_card(path: str) -> Attachment:
+        with open(path, encoding="utf-8") as card_file:
+            try:
+                card = json.load(card_file)
+            except ValueError as error:
+                raise ValueError("Invalid card %s: %s" % (path, error))
+
+        if not isinstance(card, dict) or card.get("type") != "AdaptiveCard":
+            raise ValueError("Invalid card %s: not an AdaptiveCard" % path)
+        if "version" not in card or not isinstance(card.get("body", []), list):
+            raise ValueError("Invalid card %s: missing version or body" % path)
+
+        return Attachment(content_type=ADAPTIVE_CARD_CONTENT_TYPE, content=card)
+
+
+def _fill(value: object, data: Mapping[str, object]) -> object:
+    if isinstance(value, str):
+        return Template(value).safe_substitute(data)
+    if isinstance(value, dict):
+        return {key: _fill(item, data) for key, item in value.items()}
+    if isinstance(value, list):
+        return [_fill(item, data) for item in value]
+    return value
@@ -1,9 +1,6 @@
 # Copyright (c) Microsoft Corporation. All rights reserved.
 # Licensed under the MIT License.
 """Main dialog to welcome users."""
-import json
-import os.path
-
 from typing import List
 from botbuilder.dialogs import Dialog
 from botbuilder.core import (
@@ -14,6 +11,7 @@ from botbuilder.core import (
 )
 from botbuilder.schema import Activity, Attachment, ChannelAccount
 from helpers.activity_helper import create_activity_reply
+from .card_cache import CardCache
 from .dialog_bot import DialogBot
 
 
@@ -26,11 +24,13 @@ class DialogAndWelcomeBot(DialogBot):
         user_state: UserState,
         dialog: Dialog,
         telemetry_client: BotTelemetryClient,
+        card_cache: CardCache = None,
     ):
         super(DialogAndWelcomeBot, self).__init__(
             conversation_state, user_state, dialog, telemetry_client
         )
         self.telemetry_client = telemetry_client
+        self.card_cache = card_cache or CardCache()
 
     async def on_members_added_activity(
         self, members_added: List[ChannelAccount], turn_context: TurnContext
@@ -40,7 +40,9 @@ class DialogAndWelcomeBot(DialogBot):
             # To learn more about Adaptive Cards, see https://aka.ms/msbot-adaptivecards
             # for more details.
             if member.id != turn_context.activity.recipient.id:
-                welcome_card = self.create_adaptive_card_attachment()
+                welcome_card = self.create_adaptive_card_attachment(
+                    turn_context.activity.locale
+                )
                 response = self.create_response(turn_context.activity, welcome_card)
                 await turn_context.send_activity(response)
 
@@ -50,14 +52,11 @@ class DialogAndWelcomeBot(DialogBot):
         response.attachments = [attachment]
         return response
 
-    # Load attachment from file.
-    def create_adaptive_card_attachment(self):
-        """Create an adaptive card."""
-        relative_path = os.path.abspath(os.path.dirname(__file__))
-        path = os.path.join(relative_path, "resources/welcomeCard.json")
-        with open(path) as card_file:
-            card = json.load(card_file)
+    def warm(self):
+        """Load the cards before the first conversation starts."""
+        self.card_cache.load()
 
-        return Attachment(
-            content_type="application/vnd.microsoft.card.adaptive", content=card
-        )
+    # Attachment pre-built from file, shared by all responses.
+    def create_adaptive_card_attachment(self, locale: str = None) -> Attachment:
+        """Create an adaptive card."""
+        return self.card_cache.attachment("welcomeCard", locale)
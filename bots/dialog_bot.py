@@ -12,6 +12,7 @@ from botbuilder.core import (
 )
 from botbuilder.dialogs import Dialog, DialogExtensions
 from helpers.dialog_helper import DialogHelper
+from telemetry import TRACER
 
 
 class DialogBot(ActivityHandler):
@@ -39,15 +40,21 @@ class DialogBot(ActivityHandler):
         self.telemetry_client = telemetry_client
 
     async def on_message_activity(self, turn_context: TurnContext):
-        await DialogExtensions.run_dialog(
-            self.dialog,
-            turn_context,
-            self.conversation_state.create_property("DialogState"),
-        )
+        # The dialog state is loaded up front so its read is timed apart from the dialog.
+        with TRACER.span("state.load"):
+            await self.conversation_state.load(turn_context)
+
+        with TRACER.span("dialog"):
+            await DialogExtensions.run_dialog(
+                self.dialog,
+                turn_context,
+                self.conversation_state.create_property("DialogState"),
+            )
 
         # Save any state changes that might have occured during the turn.
-        await self.conversation_state.save_changes(turn_context, False)
-        await self.user_state.save_changes(turn_context, False)
+        with TRACER.span("state.save"):
+            await self.conversation_state.save_changes(turn_context, False)
+            await self.user_state.save_changes(turn_context, False)
 
     @property
     def telemetry_client(self) -> BotTelemetryClient:
@@ -0,0 +1,58 @@
+from decimal import Decimal
+from unittest import TestCase
+
+from helpers.budget_parser import Budget, parse_budget, parse_budget_reply
+
+
+class BudgetParserTest(TestCase):
+    """
+    This class contains tests of the budget grammar:
+    - symbols, ISO codes, currency words, separators and "k" suffixes
+    - plain spaces grouping thousands only next to a currency
+    - text holding no amount, or several amounts without a currency
+    - prompt replies only read without a currency when they hold nothing else
+    """
+
+    def test_parse_budget(self):
+        cases = {
+            "100": (Decimal("100"), None),
+            "$100": (Decimal("100"), "USD"),
+            "100€": (Decimal("100"), "EUR"),
+            "euros 100": (Decimal("100"), "EUR"),
+            "500 $": (Decimal("500"), "USD"),
+            "EUR 300": (Decimal("300"), "EUR"),
+            "2.5k euros": (Decimal("2500"), "EUR"),
+            "around 1,200 euros max": (Decimal("1200"), "EUR"),
+            "1.200,50 €": (Decimal("1200.50"), "EUR"),
+            "1 200 GBP": (Decimal("1200"), "GBP"),
+            "$100 200": (Decimal("100200"), "USD"),
+            "EUR 1 200 000": (Decimal("1200000"), "EUR"),
+            "100 200 euros": (Decimal("100200"), "EUR"),
+            "1,5 euros": (Decimal("1.5"), "EUR"),
+            "3000 bucks": (Decimal("3000"), "USD"),
+            "100eur": (Decimal("100"), "EUR"),
+            "250usd": (Decimal("250"), "USD"),
+        }
+        for text, (amount, currency) in cases.items():
+            with self.subTest(text=text):
+                budget = parse_budget(text)
+                self.assertEqual(amount, budget.amount)
+                self.assertEqual(currency, budget.currency)
+
+    def test_no_amount(self):
+        self.assertIsNone(parse_budget("as cheap as possible"))
+        # Two amounts, neither read as 100200 nor as 100.
+        self.assertIsNone(parse_budget("100 200"))
+        self.assertEqual("200 EUR", str(parse_budget("100 or 200 €")))
+        self.assertEqual("cheap", str(Budget.unparsed("cheap")))
+
+    def test_parse_budget_reply(self):
+        for text in ("100", " 2k ", "1,200.", "150 dollars please", "around 300€"):
+            with self.subTest(text=text):
+                self.assertIsNotNone(parse_budget_reply(text))
+        for text in ("May 3rd", "for 2 people", "100 200", "100 euroland"):
+            with self.subTest(text=text):
+                self.assertIsNone(parse_budget_reply(text))
+
+    def test_str(self):
+        self.assertEqual("1200 EUR", str(parse_budget("1,200 euros")))
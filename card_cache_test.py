@@ -0,0 +1,83 @@
+import json
+import os
+import shutil
+import tempfile
+import unittest
+
+from bots.card_cache import ADAPTIVE_CARD_CONTENT_TYPE, CardCache
+
+
+def card(text: str) -> dict:
+    return {
+        "type": "AdaptiveCard",
+        "version": "1.0",
+        "body": [{"type": "TextBlock", "text": text}],
+    }
+
+
+class CardCacheTest(unittest.TestCase):
+    """
+    This class contains tests of the card cache:
+    - the bundled welcome card loads and is served as one shared attachment
+    - locale fallback and template filling
+    - validation of card files
+    - reload of changed files
+    """
+
+    def setUp(self):
+        self.path = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.path)
+
+    def write(self, file_name: str, content: object):
+        with open(os.path.join(self.path, file_name), "w") as card_file:
+            json.dump(content, card_file)
+
+    def text(self, attachment) -> str:
+        return attachment.content["body"][0]["text"]
+
+    def test_welcome_card(self):
+        cache = CardCache()
+        attachment = cache.attachment("welcomeCard")
+
+        self.assertEqual(ADAPTIVE_CARD_CONTENT_TYPE, attachment.content_type)
+        self.assertEqual("AdaptiveCard", attachment.content["type"])
+        self.assertIs(attachment, cache.attachment("welcomeCard", "en-US"))
+
+    def test_locales(self):
+        self.write("welcome.json", card("Welcome"))
+        self.write("welcome.fr.json", card("Bienvenue"))
+        cache = CardCache(self.path)
+
+        self.assertEqual("Welcome", self.text(cache.attachment("welcome")))
+        self.assertEqual("Welcome", self.text(cache.attachment("welcome", "de-DE")))
+        self.assertEqual("Bienvenue", self.text(cache.attachment("welcome", "fr-CA")))
+        with self.assertRaises(KeyError):
+            cache.attachment("goodbye")
+
+    def test_template(self):
+        self.write("welcome.json", card("Welcome ${name}, pay $5"))
+        cache = CardCache(self.path)
+
+        filled = cache.attachment("welcome", data={"name": "Ada"})
+
+        self.assertEqual("Welcome Ada, pay $5", self.text(filled))
+        self.assertEqual("Welcome ${name}, pay $5", self.text(cache.attachment("welcome")))
+
+    def test_invalid_card(self):
+        self.write("welcome.json", {"type": "HeroCard"})
+
+        with self.assertRaises(ValueError):
+            CardCache(self.path).load()
+
+    def test_reload(self):
+        self.write("welcome.json", card("Welcome"))
+        cache = CardCache(self.path, reload=True)
+        self.assertEqual("Welcome", self.text(cache.attachment("welcome")))
+
+        self.write("welcome.json", card("Hello"))
+        path = os.path.join(self.path, "welcome.json")
+        os.utime(path, (0, os.path.getmtime(path) + 10))
+
+        self.assertEqual("Hello", self.text(cache.attachment("welcome")))
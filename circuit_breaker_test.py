@@ -0,0 +1,153 @@
+import asyncio
+import io
+from contextlib import redirect_stdout
+
+from aiounittest import AsyncTestCase
+
+from botbuilder.core import NullTelemetryClient, RecognizerResult, TurnContext
+from botbuilder.core.adapters import TestAdapter
+from botbuilder.schema import (
+    Activity,
+    ActivityTypes,
+    ChannelAccount,
+    ConversationAccount,
+)
+
+from config import DefaultConfig
+from flight_booking_recognizer import FlightBookingRecognizer
+from helpers.circuit_breaker import CircuitBreaker, CircuitState
+from helpers.luis_helper import LUIS_FAILURE_EVENT, LuisHelper
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+class RecordingTelemetryClient(NullTelemetryClient):
+    def __init__(self):
+        super().__init__()
+        self.events = []
+
+    def track_event(self, name, properties=None, measurements=None):
+        self.events.append((name, properties))
+
+
+class HangingRecognizer:
+    def __init__(self):
+        self.calls = 0
+
+    async def recognize(self, turn_context: TurnContext) -> RecognizerResult:
+        self.calls += 1
+        await asyncio.sleep(10)
+
+
+class CircuitBreakerTest(AsyncTestCase):
+    """
+    This class contains tests of the LUIS circuit breaker:
+    - opening after repeated failures, half open probe, closing on success
+    - deadline on slow LUIS calls and fast fallback once the circuit is open
+    - each fallback tracked as a degradation, nothing printed
+    - empty text answered without LUIS
+    """
+
+    def test_breaker_transitions(self):
+        clock = FakeClock()
+        states = []
+        breaker = CircuitBreaker(
+            failure_threshold=2, reset_timeout=10, on_state_change=states.append, clock=clock
+        )
+
+        breaker.record_failure()
+        self.assertEqual(CircuitState.CLOSED, breaker.state)
+        breaker.record_failure(timeout=True)
+        self.assertEqual(CircuitState.OPEN, breaker.state)
+        self.assertFalse(breaker.allow_request())
+
+        clock.now = 10
+        self.assertTrue(breaker.allow_request())
+        self.assertFalse(breaker.allow_request())
+        breaker.record_failure()
+        self.assertEqual(CircuitState.OPEN, breaker.state)
+
+        clock.now = 20
+        self.assertTrue(breaker.allow_request())
+        breaker.record_success()
+
+        self.assertEqual(CircuitState.CLOSED, breaker.state)
+        self.assertEqual(2, breaker.trips)
+        self.assertEqual(1, breaker.timeouts)
+        self.assertEqual(
+            [
+                CircuitState.OPEN,
+                CircuitState.HALF_OPEN,
+                CircuitState.OPEN,
+                CircuitState.HALF_OPEN,
+                CircuitState.CLOSED,
+            ],
+            states,
+        )
+
+    async def test_deadline_opens_circuit(self):
+        config = DefaultConfig()
+        config.LOCAL_RECOGNIZER_MODEL = ""
+        config.LUIS_DEADLINE = 0.01
+        config.LUIS_BREAKER_FAILURES = 2
+        telemetry_client = RecordingTelemetryClient()
+        recognizer = FlightBookingRecognizer(config, telemetry_client)
+        fake = HangingRecognizer()
+        recognizer._recognizer = fake
+
+        output = io.StringIO()
+        with redirect_stdout(output):
+            for utterance in ("flight to paris", "flight to london"):
+                intent, luis_result = await LuisHelper.execute_luis_query(
+                    recognizer, self._get_context(utterance)
+                )
+                self.assertIsNone(intent)
+                self.assertIsNone(luis_result)
+
+            self.assertFalse(recognizer.is_available)
+            await LuisHelper.execute_luis_query(recognizer, self._get_context("berlin"))
+        self.assertEqual(2, fake.calls)
+        self.assertEqual(1, recognizer.breaker.trips)
+
+        self.assertEqual("", output.getvalue())
+        self.assertEqual(
+            [
+                ("TimeoutError", "true"),
+                ("TimeoutError", "true"),
+                ("CircuitOpenError", "true"),
+            ],
+            [
+                (properties["error"], properties["degraded"])
+                for name, properties in telemetry_client.events
+                if name == LUIS_FAILURE_EVENT
+            ],
+        )
+
+    async def test_empty_text(self):
+        config = DefaultConfig()
+        config.LOCAL_RECOGNIZER_MODEL = ""
+        recognizer = FlightBookingRecognizer(config)
+        fake = HangingRecognizer()
+        recognizer._recognizer = fake
+
+        for text in ("", "  "):
+            result = await recognizer.recognize(self._get_context(text))
+            self.assertEqual([""], list(result.intents))
+        self.assertEqual(0, fake.calls)
+
+    @staticmethod
+    def _get_context(utterance: str) -> TurnContext:
+        activity = Activity(
+            type=ActivityTypes.message,
+            text=utterance,
+            conversation=ConversationAccount(),
+            recipient=ChannelAccount(),
+            from_property=ChannelAccount(),
+        )
+        return TurnContext(TestAdapter(), activity)
@@ -0,0 +1,54 @@
+from unittest import TestCase
+
+from helpers.city_gazetteer import CityGazetteer
+
+
+class CityGazetteerTest(TestCase):
+    """
+    This class contains tests of the city gazetteer:
+    - multi-word names and aliases found in one scan
+    - whole-word, leftmost-longest matching
+    - airport codes, written in capitals, and airport names
+    - extending the bundled list
+    """
+
+    gazetteer = CityGazetteer.from_file()
+
+    def test_multi_word_reply(self):
+        match = self.gazetteer.first("I'm leaving from New York")
+
+        self.assertEqual("New York", match.name)
+        self.assertEqual("NYC", match.code)
+        self.assertEqual("New York", "I'm leaving from New York"[match.start:match.end])
+
+    def test_aliases_and_longest_match(self):
+        text = "from new york city to roma"
+        matches = self.gazetteer.find(text)
+
+        self.assertEqual(["New York", "Rome"], [match.name for match in matches])
+        self.assertEqual("new york city", text[matches[0].start:matches[0].end])
+
+    def test_whole_words_only(self):
+        self.assertEqual([], self.gazetteer.find("Romania and Parisian cafes"))
+
+    def test_airports(self):
+        match = self.gazetteer.first("fly to JFK")
+        self.assertEqual(("New York", 7, 10), (match.name, match.start, match.end))
+        self.assertEqual("London", self.gazetteer.first("LHR").name)
+        self.assertEqual("London", self.gazetteer.first("to LHR please").name)
+        self.assertEqual("Paris", self.gazetteer.first("landing at Charles de Gaulle").name)
+        self.assertEqual("Paris", self.gazetteer.first("from PAR").name)
+
+        # Codes are also words, and parts of words.
+        self.assertEqual([], self.gazetteer.find("it was on par, jfk"))
+        self.assertEqual([], self.gazetteer.find("LHRX or XJFK"))
+
+    def test_extended(self):
+        gazetteer = self.gazetteer.extended([("Gotham City", None, ["gotham"])])
+
+        self.assertEqual(len(self.gazetteer) + 1, len(gazetteer))
+        self.assertEqual("Gotham City", gazetteer.first("to gotham please").name)
+        self.assertEqual("Zurich", gazetteer.first("Zürich").name)
+        self.assertIsNone(self.gazetteer.first("gotham"))
+        self.assertEqual("London", gazetteer.first("to LHR").name)
+        self.assertIsNone(gazetteer.first("to lhr"))
@@ -14,8 +14,125 @@ class DefaultConfig:
     APP_PASSWORD = os.environ.get("MicrosoftAppPassword", "")
     LUIS_APP_ID = os.environ.get("LuisAppId", "")
     LUIS_API_KEY = os.environ.get("LuisAPIKey", "")
-    # LUIS endpoint host name, ie "westus.api.cognitive.microsoft.com"
+    # LUIS endpoint host name, ie "westus.api.cognitive.microsoft.com", or the URL of
+    # a local stand-in, ie "http://127.0.0.1:5000"
     LUIS_API_HOST_NAME = os.environ.get("LuisAPIHostName", "")
+    # Published LUIS version, part of the recognition cache key
+    LUIS_APP_VERSION = os.environ.get("LuisAppVersion", "")
+    # Recognition cache limits, set either to 0 to disable the cache
+    LUIS_CACHE_SIZE = int(os.environ.get("LuisCacheSize", "1024"))
+    LUIS_CACHE_TTL = float(os.environ.get("LuisCacheTtl", "600"))
+    # Connection pool of the LUIS prediction transport, timeouts in seconds
+    LUIS_POOL_SIZE = int(os.environ.get("LuisPoolSize", "32"))
+    LUIS_PER_HOST_LIMIT = int(os.environ.get("LuisPerHostLimit", "16"))
+    LUIS_CONNECT_TIMEOUT = float(os.environ.get("LuisConnectTimeout", "2"))
+    LUIS_READ_TIMEOUT = float(os.environ.get("LuisReadTimeout", "5"))
+    LUIS_DNS_CACHE_TTL = int(os.environ.get("LuisDnsCacheTtl", "300"))
+    # Latency budget of one LUIS call in seconds, and circuit breaker settings
+    LUIS_DEADLINE = float(os.environ.get("LuisDeadline", "1.5"))
+    LUIS_BREAKER_FAILURES = int(os.environ.get("LuisBreakerFailures", "5"))
+    LUIS_BREAKER_RESET = float(os.environ.get("LuisBreakerReset", "30"))
+    # LUIS app export the local recognizer is compiled from, empty to disable it
+    LOCAL_RECOGNIZER_MODEL = os.environ.get(
+        "LocalRecognizerModel",
+        os.path.join(os.path.dirname(__file__), "cognitiveModels", "FlightBooking.json"),
+    )
+    # Training utterances exported by the LUIS notebook, separated by os.pathsep
+    LOCAL_RECOGNIZER_TRAINING = [
+        path
+        for path in os.environ.get("LocalRecognizerTraining", "").split(os.pathsep)
+        if path
+    ]
+    # City/airport list of the city gazetteer
+    CITY_GAZETTEER = os.environ.get(
+        "CityGazetteer",
+        os.path.join(os.path.dirname(__file__), "helpers", "resources", "airports.json"),
+    )
+    # Local answers scoring below this threshold are sent to LUIS
+    LOCAL_RECOGNIZER_THRESHOLD = float(
+        os.environ.get("LocalRecognizerThreshold", "0.8")
+    )
+    # Cultures whose date-time models are built at startup, comma separated
+    DATETIME_CULTURES = os.environ.get("DateTimeCultures", "en-us").split(",")
+    # Warm the date models, welcome card and LUIS connection after the listener is up
+    # ("true") or before it accepts traffic ("false")
+    PREWARM_IN_BACKGROUND = (
+        os.environ.get("PrewarmInBackground", "true").lower() == "true"
+    )
+    # Reload changed card files on access, for development only
+    CARD_RELOAD = os.environ.get("CardReload", "false").lower() == "true"
+    # Directory of the SQLite state storage, empty to keep state in memory
+    STATE_STORAGE_PATH = os.environ.get("StateStoragePath", "")
+    STATE_STORAGE_SHARDS = int(os.environ.get("StateStorageShards", "4"))
+    # Delay in seconds during which state writes are gathered in one transaction
+    STATE_STORAGE_FLUSH_INTERVAL = float(
+        os.environ.get("StateStorageFlushInterval", "0.005")
+    )
+    # Telemetry buffer: items exported per batch, seconds between exports, and the
+    # item dropped when the buffer is full, "oldest" or "newest"
+    TELEMETRY_QUEUE_SIZE = int(os.environ.get("TelemetryQueueSize", "10000"))
+    TELEMETRY_BATCH_SIZE = int(os.environ.get("TelemetryBatchSize", "500"))
+    TELEMETRY_FLUSH_INTERVAL = float(os.environ.get("TelemetryFlushInterval", "5"))
+    TELEMETRY_DROP_POLICY = os.environ.get("TelemetryDropPolicy", "oldest")
+    # Local stand-ins for Application Insights: a JSON lines file or a collector URL
+    TELEMETRY_EXPORT_FILE = os.environ.get("TelemetryExportFile", "")
+    TELEMETRY_EXPORT_URL = os.environ.get("TelemetryExportUrl", "")
+    # Sampling rate per telemetry item name or kind, e.g. "WaterfallStep=0.2,event=0.5",
+    # and kept items per second the rates are scaled down to, 0 for no limit
+    TELEMETRY_SAMPLING_RATES = {
+        name.strip(): float(rate)
+        for name, _, rate in (
+            entry.partition("=")
+            for entry in os.environ.get(
+                "TelemetrySamplingRates", "WaterfallStep=0.2"
+            ).split(",")
+            if entry.strip()
+        )
+    }
+    TELEMETRY_TARGET_PER_SECOND = float(
+        os.environ.get("TelemetryTargetPerSecond", "50")
+    )
+    # Answer activities 202 and run their turn in the background, replying through
+    # the conversation reference ("true"), or answer once the turn is over ("false")
+    ASYNC_TURNS = os.environ.get("AsyncTurns", "false").lower() == "true"
+    # Seconds before its expiry the token of the bot's replies is refreshed, in the
+    # background while the current one is still used
+    TOKEN_REFRESH_MARGIN = float(os.environ.get("TokenRefreshMargin", "300"))
+    # OpenID metadata of the keys signing the channels' tokens, empty for the Bot
+    # Framework's, or the URL of a local stand-in
+    CHANNEL_OPENID_METADATA_URL = os.environ.get("ChannelOpenIdMetadataUrl", "")
+    # Seconds between the background refreshes of the signing keys
+    SIGNING_KEY_REFRESH_INTERVAL = float(
+        os.environ.get("SigningKeyRefreshInterval", "86400")
+    )
+    # Validated tokens kept until they expire, so they are not verified again, 0 to
+    # verify every request
+    VALIDATED_TOKEN_CACHE_SIZE = int(os.environ.get("ValidatedTokenCacheSize", "1024"))
+    # Hold the replies of a turn until it ends and send consecutive messages as one,
+    # in one connector call ("true"), or send each reply as it is made ("false")
+    OUTBOUND_BATCHING = os.environ.get("OutboundBatching", "false").lower() == "true"
+    # Turns run at once, turns waiting in all and per conversation, and seconds a
+    # turn may wait; over these limits activities are answered 503 or 429
+    MAX_TURNS_IN_FLIGHT = int(os.environ.get("MaxTurnsInFlight", "64"))
+    MAX_QUEUED_TURNS = int(os.environ.get("MaxQueuedTurns", "256"))
+    MAX_QUEUED_TURNS_PER_CONVERSATION = int(
+        os.environ.get("MaxQueuedTurnsPerConversation", "8")
+    )
+    TURN_QUEUE_TIMEOUT = float(os.environ.get("TurnQueueTimeout", "10"))
+    # Time the request, turn, dialog steps, LUIS calls and replies into the latency
+    # histograms served on /metrics ("true"), or time nothing ("false")
+    TRACING = os.environ.get("Tracing", "true").lower() == "true"
+    # Seconds a request may take before it is tracked as a SlowTurn event with the
+    # time of each of its spans, 0 to never track them
+    SLOW_TURN_THRESHOLD = float(os.environ.get("SlowTurnThreshold", "2"))
+    # Seconds between the turn queue and state save metrics
+    TURN_METRICS_INTERVAL = float(os.environ.get("TurnMetricsInterval", "10"))
+    # Worker processes serving the port, state must be in SQLite when more than 1
+    WORKERS = int(os.environ.get("Workers", "1"))
+    # Seconds a worker may go without a heartbeat before it is killed and replaced
+    WORKER_HEARTBEAT_TIMEOUT = float(os.environ.get("WorkerHeartbeatTimeout", "30"))
+    # Seconds the turns in progress get to finish on shutdown
+    WORKER_SHUTDOWN_TIMEOUT = float(os.environ.get("WorkerShutdownTimeout", "30"))
     APPINSIGHTS_INSTRUMENTATION_KEY = os.environ.get(
         "AppInsightsInstrumentationKey", ""
     )
@@ -0,0 +1,72 @@
+from aiounittest import AsyncTestCase
+
+from botbuilder.core import ConversationState, MemoryStorage, TurnContext
+from botbuilder.core.adapters import TestAdapter
+from botbuilder.dialogs import DialogSet, DialogTurnStatus
+from botbuilder.dialogs.prompts import DateTimePrompt, PromptOptions
+from botbuilder.schema import Activity, ActivityTypes
+
+from helpers.datetime_models import (
+    DATETIME_MODELS,
+    DateTimeModels,
+    SharedDateTimePrompt,
+    timex_types,
+)
+
+
+class DateTimeModelsTest(AsyncTestCase):
+    """
+    This class contains tests of the shared date-time models:
+    - models are built on first use only, once per culture
+    - the prompt resolves dates with the shared models
+    - Timex types are memoized
+    """
+
+    def test_warm_builds_models_once(self):
+        models = DateTimeModels()
+        self.assertEqual([], models.cultures)
+
+        models.warm(["en-us", "en-us"])
+
+        self.assertEqual(["en-us"], models.cultures)
+        self.assertIs(models.get_model("en-us"), models.get_model("en-us"))
+        self.assertIs(models.get_model(), models.get_model(models.default_culture))
+
+    def test_recognize(self):
+        results = DATETIME_MODELS.recognize("tomorrow at 5pm", "en-us")
+
+        self.assertEqual(1, len(results))
+        self.assertIn("timex", results[0].resolution["values"][0])
+
+    def test_timex_types_memoized(self):
+        timex_types.cache_clear()
+        self.assertIn("definite", timex_types("2022-08-18"))
+        self.assertNotIn("definite", timex_types("XXXX-08-18"))
+        timex_types("2022-08-18")
+
+        self.assertEqual(1, timex_types.cache_info().hits)
+
+    async def test_shared_prompt(self):
+        async def exec_test(turn_context: TurnContext):
+            dialog_context = await dialogs.create_context(turn_context)
+            results = await dialog_context.continue_dialog()
+            if results.status == DialogTurnStatus.Empty:
+                await dialog_context.prompt(
+                    DateTimePrompt.__name__,
+                    PromptOptions(
+                        prompt=Activity(type=ActivityTypes.message, text="When?")
+                    ),
+                )
+            elif results.status == DialogTurnStatus.Complete:
+                await turn_context.send_activity(results.result[0].timex)
+            await conversation_state.save_changes(turn_context)
+
+        adapter = TestAdapter(exec_test)
+        conversation_state = ConversationState(MemoryStorage())
+        dialogs = DialogSet(conversation_state.create_property("dialogState"))
+        dialogs.add(SharedDateTimePrompt(DateTimePrompt.__name__))
+
+        step1 = await adapter.send("hello")
+        step2 = await step1.assert_reply("When?")
+        step3 = await step2.send("August 18th 2022")
+        await step3.assert_reply("2022-08-18")
@@ -0,0 +1,81 @@
+import io
+import random
+
+from aiounittest import AsyncTestCase
+
+from botbuilder.dialogs import DialogExtensions
+
+from benchmarks.conversations import SCENARIOS, BookingScript
+from benchmarks.dialog_benchmark import (
+    DialogProfiler,
+    ScriptedConversation,
+    build_bot,
+    compare,
+)
+
+
+class DialogBenchmarkTest(AsyncTestCase):
+    """
+    This class contains tests of the dialog benchmark:
+    - every scenario playing through to "What else can I do for you?"
+    - the reprompt of invalid answers and the help interruption
+    - CPU charged to the dialogs, the instrumentation removed afterwards
+    - regressions against the baseline
+    """
+
+    @classmethod
+    def setUpClass(cls):
+        cls.bot = build_bot()
+
+    async def test_scenarios(self):
+        prompts = {}
+        for index, scenario in enumerate(SCENARIOS):
+            conversation = ScriptedConversation(
+                self.bot, BookingScript("book a flight", scenario, random.Random(0)), index
+            )
+            await conversation.run()
+            prompts[scenario] = conversation.prompts
+            self.assertEqual("done", conversation.prompts[-1])
+
+        self.assertIn("confirm", prompts["booking"])
+        self.assertIn("help", prompts["help"])
+        self.assertIn("date_again", prompts["bad_date"])
+        self.assertEqual(2, prompts["bad_budget"].count("budget"))
+        self.assertNotIn("confirm", prompts["cancel"])
+
+    async def test_profiler(self):
+        bot = build_bot()
+        profiler = DialogProfiler()
+        profiler.instrument_bot(bot)
+        try:
+            conversation = ScriptedConversation(
+                bot, BookingScript("book a flight", "booking", random.Random(0)), 0
+            )
+            await conversation.run()
+        finally:
+            profiler.restore()
+
+        dialogs = profiler.report(conversation.turns)
+        self.assertEqual(conversation.turns, dialogs["DialogAndWelcomeBot"]["calls"])
+        self.assertIn("MainDialog/BookingDialog/budget/TextPrompt", dialogs)
+        self.assertGreater(dialogs["MainDialog/BookingDialog interrupt"]["calls"], 0)
+        self.assertGreater(dialogs["TrackedConversationState.save_changes"]["calls"], 0)
+        self.assertNotIn("on_turn", vars(bot))
+        self.assertIsInstance(vars(DialogExtensions)["run_dialog"], staticmethod)
+        self.assertEqual("run_dialog", DialogExtensions.run_dialog.__name__)
+
+    def test_compare(self):
+        baseline = {
+            "python": "3.11.0",
+            "turns_per_s": 100.0,
+            "cpu_us_per_turn": 1000.0,
+            "allocated_kb_per_turn": 40.0,
+            "retained_kb_per_turn": 1.0,
+            "dialogs": {},
+        }
+        report = dict(baseline, turns_per_s=70.0, cpu_us_per_turn=1100.0, dialogs={})
+
+        out = io.StringIO()
+        self.assertEqual(["turns_per_s"], compare(report, baseline, 0.25, out))
+        self.assertIn("REGRESSED", out.getvalue())
+        self.assertEqual([], compare(baseline, baseline, 0.25, io.StringIO()))
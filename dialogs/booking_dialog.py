@@ -2,16 +2,16 @@
 # Licensed under the MIT License.
 """Flight booking dialog."""
 
-from datatypes_date_time.timex import Timex
-
 from botbuilder.dialogs import WaterfallDialog, WaterfallStepContext, DialogTurnResult
 from botbuilder.dialogs.prompts import ConfirmPrompt, TextPrompt, PromptOptions
 from botbuilder.core import MessageFactory, BotTelemetryClient, NullTelemetryClient
 from botbuilder.schema import InputHints
+from helpers.datetime_models import timex_types
 from .cancel_and_help_dialog import CancelAndHelpDialog
 from .date_resolver_dialog import DateResolverDialog
 from .city_dialog import CityDialog
 from .budget_dialog import BudgetDialog
+from .traced_waterfall_dialog import TracedWaterfallDialog
 
 
 class BookingDialog(CancelAndHelpDialog):
@@ -30,7 +30,7 @@ class BookingDialog(CancelAndHelpDialog):
         text_prompt = TextPrompt(TextPrompt.__name__)
         text_prompt.telemetry_client = telemetry_client
 
-        waterfall_dialog = WaterfallDialog(
+        waterfall_dialog = TracedWaterfallDialog(
             WaterfallDialog.__name__,
             [
                 self.destination_step,
@@ -196,7 +196,7 @@ class BookingDialog(CancelAndHelpDialog):
         properties['origin'] = booking_details.origin
         properties['str_date'] = booking_details.str_date
         properties['end_date'] = booking_details.end_date
-        properties['budget'] = booking_details.budget
+        properties['budget'] = str(booking_details.budget) if booking_details.budget else None
         self.telemetry_client.track_trace("BOOKING NOT CONFIRMED", properties, "ERROR")
 
         msg = (
@@ -213,5 +213,4 @@ class BookingDialog(CancelAndHelpDialog):
 
     def is_ambiguous(self, timex: str) -> bool:
         """Ensure time is correct."""
-        timex_property = Timex(timex)
-        return "definite" not in timex_property.types
+        return "definite" not in timex_types(timex)
@@ -12,9 +12,11 @@ from botbuilder.dialogs.prompts import (
 )
 from .cancel_and_help_dialog import CancelAndHelpDialog
 from flight_booking_recognizer import FlightBookingRecognizer
+from helpers.budget_parser import Budget, parse_budget, parse_budget_reply
 from helpers.luis_helper import LuisHelper, Intent
 from botbuilder.schema import InputHints
 from botbuilder.dialogs.prompts import ConfirmPrompt, TextPrompt, PromptOptions
+from .traced_waterfall_dialog import TracedWaterfallDialog
 
 
 class BudgetDialog(CancelAndHelpDialog):
@@ -33,7 +35,7 @@ class BudgetDialog(CancelAndHelpDialog):
         text_prompt = TextPrompt(TextPrompt.__name__, BudgetDialog.budget_validator)
         text_prompt.telemetry_client = telemetry_client
 
-        waterfall_dialog = WaterfallDialog(
+        waterfall_dialog = TracedWaterfallDialog(
             WaterfallDialog.__name__ + "3", [self.initial_step, self.final_step]
         )
         waterfall_dialog.telemetry_client = telemetry_client
@@ -66,15 +68,18 @@ class BudgetDialog(CancelAndHelpDialog):
         """Cleanup - set final return value and end dialog."""
 
         # Capture the response to the previous step's prompt
-        budget = step_context.result
+        text = step_context.result
 
-        # if budget contains two elements or less, its format was checked in previous step (NUMBER DEVISE)
-        if len(step_context.result.split()) <= 2:
+        # the budget grammar reads most replies without asking luis
+        budget = parse_budget_reply(text)
+        if budget is not None:
             return await step_context.end_dialog(budget)
 
-        # if not luis configured, return the provided budget
-        if not self.luis_recognizer.is_configured:
-            return await step_context.end_dialog(budget)
+        # if not luis configured or luis is failing, return the provided budget
+        if not self.luis_recognizer.is_available:
+            return await step_context.end_dialog(
+                parse_budget(text) or Budget.unparsed(text)
+            )
 
         # ask luis to analyze the text
         intent, luis_result = await LuisHelper.execute_luis_query(
@@ -87,7 +92,7 @@ class BudgetDialog(CancelAndHelpDialog):
             budget_result = luis_result.budget
 
         if budget_result is None:
-            budget_result = step_context.result
+            budget_result = Budget.unparsed(text)
 
         return await step_context.end_dialog(budget_result)
 
@@ -95,60 +100,13 @@ class BudgetDialog(CancelAndHelpDialog):
     @staticmethod
     async def budget_validator(prompt_context: PromptValidatorContext) -> bool:
         """ Validate the budget provided. """
-       
+
         provided_budget = prompt_context.recognized.value
-        budget_split = provided_budget.split()
 
-        # if budget len is bigger than two, luis will be asked to find the budget in the text 
-        if len(budget_split)>2:
+        # OK : 100, $100, 100$, €100, 100€, 100eur, euros 100, 2k EUR, around 1,200 euros max...
+        # but not an amount without a currency among other words, as "May 3rd"
+        if parse_budget_reply(provided_budget) is not None:
             return True
 
-        # check the budget format : OK : 100, $100, 100$, €100, 100€, 100 dollars, euros 100, 100 pounds...
-        number = 0
-        alpha = 0
-        symbol = 0
-        devise = False
-        elements = len(budget_split)
-        budget_ok = False
-
-        for element in budget_split:
-            
-            if element.replace(',','.',1).replace('.','',1).isdigit():
-                number +=1
-                
-            if element.isalpha():
-                alpha +=1
-
-            if element in ["€", "$"]:
-                symbol +=1
-                
-            if element[:1] in ["€", "$"] :
-                symbol +=1
-                elements+=1
-                if element[1:].isalpha():
-                    alpha +=1
-                if element[1:].replace(',','.',1).replace('.','',1).isdigit():
-                    number +=1
-
-            if element[-1:] in ["€", "$"] :
-                symbol +=1
-                elements+=1
-                if element[:-1].isalpha():
-                    alpha +=1
-                if element[:-1].replace(',','.',1).replace('.','',1).isdigit():
-                    number +=1
-                    
-                
-        if elements == 1:
-            if number == 1:
-                budget_ok = True
-                
-        if alpha == 1 or symbol == 1:
-            devise = True
-                
-        if elements == 2:
-            if number == 1 and devise:
-                budget_ok = True
-                    
-        return budget_ok
-
+        # if budget len is bigger than two, luis will be asked to find the budget in the text
+        return len(provided_budget.split()) > 2
@@ -14,6 +14,7 @@ from flight_booking_recognizer import FlightBookingRecognizer
 from helpers.luis_helper import LuisHelper, Intent
 from botbuilder.schema import InputHints
 from botbuilder.dialogs.prompts import ConfirmPrompt, TextPrompt, PromptOptions
+from .traced_waterfall_dialog import TracedWaterfallDialog
 
 
 class CityDialog(CancelAndHelpDialog):
@@ -33,7 +34,7 @@ class CityDialog(CancelAndHelpDialog):
         text_prompt = TextPrompt(TextPrompt.__name__)
         text_prompt.telemetry_client = telemetry_client
 
-        waterfall_dialog = WaterfallDialog(
+        waterfall_dialog = TracedWaterfallDialog(
             WaterfallDialog.__name__ + "4", [self.initial_step, self.final_step]
         )
         waterfall_dialog.telemetry_client = telemetry_client
@@ -71,12 +72,18 @@ class CityDialog(CancelAndHelpDialog):
         # Capture the response to the previous step's prompt
         city = step_context.result
 
+        # if the reply names exactly one known city or airport, return the city
+        # without asking luis
+        matches = self.luis_recognizer.gazetteer.find(city)
+        if len(matches) == 1:
+            return await step_context.end_dialog(matches[0].name)
+
         # if the provided city len is 1, return the provided text
         if len(step_context.result.split())==1:
             return await step_context.end_dialog(city)
 
-        # if not luis configured, return the provided text
-        if not self.luis_recognizer.is_configured:
+        # if not luis configured or luis is failing, return the provided text
+        if not self.luis_recognizer.is_available:
             return await step_context.end_dialog(city)
 
         # ask luis to analyze the text
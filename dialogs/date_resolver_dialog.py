@@ -2,8 +2,6 @@
 # Licensed under the MIT License.
 """Handle date/time resolution for booking dialog."""
 
-from datatypes_date_time.timex import Timex
-
 from botbuilder.core import MessageFactory, BotTelemetryClient, NullTelemetryClient
 from botbuilder.dialogs import WaterfallDialog, DialogTurnResult, WaterfallStepContext
 from botbuilder.dialogs.prompts import (
@@ -12,7 +10,9 @@ from botbuilder.dialogs.prompts import (
     PromptOptions,
     DateTimeResolution,
 )
+from helpers.datetime_models import SharedDateTimePrompt, timex_types
 from .cancel_and_help_dialog import CancelAndHelpDialog
+from .traced_waterfall_dialog import TracedWaterfallDialog
 
 
 class DateResolverDialog(CancelAndHelpDialog):
@@ -28,12 +28,12 @@ class DateResolverDialog(CancelAndHelpDialog):
         )
         self.telemetry_client = telemetry_client
 
-        date_time_prompt = DateTimePrompt(
+        date_time_prompt = SharedDateTimePrompt(
             DateTimePrompt.__name__, DateResolverDialog.datetime_prompt_validator
         )
         date_time_prompt.telemetry_client = telemetry_client
 
-        waterfall_dialog = WaterfallDialog(
+        waterfall_dialog = TracedWaterfallDialog(
             WaterfallDialog.__name__ + "2", [self.initial_step, self.final_step]
         )
         waterfall_dialog.telemetry_client = telemetry_client
@@ -71,7 +71,7 @@ class DateResolverDialog(CancelAndHelpDialog):
             )
 
         # We have a Date we just need to check it is unambiguous.
-        if "definite" in Timex(timex).types:
+        if "definite" in timex_types(timex):
             # This is essentially a "reprompt" of the data we were given up front.
             return await step_context.prompt(
                 DateTimePrompt.__name__, PromptOptions(prompt=reprompt_msg)
@@ -96,6 +96,6 @@ class DateResolverDialog(CancelAndHelpDialog):
             timex = prompt_context.recognized.value[0].timex.split("T")[0]
 
             # TODO: Needs TimexProperty
-            return "definite" in Timex(timex).types
+            return "definite" in timex_types(timex)
 
         return False
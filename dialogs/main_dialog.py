@@ -3,7 +3,6 @@
 
 from botbuilder.dialogs import (
     ComponentDialog,
-    WaterfallDialog,
     WaterfallStepContext,
     DialogTurnResult,
 )
@@ -20,6 +19,7 @@ from booking_details import BookingDetails
 from flight_booking_recognizer import FlightBookingRecognizer
 from helpers.luis_helper import LuisHelper, Intent
 from .booking_dialog import BookingDialog
+from .traced_waterfall_dialog import TracedWaterfallDialog
 
 
 class MainDialog(ComponentDialog):
@@ -38,7 +38,7 @@ class MainDialog(ComponentDialog):
         booking_dialog.telemetry_client = self.telemetry_client
         booking_dialog.luis_recognizer = luis_recognizer
 
-        wf_dialog = WaterfallDialog(
+        wf_dialog = TracedWaterfallDialog(
             "WFDialog", [self.intro_step, self.act_step, self.final_step]
         )
         wf_dialog.telemetry_client = self.telemetry_client
@@ -78,8 +78,9 @@ class MainDialog(ComponentDialog):
         )
 
     async def act_step(self, step_context: WaterfallStepContext) -> DialogTurnResult:
-        if not self._luis_recognizer.is_configured:
-            # LUIS is not configured, we just run the BookingDialog path with an empty BookingDetailsInstance.
+        if not self._luis_recognizer.is_available:
+            # LUIS is not configured or its circuit is open, we just run the BookingDialog path
+            # with an empty BookingDetailsInstance.
             return await step_context.begin_dialog(
                 self._booking_dialog_id, BookingDetails()
             )
@@ -89,6 +90,12 @@ class MainDialog(ComponentDialog):
             self._luis_recognizer, step_context.context
         )
 
+        if intent is None:
+            # The recognition failed or ran out of time, degrade the same way.
+            return await step_context.begin_dialog(
+                self._booking_dialog_id, BookingDetails()
+            )
+
         if intent == Intent.BOOK_FLIGHT.value and luis_result:
             # Show a warning for Origin and Destination if we can't resolve them.
             await MainDialog._show_warning_for_unsupported_cities(
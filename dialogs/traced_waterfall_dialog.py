@@ -0,0 +1,25 @@
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License.
+"""Waterfall dialog timing each of its steps."""
+
+from typing import Dict
+
+from botbuilder.dialogs import DialogTurnResult, WaterfallDialog, WaterfallStepContext
+
+from telemetry import TRACER
+
+
+class TracedWaterfallDialog(WaterfallDialog):
+    """WaterfallDialog timing each step, in a span such as "step BookingDialog.budget_step"."""
+
+    def __init__(self, dialog_id: str, steps: list = None):
+        super().__init__(dialog_id, steps)
+        self._span_names: Dict[int, str] = {}
+
+    async def on_step(self, step_context: WaterfallStepContext) -> DialogTurnResult:
+        index = step_context.index
+        name = self._span_names.get(index)
+        if name is None:
+            name = self._span_names[index] = "step " + self.get_step_name(index)
+        with TRACER.span(name):
+            return await super().on_step(step_context)
@@ -1,8 +1,13 @@
 # Copyright (c) Microsoft Corporation. All rights reserved.
 # Licensed under the MIT License.
 
-from botbuilder.ai.luis import LuisApplication, LuisRecognizer, LuisPredictionOptions
+import asyncio
+import copy
+from typing import FrozenSet
+
+from botbuilder.ai.luis import LuisApplication, LuisPredictionOptions
 from botbuilder.core import (
+    IntentScore,
     Recognizer,
     RecognizerResult,
     TurnContext,
@@ -11,6 +16,13 @@ from botbuilder.core import (
 )
 
 from config import DefaultConfig
+from helpers.city_gazetteer import CityGazetteer
+from helpers.circuit_breaker import CircuitBreaker, CircuitOpenError, CircuitState
+from helpers.local_recognizer import LocalRecognizer, load_closed_lists
+from helpers.luis_transport import LuisPredictionTransport, PooledLuisRecognizer
+from helpers.recognition_cache import RecognitionCache
+from helpers.single_flight import SingleFlight
+from telemetry import TRACER
 import os
 
 class FlightBookingRecognizer(Recognizer):
@@ -18,6 +30,50 @@ class FlightBookingRecognizer(Recognizer):
         self, configuration: DefaultConfig, telemetry_client: BotTelemetryClient = None
     ):
         self._recognizer = None
+        self._transport = None
+        self._luis_endpoint = None
+        self._luis_app_id = configuration.LUIS_APP_ID
+        self._luis_version = configuration.LUIS_APP_VERSION
+        self._cache = RecognitionCache(
+            max_size=configuration.LUIS_CACHE_SIZE, ttl=configuration.LUIS_CACHE_TTL
+        )
+        # Identical queries already sent to LUIS share the pending call.
+        self._single_flight = SingleFlight(copy_result=copy.deepcopy)
+
+        # LUIS calls are bounded by a deadline, and skipped while LUIS keeps failing.
+        self._telemetry_client = telemetry_client or NullTelemetryClient()
+        self._deadline = configuration.LUIS_DEADLINE
+        self._breaker = CircuitBreaker(
+            failure_threshold=configuration.LUIS_BREAKER_FAILURES,
+            reset_timeout=configuration.LUIS_BREAKER_RESET,
+            on_state_change=self._on_breaker_state_change,
+        )
+
+        # City index built once, shared by the local recognizer and the city prompts.
+        self._gazetteer = CityGazetteer.from_file(configuration.CITY_GAZETTEER)
+
+        # Local recognizer answering confident utterances without a LUIS round trip.
+        self._local_recognizer = None
+        self._local_threshold = configuration.LOCAL_RECOGNIZER_THRESHOLD
+        if configuration.LOCAL_RECOGNIZER_MODEL:
+            self._local_recognizer = LocalRecognizer.from_luis_model(
+                configuration.LOCAL_RECOGNIZER_MODEL,
+                configuration.LOCAL_RECOGNIZER_TRAINING,
+                self._gazetteer,
+            )
+            self._gazetteer = self._local_recognizer.gazetteer
+
+        # Cities of the model's closed list, the only ones flights are booked for,
+        # whether LUIS or the local recognizer answers.
+        self._supported_cities = frozenset(
+            " ".join(name.lower().split())
+            for canonical, _, synonyms in (
+                load_closed_lists(configuration.LOCAL_RECOGNIZER_MODEL)
+                if configuration.LOCAL_RECOGNIZER_MODEL
+                else []
+            )
+            for name in [canonical] + synonyms
+        )
 
         # for item, value in os.environ.items():
         #     print('{}: {}'.format(item, value))
@@ -30,23 +86,164 @@ class FlightBookingRecognizer(Recognizer):
         if luis_is_configured:
             # Set the recognizer options depending on which endpoint version you want to use e.g v2 or v3.
             # More details can be found in https://docs.microsoft.com/azure/cognitive-services/luis/luis-migration-api-v3
+            # A host name is served over HTTPS, a URL is used as is (local stand-ins).
+            host_name = configuration.LUIS_API_HOST_NAME
+            self._luis_endpoint = (
+                host_name if "://" in host_name else "https://" + host_name
+            )
             luis_application = LuisApplication(
                 configuration.LUIS_APP_ID,
                 configuration.LUIS_API_KEY,
-                "https://" + configuration.LUIS_API_HOST_NAME,
+                self._luis_endpoint,
             )
 
             options = LuisPredictionOptions()
             options.telemetry_client = telemetry_client or NullTelemetryClient()
 
-            self._recognizer = LuisRecognizer(
-                luis_application, prediction_options=options
+            # Prediction calls share one keep-alive connection pool for the process lifetime.
+            self._transport = LuisPredictionTransport(
+                pool_size=configuration.LUIS_POOL_SIZE,
+                per_host_limit=configuration.LUIS_PER_HOST_LIMIT,
+                connect_timeout=configuration.LUIS_CONNECT_TIMEOUT,
+                read_timeout=configuration.LUIS_READ_TIMEOUT,
+                dns_cache_ttl=configuration.LUIS_DNS_CACHE_TTL,
+            )
+            self._recognizer = PooledLuisRecognizer(
+                luis_application, options, self._transport
+            )
+            self._cache.set_version(
+                self._luis_app_id, configuration.LUIS_APP_VERSION
             )
 
     @property
     def is_configured(self) -> bool:
-        # Returns true if luis is configured in the config.py and initialized.
-        return self._recognizer is not None
+        # Returns true if luis or the local recognizer is configured in the config.py and initialized.
+        return self._recognizer is not None or self._local_recognizer is not None
+
+    @property
+    def is_available(self) -> bool:
+        # Returns true if a recognition can be answered now, false while LUIS is the
+        # only recognizer and its circuit breaker is open.
+        if self._local_recognizer is not None:
+            return True
+        return self._recognizer is not None and not self._breaker.is_open
+
+    @property
+    def breaker(self) -> CircuitBreaker:
+        return self._breaker
+
+    @property
+    def gazetteer(self) -> CityGazetteer:
+        return self._gazetteer
+
+    @property
+    def local_recognizer(self) -> LocalRecognizer:
+        return self._local_recognizer
+
+    @property
+    def supported_cities(self) -> FrozenSet[str]:
+        # Lowercase, empty when no model is configured: LUIS resolution decides.
+        return self._supported_cities
+
+    @property
+    def telemetry_client(self) -> BotTelemetryClient:
+        return self._telemetry_client
+
+    @property
+    def cache(self) -> RecognitionCache:
+        return self._cache
+
+    @property
+    def transport(self) -> LuisPredictionTransport:
+        return self._transport
+
+    async def warm(self) -> bool:
+        # Opens the first LUIS connection (DNS, TCP and TLS) before any user waits on it.
+        if self._transport is None:
+            return False
+        return await self._transport.warm(self._luis_endpoint)
+
+    async def close(self) -> None:
+        # Releases the pooled LUIS connections.
+        if self._transport is not None:
+            await self._transport.close()
+
+    @property
+    def single_flight(self) -> SingleFlight:
+        return self._single_flight
+
+    def set_luis_version(self, version: str) -> None:
+        # Cached results of a previous LUIS version are dropped.
+        self._luis_version = version
+        self._cache.set_version(self._luis_app_id, version)
 
     async def recognize(self, turn_context: TurnContext) -> RecognizerResult:
-        return await self._recognizer.recognize(turn_context)
+        with TRACER.span("recognize"):
+            return await self._recognize(turn_context)
+
+    async def _recognize(self, turn_context: TurnContext) -> RecognizerResult:
+        if self._local_recognizer is not None:
+            result = await self._local_recognizer.recognize(turn_context)
+            if (
+                self._recognizer is None
+                or self._is_confident(result)
+                or self._breaker.is_open
+            ):
+                return result
+
+        text = turn_context.activity.text
+        if not text or text.isspace():
+            # As LuisRecognizer answers it, without a call to LUIS.
+            return RecognizerResult(
+                text=text, intents={"": IntentScore(score=1.0)}, entities={}
+            )
+
+        result = self._cache.get(text)
+        if result is None:
+            # The entity offsets and text of a result are those of its utterance as
+            # typed, only the same text shares a call.
+            result = await self._single_flight.do(
+                (self._luis_app_id, self._luis_version, text),
+                lambda: self._recognize_luis(turn_context),
+            )
+
+        return result
+
+    async def _recognize_luis(self, turn_context: TurnContext) -> RecognizerResult:
+        if not self._breaker.allow_request():
+            raise CircuitOpenError("LUIS circuit breaker is open")
+
+        try:
+            with TRACER.span("luis"):
+                result = await asyncio.wait_for(
+                    self._recognizer.recognize(turn_context), self._deadline
+                )
+        except asyncio.TimeoutError:
+            self._breaker.record_failure(timeout=True)
+            raise
+        except asyncio.CancelledError:
+            self._breaker.release()
+            raise
+        except Exception:
+            self._breaker.record_failure()
+            raise
+
+        self._breaker.record_success()
+        self._cache.set(turn_context.activity.text, result)
+        return result
+
+    def _on_breaker_state_change(self, state: CircuitState) -> None:
+        trips = self._breaker.trips
+        self._telemetry_client.track_metric(
+            "LuisCircuitState",
+            state.value,
+            properties={"state": state.name, "trips": str(trips)},
+        )
+        self._telemetry_client.track_metric("LuisCircuitTrips", trips)
+
+    def _is_confident(self, result: RecognizerResult) -> bool:
+        if result is None or not result.intents:
+            return False
+        return max(
+            score.score for score in result.intents.values()
+        ) >= self._local_threshold
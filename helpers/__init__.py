@@ -2,6 +2,34 @@
 # Licensed under the MIT License.
 """Helpers module."""
 
-from . import activity_helper, luis_helper, dialog_helper
+from . import (
+    activity_helper,
+    budget_parser,
+    circuit_breaker,
+    city_gazetteer,
+    datetime_models,
+    luis_helper,
+    dialog_helper,
+    local_recognizer,
+    luis_transport,
+    outbound_batch,
+    recognition_cache,
+    single_flight,
+    startup_timer,
+)
 
-__all__ = ["activity_helper", "dialog_helper", "luis_helper"]
+__all__ = [
+    "activity_helper",
+    "budget_parser",
+    "circuit_breaker",
+    "city_gazetteer",
+    "datetime_models",
+    "dialog_helper",
+    "local_recognizer",
+    "luis_helper",
+    "luis_transport",
+    "outbound_batch",
+    "recognition_cache",
+    "single_flight",
+    "startup_timer",
+]
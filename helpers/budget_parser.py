@@ -0,0 +1,148 @@
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License.
+"""Parse budget amounts and currencies out of free text."""
+
+import re
+from decimal import Decimal, InvalidOperation
+from typing import Iterator, NamedTuple, Optional, Tuple
+
+CURRENCY_SYMBOLS = {"$": "USD", "€": "EUR", "£": "GBP", "¥": "JPY"}
+CURRENCY_CODES = ("USD", "EUR", "GBP", "CHF", "CAD", "AUD", "JPY")
+CURRENCY_WORDS = {
+    "dollar": "USD",
+    "dollars": "USD",
+    "buck": "USD",
+    "bucks": "USD",
+    "euro": "EUR",
+    "euros": "EUR",
+    "pound": "GBP",
+    "pounds": "GBP",
+    "franc": "CHF",
+    "francs": "CHF",
+    "yen": "JPY",
+}
+
+# Codes and words are not part of a longer word, but may touch the digits: "100eur".
+_CURRENCY = r"[$€£¥]|(?<![^\W\d_])(?:%s)(?![^\W\d_])" % "|".join(
+    [code.lower() for code in CURRENCY_CODES] + sorted(CURRENCY_WORDS, key=len, reverse=True)
+)
+
+BUDGET_PATTERN = re.compile(
+    r"""
+    (?:(?P<prefix>%(currency)s)\s?)?
+    (?<![\d.,])
+    (?P<amount>
+        \d{1,3}(?:(?P<sep>[,.\u00a0\u202f])\d{3})(?:(?P=sep)\d{3})*(?:[.,]\d{1,2})?
+        # Plain spaces only group thousands next to a currency: "100 200" is two
+        # amounts, "$100 200" and "1 200 GBP" one.
+        | \d{1,3}(?:\ \d{3})+(?:[.,]\d{1,2})?(?(prefix)|(?=\s?(?:%(currency)s)))
+        | \d+(?:[.,]\d{1,2})?
+    )
+    (?![\d])
+    (?:\s?(?P<multiplier>k|thousand)\b)?
+    (?:\s?(?P<suffix>%(currency)s))?
+    """
+    % {"currency": _CURRENCY},
+    re.IGNORECASE | re.VERBOSE,
+)
+
+_MULTIPLIERS = {"k": Decimal(1000), "thousand": Decimal(1000)}
+
+
+class Budget(NamedTuple):
+    """A budget amount with its ISO 4217 currency code, both None when not parsed."""
+
+    amount: Optional[Decimal]
+    currency: Optional[str]
+    text: str
+
+    @staticmethod
+    def unparsed(text: str) -> "Budget":
+        return Budget(None, None, text)
+
+    def encode(self) -> list:
+        """Compact form for the dialog state, see BookingDetails.encode."""
+        amount = str(self.amount) if self.amount is not None else None
+        return [amount, self.currency, self.text]
+
+    @staticmethod
+    def decode(data: list) -> "Budget":
+        amount, currency, text = data
+        return Budget(Decimal(amount) if amount is not None else None, currency, text)
+
+    def __str__(self) -> str:
+        if self.amount is None:
+            return self.text
+        if self.currency is None:
+            return str(self.amount)
+        return "%s %s" % (self.amount, self.currency)
+
+
+def _currency_code(token: Optional[str]) -> Optional[str]:
+    if not token:
+        return None
+    if token in CURRENCY_SYMBOLS:
+        return CURRENCY_SYMBOLS[token]
+    token = token.lower()
+    return CURRENCY_WORDS.get(token, token.upper())
+
+
+def _to_decimal(amount: str) -> Optional[Decimal]:
+    """Read `amount` deciding for each separator whether it groups thousands or marks decimals."""
+    amount = re.sub(r"[\u00a0\u202f ]", ",", amount)
+    separators = [char for char in amount if char in ",."]
+    if separators:
+        last = separators[-1]
+        decimals = len(amount) - amount.rindex(last) - 1
+        if len(set(separators)) == 1 and (len(separators) > 1 or decimals == 3):
+            # 1,200 or 1.200.000: the separator only groups thousands.
+            amount = amount.replace(last, "")
+        else:
+            grouping = "." if last == "," else ","
+            amount = amount.replace(grouping, "").replace(last, ".")
+    try:
+        return Decimal(amount)
+    except InvalidOperation:
+        return None
+
+
+def find_budgets(text: str) -> Iterator[Tuple[int, int, Budget]]:
+    """Yield (start, end, Budget) for every amount found in `text`."""
+    for match in BUDGET_PATTERN.finditer(text or ""):
+        amount = _to_decimal(match.group("amount"))
+        if amount is None:
+            continue
+
+        multiplier = match.group("multiplier")
+        if multiplier:
+            amount *= _MULTIPLIERS[multiplier.lower()]
+        if amount == amount.to_integral_value():
+            amount = amount.quantize(Decimal(1))
+
+        currency = _currency_code(match.group("prefix") or match.group("suffix"))
+        yield match.start(), match.end(), Budget(amount, currency, match.group().strip())
+
+
+def parse_budget(text: str) -> Optional[Budget]:
+    """
+    Return the budget of `text`, preferring the first amount given with a currency,
+    e.g. "around 1,200 euros max" -> Budget(Decimal("1200"), "EUR"). None when the
+    text holds no amount, or several amounts none of which has a currency.
+    """
+    amounts = []
+    for _, _, budget in find_budgets(text):
+        if budget.currency:
+            return budget
+        amounts.append(budget)
+    return amounts[0] if len(amounts) == 1 else None
+
+
+def parse_budget_reply(text: str) -> Optional[Budget]:
+    """
+    Return the budget of `text`, a reply to the budget prompt, when it is given with a
+    currency or the reply holds nothing else: "100" or "2k" but not "May 3rd".
+    """
+    for start, end, budget in find_budgets(text):
+        if budget.currency or not re.search(r"[^\W_]", text[:start] + text[end:]):
+            return budget
+    return None
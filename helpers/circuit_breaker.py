@@ -0,0 +1,113 @@
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License.
+"""Circuit breaker guarding calls to a remote service."""
+
+import time
+from enum import Enum
+from typing import Callable, Dict
+
+
+class CircuitState(Enum):
+    CLOSED = 0
+    HALF_OPEN = 1
+    OPEN = 2
+
+
+class CircuitOpenError(Exception):
+    """Raised when a call is refused because the circuit is open."""
+
+
+class CircuitBreaker:
+    """
+    Opens after `failure_threshold` consecutive failures or timeouts and refuses
+    calls for `reset_timeout` seconds. It then lets a single probe call through:
+    its success closes the circuit, its failure opens it again.
+    """
+
+    def __init__(
+        self,
+        failure_threshold: int = 5,
+        reset_timeout: float = 30.0,
+        on_state_change: Callable[[CircuitState], None] = None,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._on_state_change = on_state_change
+        self._clock = clock
+
+        self._state = CircuitState.CLOSED
+        self._opened_at = 0.0
+        self._probing = False
+        self._consecutive_failures = 0
+
+        self.trips = 0
+        self.failures = 0
+        self.timeouts = 0
+        self.rejected = 0
+
+    @property
+    def state(self) -> CircuitState:
+        if (
+            self._state == CircuitState.OPEN
+            and self._clock() - self._opened_at >= self.reset_timeout
+        ):
+            self._set_state(CircuitState.HALF_OPEN)
+        return self._state
+
+    @property
+    def is_open(self) -> bool:
+        """True while calls would be refused."""
+        state = self.state
+        return state == CircuitState.OPEN or (
+            state == CircuitState.HALF_OPEN and self._probing
+        )
+
+    def allow_request(self) -> bool:
+        """Return whether a call may go through now, reserving the probe when half open."""
+        if self.is_open:
+            self.rejected += 1
+            return False
+        if self._state == CircuitState.HALF_OPEN:
+            self._probing = True
+        return True
+
+    def release(self) -> None:
+        """Give back the probe of a call that ended without an outcome, e.g. cancelled."""
+        self._probing = False
+
+    def record_success(self) -> None:
+        self._consecutive_failures = 0
+        self._probing = False
+        if self._state != CircuitState.CLOSED:
+            self._set_state(CircuitState.CLOSED)
+
+    def record_failure(self, timeout: bool = False) -> None:
+        self.failures += 1
+        if timeout:
+            self.timeouts += 1
+        self._consecutive_failures += 1
+        self._probing = False
+
+        if (
+            self._state == CircuitState.HALF_OPEN
+            or self._consecutive_failures >= self.failure_threshold
+        ):
+            self._opened_at = self._clock()
+            if self._state != CircuitState.OPEN:
+                self.trips += 1
+                self._set_state(CircuitState.OPEN)
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "state": self.state.value,
+            "trips": self.trips,
+            "failures": self.failures,
+            "timeouts": self.timeouts,
+            "rejected": self.rejected,
+        }
+
+    def _set_state(self, state: CircuitState) -> None:
+        self._state = state
+        if self._on_state_change:
+            self._on_state_change(state)
@@ -0,0 +1,198 @@
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License.
+"""Multi-pattern city/airport index finding every city mention in one scan."""
+
+import json
+import os
+from typing import Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+DEFAULT_CITIES_PATH = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), "resources", "airports.json"
+)
+
+
+class CityMatch(NamedTuple):
+    start: int
+    end: int
+    name: str
+    code: Optional[str]
+
+
+def _lower(text: str) -> str:
+    """Lowercase `text` keeping every character at its index."""
+    lowered = text.lower()
+    if len(lowered) == len(text):
+        return lowered
+    return "".join(char if len(char.lower()) != 1 else char.lower() for char in text)
+
+
+class CityGazetteer:
+    """
+    Aho-Corasick automaton over city names, their aliases and airport codes.
+
+    Each alias is stored once, in the trie, with a reference to its city in a shared
+    table. `find` reports the leftmost-longest, whole-word, non-overlapping mentions.
+    The city codes, and the codes of `airports` given as (code, city name) pairs, are
+    only found written in capitals, as many of them are also words ("WAS", "SEA").
+    """
+
+    def __init__(
+        self,
+        cities: Iterable[Tuple[str, Optional[str], Iterable[str]]],
+        airports: Iterable[Tuple[str, str]] = (),
+    ):
+        # City table, referenced by index from the automaton outputs.
+        self._cities: List[Tuple[str, Optional[str]]] = []
+        self._index: Dict[str, int] = {}
+
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        # Per node: (alias length, city index, is a code) of the alias ending there,
+        # or None.
+        self._output: List[Optional[Tuple[int, int, bool]]] = [None]
+        # Per node: nearest node on the failure chain having an output.
+        self._dict_link: List[int] = [0]
+
+        for name, code, aliases in cities:
+            self._add(name, code, aliases)
+        for code, name in airports:
+            self._add(name, None, [], [code])
+        self._build()
+
+    @staticmethod
+    def from_file(path: str = DEFAULT_CITIES_PATH) -> "CityGazetteer":
+        """
+        Load a JSON list of {"name", "code", "aliases", "airports"} entries, each
+        airport a {"code", "name"} entry whose name is an alias of the city.
+        """
+        with open(path, encoding="utf-8") as cities_file:
+            entries = json.load(cities_file)
+        return CityGazetteer(
+            (
+                (
+                    entry["name"],
+                    entry.get("code"),
+                    entry.get("aliases", [])
+                    + [airport["name"] for airport in entry.get("airports", [])],
+                )
+                for entry in entries
+            ),
+            [
+                (airport["code"], entry["name"])
+                for entry in entries
+                for airport in entry.get("airports", [])
+            ],
+        )
+
+    def extended(
+        self, cities: Iterable[Tuple[str, Optional[str], Iterable[str]]]
+    ) -> "CityGazetteer":
+        """Return a new gazetteer holding these cities on top of the current ones."""
+        aliases: Dict[int, List[str]] = {}
+        airports = []
+        stack = [(0, "")]
+        while stack:
+            node, alias = stack.pop()
+            if self._output[node] is not None:
+                _, city, is_code = self._output[node]
+                if is_code:
+                    airports.append((alias.upper(), self._cities[city][0]))
+                else:
+                    aliases.setdefault(city, []).append(alias)
+            stack.extend((child, alias + char) for char, child in self._goto[node].items())
+        current = [
+            (name, code, aliases.get(index, []))
+            for index, (name, code) in enumerate(self._cities)
+        ]
+        return CityGazetteer(current + list(cities), airports)
+
+    def __len__(self) -> int:
+        return len(self._cities)
+
+    def find(self, text: str) -> List[CityMatch]:
+        """Return the city mentions of `text`, in order."""
+        if not text:
+            return []
+
+        lowered = _lower(text)
+        candidates = []
+        node = 0
+        for position, char in enumerate(lowered):
+            while node and char not in self._goto[node]:
+                node = self._fail[node]
+            node = self._goto[node].get(char, 0)
+
+            match_node = node if self._output[node] is not None else self._dict_link[node]
+            while match_node:
+                length, city, is_code = self._output[match_node]
+                start = position + 1 - length
+                if self._is_word(lowered, start, position + 1) and (
+                    not is_code or text[start : position + 1].isupper()
+                ):
+                    candidates.append((start, -length, city))
+                match_node = self._dict_link[match_node]
+
+        matches = []
+        last_end = 0
+        for start, negative_length, city in sorted(candidates):
+            if start >= last_end:
+                name, code = self._cities[city]
+                last_end = start - negative_length
+                matches.append(CityMatch(start, last_end, name, code))
+        return matches
+
+    def first(self, text: str) -> Optional[CityMatch]:
+        matches = self.find(text)
+        return matches[0] if matches else None
+
+    def _add(
+        self,
+        name: str,
+        code: Optional[str],
+        aliases: Iterable[str],
+        codes: Iterable[str] = (),
+    ) -> None:
+        city = self._index.get(name.lower())
+        if city is None:
+            city = self._index[name.lower()] = len(self._cities)
+            self._cities.append((name, code))
+
+        names = [(alias, False) for alias in [name] + list(aliases)]
+        names += [(alias, True) for alias in [code] + list(codes) if alias]
+        for alias, is_code in names:
+            alias = " ".join(_lower(alias).split())
+            if not alias:
+                continue
+            node = 0
+            for char in alias:
+                next_node = self._goto[node].get(char)
+                if next_node is None:
+                    next_node = len(self._goto)
+                    self._goto[node][char] = next_node
+                    self._goto.append({})
+                    self._fail.append(0)
+                    self._output.append(None)
+                    self._dict_link.append(0)
+                node = next_node
+            if self._output[node] is None:
+                self._output[node] = (len(alias), city, is_code)
+
+    def _build(self) -> None:
+        queue = list(self._goto[0].values())
+        for node in queue:
+            for char, child in self._goto[node].items():
+                fail = self._fail[node]
+                while fail and char not in self._goto[fail]:
+                    fail = self._fail[fail]
+                fail = self._goto[fail].get(char, 0)
+                self._fail[child] = fail if fail != child else 0
+                self._dict_link[child] = (
+                    fail if self._output[fail] is not None else self._dict_link[fail]
+                )
+                queue.append(child)
+
+    @staticmethod
+    def _is_word(text: str, start: int, end: int) -> bool:
+        return (start == 0 or not text[start - 1].isalnum()) and (
+            end == len(text) or not text[end].isalnum()
+        )
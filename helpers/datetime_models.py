@@ -0,0 +1,99 @@
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License.
+"""Process-wide date-time recognizer models and memoized Timex evaluation."""
+
+import threading
+from functools import lru_cache
+from typing import Dict, FrozenSet, Iterable, List
+
+from datatypes_date_time.timex import Timex
+from recognizers_date_time import DateTimeRecognizer
+from recognizers_text import Culture
+from recognizers_text.model import Model, ModelResult
+
+from botbuilder.core import TurnContext
+from botbuilder.dialogs.prompts import (
+    DateTimePrompt,
+    PromptOptions,
+    PromptRecognizerResult,
+)
+from botbuilder.schema import ActivityTypes
+
+
+class DateTimeModels:
+    """
+    Date-time models built once per culture and shared by every prompt of the process.
+    Building a model compiles hundreds of patterns, so nothing is built before the
+    first use or an explicit `warm`, which may run on a worker thread.
+    """
+
+    def __init__(self, default_culture: str = Culture.English):
+        self.default_culture = default_culture
+        self._recognizer: DateTimeRecognizer = None
+        self._models: Dict[str, Model] = {}
+        self._lock = threading.Lock()
+
+    def warm(self, cultures: Iterable[str]) -> None:
+        """Build the models of `cultures` now rather than on their first use."""
+        for culture in cultures:
+            self.get_model(culture)
+
+    def get_model(self, culture: str = None) -> Model:
+        culture = culture or self.default_culture
+        model = self._models.get(culture)
+        if model is None:
+            with self._lock:
+                if self._recognizer is None:
+                    self._recognizer = DateTimeRecognizer(self.default_culture)
+                model = self._models.get(culture)
+                if model is None:
+                    model = self._recognizer.get_datetime_model(culture)
+                    self._models[culture] = model
+        return model
+
+    def recognize(self, text: str, culture: str = None) -> List[ModelResult]:
+        return self.get_model(culture).parse(text)
+
+    @property
+    def cultures(self) -> List[str]:
+        return list(self._models)
+
+
+DATETIME_MODELS = DateTimeModels()
+
+
+@lru_cache(maxsize=1024)
+def timex_types(timex: str) -> FrozenSet[str]:
+    """Return the types of a Timex expression, e.g. {"date", "definite"}."""
+    return frozenset(Timex(timex).types)
+
+
+class SharedDateTimePrompt(DateTimePrompt):
+    """DateTimePrompt recognizing with the shared, pre-built DATETIME_MODELS."""
+
+    async def on_recognize(
+        self,
+        turn_context: TurnContext,
+        state: Dict[str, object],
+        options: PromptOptions,
+    ) -> PromptRecognizerResult:
+        if not turn_context:
+            raise TypeError(
+                "SharedDateTimePrompt.on_recognize(): turn_context cannot be None."
+            )
+
+        result = PromptRecognizerResult()
+        if turn_context.activity.type == ActivityTypes.message:
+            utterance = turn_context.activity.text
+            if not utterance:
+                return result
+
+            results = DATETIME_MODELS.recognize(utterance, turn_context.activity.locale)
+            if results:
+                result.succeeded = True
+                result.value = [
+                    self.read_resolution(value)
+                    for value in results[0].resolution["values"]
+                ]
+
+        return result
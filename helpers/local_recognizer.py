@@ -0,0 +1,348 @@
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License.
+"""In-process intent/entity recognizer compiled from the LUIS model."""
+
+import json
+import math
+import random
+import re
+from typing import Dict, Iterable, List, Tuple
+
+from botbuilder.core import (
+    IntentScore,
+    Recognizer,
+    RecognizerResult,
+    TurnContext,
+)
+from botbuilder.schema import ActivityTypes
+
+from .budget_parser import find_budgets
+from .city_gazetteer import CityGazetteer
+from .luis_helper import Intent
+
+# Names used by cognitiveModels/FlightBooking.json mapped to the ones of the deployed app.
+INTENT_ALIASES = {
+    "Book flight": Intent.BOOK_FLIGHT.value,
+    "Cancel": Intent.CANCEL.value,
+    "None": "None",
+}
+ENTITY_ALIASES = {"To": "dst_city", "From": "or_city"}
+
+CITY_ENTITIES = ("dst_city", "or_city")
+
+# Scores below this answer the "None" intent.
+NONE_THRESHOLD = 0.2
+
+_MONTHS = (
+    r"(?:january|february|march|april|may|june|july|august|september|october|"
+    r"november|december|jan|feb|mar|apr|jun|jul|aug|sept|sep|oct|nov|dec)\.?"
+)
+_DAY = r"\d{1,2}(?:st|nd|rd|th)?"
+_YEAR = r"(?:,?\s+\d{4})?"
+_WEEKDAYS = r"(?:monday|tuesday|wednesday|thursday|friday|saturday|sunday)"
+
+DATE_PATTERN = re.compile(
+    r"\b(?:"
+    rf"{_MONTHS}\s+{_DAY}\b{_YEAR}"
+    rf"|{_DAY}\s+(?:of\s+)?{_MONTHS}{_YEAR}"
+    r"|\d{4}-\d{1,2}-\d{1,2}"
+    r"|\d{1,2}/\d{1,2}(?:/\d{2,4})?"
+    rf"|(?:next\s+|this\s+)?{_WEEKDAYS}"
+    r"|next\s+(?:week|month)"
+    r"|today|tomorrow|tonight"
+    r")\b",
+    re.IGNORECASE,
+)
+
+_TOKEN_PATTERN = re.compile(r"[\w$€£]+")
+
+# Words that, right before a mention, tell which role it plays.
+_CITY_CUES = {
+    "or_city": {"from", "leaving", "leave", "departing", "depart", "out"},
+    "dst_city": {"to", "for", "visit", "visiting", "in", "into", "towards"},
+}
+_DATE_CUES = {"end_date": {"to", "until", "till", "return", "returning", "back", "and"}}
+
+
+def _tokens(text: str) -> List[str]:
+    return _TOKEN_PATTERN.findall(text.lower())
+
+
+def _assign_roles(
+    lowered: str,
+    spans: List[Tuple[int, int]],
+    cues: Dict[str, set],
+    order: Tuple[str, ...],
+) -> List[Tuple[str, int, int]]:
+    """
+    Name each span after the cue word preceding it, else after the first role of
+    `order` still free. Spans left without a free role are dropped.
+    """
+    named = []
+    taken = set()
+    for start, end in spans:
+        previous = _tokens(lowered[:start])[-1:]
+        wanted = [name for name, words in cues.items() if previous and previous[0] in words]
+        for name in wanted + list(order):
+            if name not in taken:
+                taken.add(name)
+                named.append((name, start, end))
+                break
+    return named
+
+
+def load_luis_utterances(path: str) -> List[Tuple[str, str, List[Tuple[str, int, int]]]]:
+    """
+    Load labeled utterances from a LUIS app export or from the batch files exported
+    by the training notebook. Returns (text, intent, [(entity, start, end)]) tuples
+    with an exclusive end index.
+    """
+    with open(path, encoding="utf-8") as model_file:
+        data = json.load(model_file)
+
+    examples = data["utterances"] if isinstance(data, dict) else data
+
+    utterances = []
+    for example in examples:
+        intent = example.get("intent", example.get("intentName"))
+        labels = example.get("entities", example.get("entityLabels", []))
+        entities = []
+        for label in labels:
+            entity = label.get("entity", label.get("entityName"))
+            start = label.get("startPos", label.get("startCharIndex"))
+            end = label.get("endPos", label.get("endCharIndex"))
+            if start is None or end is None or start < 0 or end < start:
+                continue
+            entities.append((ENTITY_ALIASES.get(entity, entity), start, end + 1))
+        utterances.append(
+            (example["text"], INTENT_ALIASES.get(intent, intent), entities)
+        )
+
+    return utterances
+
+
+def load_closed_lists(path: str) -> List[Tuple[str, None, List[str]]]:
+    """Return (canonical form, None, synonyms) for every closed list entry of a LUIS app export."""
+    with open(path, encoding="utf-8") as model_file:
+        data = json.load(model_file)
+
+    entries = []
+    if isinstance(data, dict):
+        for closed_list in data.get("closedLists", []):
+            for sub_list in closed_list.get("subLists", []):
+                entries.append((sub_list["canonicalForm"], None, sub_list.get("list", [])))
+    return entries
+
+
+class _SoftmaxClassifier:
+    """Multinomial logistic regression over sparse, L2 normalized feature dicts."""
+
+    def __init__(self, labels: List[str]):
+        self.labels = labels
+        self.weights: Dict[str, List[float]] = {}
+        self.bias = [0.0] * len(labels)
+
+    def fit(
+        self,
+        samples: List[Tuple[Dict[str, float], str]],
+        epochs: int = 40,
+        learning_rate: float = 0.5,
+        seed: int = 0,
+    ) -> None:
+        samples = list(samples)
+        shuffler = random.Random(seed)
+        for _ in range(epochs):
+            shuffler.shuffle(samples)
+            for features, label in samples:
+                probabilities = self.predict_proba(features)
+                for index, probability in enumerate(probabilities):
+                    gradient = probability - (1.0 if self.labels[index] == label else 0.0)
+                    if gradient == 0.0:
+                        continue
+                    step = learning_rate * gradient
+                    self.bias[index] -= step
+                    for feature, value in features.items():
+                        weights = self.weights.get(feature)
+                        if weights is None:
+                            weights = self.weights[feature] = [0.0] * len(self.labels)
+                        weights[index] -= step * value
+
+    def predict_proba(self, features: Dict[str, float]) -> List[float]:
+        scores = list(self.bias)
+        for feature, value in features.items():
+            weights = self.weights.get(feature)
+            if weights is not None:
+                for index, weight in enumerate(weights):
+                    scores[index] += weight * value
+
+        top = max(scores)
+        exps = [math.exp(score - top) for score in scores]
+        total = sum(exps)
+        return [value / total for value in exps]
+
+
+class LocalRecognizer(Recognizer):
+    """
+    Recognizer running entirely in process, compiled at startup from the LUIS app export.
+
+    Intents come from a linear classifier over word and character n-grams of the
+    utterance, where recognized cities, dates and budgets are replaced by placeholders.
+    Entities come from a city gazetteer and date/budget patterns. The result has the
+    same shape as a LUIS RecognizerResult so LuisHelper can consume it unchanged.
+
+    The intent score is the classifier probability scaled by the share of the
+    utterance's words seen during training, so out-of-domain text scores low.
+    """
+
+    def __init__(
+        self,
+        utterances: List[Tuple[str, str, List[Tuple[str, int, int]]]],
+        gazetteer: CityGazetteer = None,
+    ):
+        # Cities labeled in the training utterances are added to the gazetteer.
+        labeled = []
+        for text, _, entities in utterances:
+            for entity, start, end in entities:
+                phrase = text[start:end].strip()
+                if entity in CITY_ENTITIES and phrase and not phrase.isdigit():
+                    labeled.append((phrase.title(), None, []))
+        self._gazetteer = (gazetteer or CityGazetteer([])).extended(labeled)
+
+        samples = []
+        self._vocabulary = set()
+        for text, intent, _ in utterances:
+            tokens = self._delexicalize(text)
+            self._vocabulary.update(tokens)
+            samples.append((self._features(tokens), intent))
+
+        self._classifier = _SoftmaxClassifier(sorted({intent for _, intent, _ in utterances}))
+        self._classifier.fit(samples)
+
+    @staticmethod
+    def from_luis_model(
+        model_path: str,
+        training_paths: Iterable[str] = (),
+        gazetteer: CityGazetteer = None,
+    ) -> "LocalRecognizer":
+        """
+        Compile a recognizer from a LUIS app export plus optional exported training files.
+        The closed lists of the export are added to `gazetteer`.
+        """
+        utterances = load_luis_utterances(model_path)
+        for path in training_paths:
+            utterances.extend(load_luis_utterances(path))
+        gazetteer = (gazetteer or CityGazetteer([])).extended(load_closed_lists(model_path))
+        return LocalRecognizer(utterances, gazetteer)
+
+    @property
+    def gazetteer(self) -> CityGazetteer:
+        return self._gazetteer
+
+    async def recognize(self, turn_context: TurnContext) -> RecognizerResult:
+        if turn_context.activity.type != ActivityTypes.message:
+            return None
+        return self.recognize_text(turn_context.activity.text)
+
+    def recognize_text(self, text: str) -> RecognizerResult:
+        """Recognize intent and entities of `text`."""
+        if not text or text.isspace():
+            return RecognizerResult(
+                text=text, intents={"": IntentScore(score=1.0)}, entities={}
+            )
+
+        spans = self._extract_entities(text)
+        tokens = self._delexicalize(text, spans)
+
+        probabilities = self._classifier.predict_proba(self._features(tokens))
+        best = max(range(len(probabilities)), key=probabilities.__getitem__)
+        known = sum(1 for token in tokens if token in self._vocabulary)
+        score = probabilities[best] * known / len(tokens) if tokens else 0.0
+        # Like LUIS, answer "None" for text too far from every trained intent.
+        intent = self._classifier.labels[best] if score >= NONE_THRESHOLD else "None"
+
+        entities: Dict[str, object] = {}
+        instances: Dict[str, list] = {}
+        for entity, start, end in spans:
+            entities.setdefault(entity, []).append(text[start:end])
+            instances.setdefault(entity, []).append(
+                {
+                    "startIndex": start,
+                    "endIndex": end,
+                    "text": text[start:end],
+                    "type": entity,
+                    "score": 1.0,
+                }
+            )
+        if instances:
+            entities["$instance"] = instances
+
+        return RecognizerResult(
+            text=text,
+            intents={intent: IntentScore(score=score)},
+            entities=entities,
+            properties={"recognizer": "local"},
+        )
+
+    def _extract_entities(self, text: str) -> List[Tuple[str, int, int]]:
+        lowered = text.lower()
+        claimed = [match.span() for match in DATE_PATTERN.finditer(lowered)]
+        spans = _assign_roles(lowered, claimed, _DATE_CUES, ("str_date", "end_date"))
+
+        def free(start: int, end: int) -> bool:
+            return all(end <= other_start or start >= other_end for other_start, other_end in claimed)
+
+        # Only amounts given with a currency count as a budget in a whole sentence.
+        budget = next(
+            (
+                (start, end)
+                for start, end, found in find_budgets(lowered)
+                if found.currency and free(start, end)
+            ),
+            None,
+        )
+        if budget:
+            claimed.append(budget)
+            spans.append(("budget",) + budget)
+
+        # Airport codes are only found in capitals, as typed.
+        cased = text if len(text) == len(lowered) else lowered
+        cities = [
+            (match.start, match.end)
+            for match in self._gazetteer.find(cased)
+            if free(match.start, match.end)
+        ]
+        spans.extend(_assign_roles(lowered, cities, _CITY_CUES, ("dst_city", "or_city")))
+
+        return sorted(spans, key=lambda span: span[1])
+
+    def _delexicalize(
+        self, text: str, spans: List[Tuple[str, int, int]] = None
+    ) -> List[str]:
+        if spans is None:
+            spans = self._extract_entities(text)
+
+        pieces = []
+        position = 0
+        for entity, start, end in spans:
+            pieces.append(text[position:start])
+            pieces.append(" __%s__ " % ("date" if entity.endswith("date") else entity.split("_")[-1]))
+            position = end
+        pieces.append(text[position:])
+        return _tokens("".join(pieces))
+
+    @staticmethod
+    def _features(tokens: List[str]) -> Dict[str, float]:
+        features: Dict[str, float] = {}
+        for index, token in enumerate(tokens):
+            features["w:" + token] = features.get("w:" + token, 0.0) + 1.0
+            if index:
+                bigram = "b:%s_%s" % (tokens[index - 1], token)
+                features[bigram] = features.get(bigram, 0.0) + 1.0
+            if not token.startswith("__"):
+                padded = "#%s#" % token
+                for offset in range(len(padded) - 2):
+                    trigram = "c:" + padded[offset:offset + 3]
+                    features[trigram] = features.get(trigram, 0.0) + 0.5
+
+        norm = math.sqrt(sum(value * value for value in features.values())) or 1.0
+        return {feature: value / norm for feature, value in features.items()}
@@ -1,11 +1,21 @@
 # Copyright (c) Microsoft Corporation. All rights reserved.
 # Licensed under the MIT License.
+import asyncio
+import logging
 from enum import Enum
 from typing import Dict
 from botbuilder.ai.luis import LuisRecognizer
-from botbuilder.core import IntentScore, TopIntent, TurnContext
+from botbuilder.core import IntentScore, RecognizerResult, TopIntent, TurnContext
 
 from booking_details import BookingDetails
+from .budget_parser import Budget, parse_budget
+from .circuit_breaker import CircuitOpenError
+
+# Event tracked for every failed recognition, with the error type and whether it
+# is a known degradation (LUIS past its deadline or its circuit open).
+LUIS_FAILURE_EVENT = "LuisRecognitionFailed"
+
+_LOGGER = logging.getLogger(__name__)
 
 
 class Intent(Enum):
@@ -16,6 +26,31 @@ class Intent(Enum):
     NONE_INTENT = "NoneIntent"
 
 
+def _track_failure(
+    luis_recognizer: LuisRecognizer, exception: Exception, degraded: bool
+) -> None:
+    telemetry_client = getattr(luis_recognizer, "telemetry_client", None)
+    if telemetry_client is not None:
+        telemetry_client.track_event(
+            LUIS_FAILURE_EVENT,
+            {"error": type(exception).__name__, "degraded": str(degraded).lower()},
+        )
+
+
+def _is_supported(
+    luis_recognizer: LuisRecognizer,
+    recognizer_result: RecognizerResult,
+    entity: str,
+    instance: dict,
+) -> bool:
+    # The cities of the model's closed list when the recognizer knows them, so the
+    # answer does not depend on which recognizer answered, else the ones it resolved.
+    supported_cities = getattr(luis_recognizer, "supported_cities", None)
+    if supported_cities:
+        return " ".join(instance["text"].lower().split()) in supported_cities
+    return bool(recognizer_result.entities.get(entity, [{"$instance": {}}])[0])
+
+
 def top_intent(intents: Dict[Intent, dict]) -> TopIntent:
     max_intent = Intent.NONE_INTENT
     max_value = 0.0
@@ -45,7 +80,7 @@ class LuisHelper:
             intent = (
                 sorted(
                     recognizer_result.intents,
-                    key=recognizer_result.intents.get,
+                    key=lambda name: recognizer_result.intents[name].score,
                     reverse=True,
                 )[:1][0]
                 if recognizer_result.intents
@@ -63,7 +98,9 @@ class LuisHelper:
                     "dst_city", []
                 )
                 if len(dst_entities) > 0:
-                    if recognizer_result.entities.get("dst_city", [{"$instance": {}}])[0]:
+                    if _is_supported(
+                        luis_recognizer, recognizer_result, "dst_city", dst_entities[0]
+                    ):
                         result.destination = dst_entities[0]["text"].capitalize()
                     else:
                         result.unsupported_airports.append(
@@ -75,7 +112,9 @@ class LuisHelper:
                     "or_city", []
                 )
                 if len(or_entities) > 0:
-                    if recognizer_result.entities.get("or_city", [{"$instance": {}}])[0]:
+                    if _is_supported(
+                        luis_recognizer, recognizer_result, "or_city", or_entities[0]
+                    ):
                         result.origin = or_entities[0]["text"].capitalize()
                     else:
                         result.unsupported_airports.append(
@@ -102,10 +141,17 @@ class LuisHelper:
                 )
                 if len(budget_entities) > 0:
                     if recognizer_result.entities.get("budget", [{"$instance": {}}])[0]:
-                        result.budget = budget_entities[0]["text"]
+                        budget_text = budget_entities[0]["text"]
+                        result.budget = parse_budget(budget_text) or Budget.unparsed(
+                            budget_text
+                        )
 
 
-        except Exception as exception:
-            print(exception)
+        except (asyncio.TimeoutError, CircuitOpenError) as exception:
+            # The turn goes on without LUIS, the breaker already counted it.
+            _track_failure(luis_recognizer, exception, degraded=True)
+        except Exception as exception:  # pylint: disable=broad-except
+            _track_failure(luis_recognizer, exception, degraded=False)
+            _LOGGER.exception("LUIS recognition failed")
 
         return intent, result
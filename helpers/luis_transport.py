@@ -0,0 +1,258 @@
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License.
+"""Pooled, keep-alive HTTP transport for LUIS prediction calls."""
+
+import asyncio
+from typing import Dict, Union
+
+import aiohttp
+from azure.cognitiveservices.language.luis.runtime.models import LuisResult
+from botbuilder.ai.luis import (
+    LuisApplication,
+    LuisPredictionOptions,
+    LuisRecognizer,
+)
+from botbuilder.ai.luis.luis_recognizer_options_v2 import LuisRecognizerOptionsV2
+from botbuilder.ai.luis.luis_recognizer_options_v3 import LuisRecognizerOptionsV3
+from botbuilder.ai.luis.luis_recognizer_v2 import LuisRecognizerV2
+from botbuilder.ai.luis.luis_util import LuisUtil
+from botbuilder.core import RecognizerResult, TurnContext
+
+
+class LuisPredictionTransport:
+    """
+    Process-wide aiohttp session used for every LUIS prediction call.
+
+    Connections are kept alive and reused, DNS answers are cached, the total pool
+    and the concurrency per host are capped, and connect/read timeouts apply to
+    every call. The session is created lazily on the running event loop.
+    """
+
+    def __init__(
+        self,
+        pool_size: int = 32,
+        per_host_limit: int = 16,
+        connect_timeout: float = 2.0,
+        read_timeout: float = 5.0,
+        dns_cache_ttl: int = 300,
+        keepalive_timeout: float = 60.0,
+    ):
+        self.pool_size = pool_size
+        self.per_host_limit = per_host_limit
+        self.connect_timeout = connect_timeout
+        self.read_timeout = read_timeout
+        self.dns_cache_ttl = dns_cache_ttl
+        self.keepalive_timeout = keepalive_timeout
+        self._session: aiohttp.ClientSession = None
+
+        self.requests = 0
+        self.failures = 0
+        self.in_flight = 0
+        self.peak_in_flight = 0
+        self.connections_created = 0
+        self.connections_reused = 0
+        self.dns_cache_hits = 0
+        self.dns_cache_misses = 0
+
+    @property
+    def session(self) -> aiohttp.ClientSession:
+        if self._session is None or self._session.closed:
+            connector = aiohttp.TCPConnector(
+                limit=self.pool_size,
+                limit_per_host=self.per_host_limit,
+                ttl_dns_cache=self.dns_cache_ttl,
+                keepalive_timeout=self.keepalive_timeout,
+            )
+            timeout = aiohttp.ClientTimeout(
+                sock_connect=self.connect_timeout, sock_read=self.read_timeout
+            )
+            self._session = aiohttp.ClientSession(
+                connector=connector,
+                timeout=timeout,
+                trace_configs=[self._trace_config()],
+            )
+        return self._session
+
+    async def post_json(
+        self, url: str, params: Dict[str, str], headers: Dict[str, str], body: object
+    ) -> dict:
+        """POST `body` as JSON and return the decoded JSON response."""
+        self.requests += 1
+        self.in_flight += 1
+        self.peak_in_flight = max(self.peak_in_flight, self.in_flight)
+        try:
+            async with self.session.post(
+                url, params=params, headers=headers, json=body
+            ) as response:
+                response.raise_for_status()
+                return await response.json()
+        except (aiohttp.ClientError, asyncio.TimeoutError):
+            self.failures += 1
+            raise
+        finally:
+            self.in_flight -= 1
+
+    async def warm(self, url: str) -> bool:
+        """Open a pooled connection to `url` ahead of the first prediction call."""
+        try:
+            async with self.session.head(url):
+                return True
+        except (aiohttp.ClientError, asyncio.TimeoutError):
+            return False
+
+    async def close(self) -> None:
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
+
+    def stats(self) -> Dict[str, Union[int, float]]:
+        return {
+            "pool_size": self.pool_size,
+            "per_host_limit": self.per_host_limit,
+            "requests": self.requests,
+            "failures": self.failures,
+            "in_flight": self.in_flight,
+            "peak_in_flight": self.peak_in_flight,
+            "utilization": self.in_flight / self.per_host_limit
+            if self.per_host_limit
+            else 0.0,
+            "connections_created": self.connections_created,
+            "connections_reused": self.connections_reused,
+            "dns_cache_hits": self.dns_cache_hits,
+            "dns_cache_misses": self.dns_cache_misses,
+        }
+
+    def _trace_config(self) -> aiohttp.TraceConfig:
+        trace_config = aiohttp.TraceConfig()
+
+        async def on_connection_create_end(*_):
+            self.connections_created += 1
+
+        async def on_connection_reuseconn(*_):
+            self.connections_reused += 1
+
+        async def on_dns_cache_hit(*_):
+            self.dns_cache_hits += 1
+
+        async def on_dns_cache_miss(*_):
+            self.dns_cache_misses += 1
+
+        trace_config.on_connection_create_end.append(on_connection_create_end)
+        trace_config.on_connection_reuseconn.append(on_connection_reuseconn)
+        trace_config.on_dns_cache_hit.append(on_dns_cache_hit)
+        trace_config.on_dns_cache_miss.append(on_dns_cache_miss)
+        return trace_config
+
+
+class PooledLuisRecognizerV2(LuisRecognizerV2):
+    """LUIS v2 prediction client sending its requests through a LuisPredictionTransport."""
+
+    def __init__(
+        self,
+        luis_application: LuisApplication,
+        luis_recognizer_options_v2: LuisRecognizerOptionsV2,
+        transport: LuisPredictionTransport,
+    ):
+        super().__init__(luis_application, luis_recognizer_options_v2)
+        self._transport = transport
+        self._url = "%s/luis/v2.0/apps/%s" % (
+            luis_application.endpoint.rstrip("/"),
+            luis_application.application_id,
+        )
+        self._headers = {
+            "Ocp-Apim-Subscription-Key": luis_application.endpoint_key,
+            "User-Agent": LuisUtil.get_user_agent(),
+        }
+
+    async def recognizer_internal(self, turn_context: TurnContext):
+        utterance: str = turn_context.activity.text if turn_context.activity is not None else None
+        options = self.luis_recognizer_options_v2
+
+        params = {
+            "timezoneOffset": options.timezone_offset,
+            "verbose": options.include_all_intents,
+            "staging": options.staging,
+            "spellCheck": options.spell_check,
+            "bing-spell-check-subscription-key": options.bing_spell_check_subscription_key,
+            "log": options.log if options.log is not None else True,
+        }
+        params = {
+            name: str(value).lower() if isinstance(value, bool) else str(value)
+            for name, value in params.items()
+            if value is not None
+        }
+
+        luis_json = await self._transport.post_json(
+            self._url, params, self._headers, utterance
+        )
+        luis_result: LuisResult = LuisResult.deserialize(luis_json)
+
+        recognizer_result: RecognizerResult = RecognizerResult(
+            text=utterance,
+            altered_text=luis_result.altered_query,
+            intents=LuisUtil.get_intents(luis_result),
+            entities=LuisUtil.extract_entities_and_metadata(
+                luis_result.entities,
+                luis_result.composite_entities,
+                options.include_instance_data
+                if options.include_instance_data is not None
+                else True,
+            ),
+        )
+
+        LuisUtil.add_properties(luis_result, recognizer_result)
+        if options.include_api_results:
+            recognizer_result.properties["luisResult"] = luis_result
+
+        await self._emit_trace_info(turn_context, luis_result, recognizer_result, options)
+
+        return recognizer_result
+
+
+class PooledLuisRecognizer(LuisRecognizer):
+    """
+    LuisRecognizer reusing one prediction client, bound to a shared transport,
+    instead of building a new client for every recognition.
+    """
+
+    def __init__(
+        self,
+        application: LuisApplication,
+        prediction_options: LuisPredictionOptions,
+        transport: LuisPredictionTransport,
+    ):
+        super().__init__(application, prediction_options=prediction_options)
+        self._transport = transport
+        self._pooled_recognizer = None
+
+    def _build_recognizer(
+        self,
+        luis_prediction_options: Union[
+            LuisRecognizerOptionsV3, LuisRecognizerOptionsV2, LuisPredictionOptions
+        ],
+    ):
+        if luis_prediction_options is not self._options or isinstance(
+            luis_prediction_options, (LuisRecognizerOptionsV2, LuisRecognizerOptionsV3)
+        ):
+            return super()._build_recognizer(luis_prediction_options)
+
+        if self._pooled_recognizer is None:
+            options = self._options
+            self._pooled_recognizer = PooledLuisRecognizerV2(
+                self._application,
+                LuisRecognizerOptionsV2(
+                    options.bing_spell_check_subscription_key,
+                    options.include_all_intents,
+                    options.include_instance_data,
+                    options.log,
+                    options.spell_check,
+                    options.staging,
+                    options.timeout,
+                    options.timezone_offset,
+                    self._include_api_results,
+                    options.telemetry_client,
+                    options.log_personal_information,
+                ),
+                self._transport,
+            )
+        return self._pooled_recognizer
@@ -0,0 +1,66 @@
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License.
+"""Coalesce the replies of a turn into as few connector calls as possible."""
+
+from copy import copy
+from typing import List
+
+from botbuilder.schema import Activity, ActivityTypes
+
+# Turn state key of the activities buffered until the end of the turn.
+OUTBOUND_BUFFER_KEY = "OutboundActivityBuffer"
+
+# Message properties a merged message could not keep for both messages.
+_UNMERGEABLE_PROPERTIES = ("value", "channel_data", "entities", "summary")
+
+
+def can_merge(first: Activity, second: Activity) -> bool:
+    """
+    Whether `second` can be sent as part of `first`: two plain messages, the first
+    without suggested actions, which only the last message of a reply may carry.
+    """
+    if first.type != ActivityTypes.message or second.type != ActivityTypes.message:
+        return False
+    if first.suggested_actions or first.text_format != second.text_format:
+        return False
+    if any(
+        getattr(activity, name)
+        for activity in (first, second)
+        for name in _UNMERGEABLE_PROPERTIES
+    ):
+        return False
+    # The cards of both are shown with one layout.
+    return (
+        not first.attachments
+        or not second.attachments
+        or first.attachment_layout == second.attachment_layout
+    )
+
+
+def _join(separator: str, first: str, second: str) -> str:
+    if first and second:
+        return first + separator + second
+    return second or first
+
+
+def merge(first: Activity, second: Activity) -> Activity:
+    """One message with the text, speech and cards of `first` then `second`."""
+    merged = copy(first)
+    merged.text = _join("\n\n", first.text, second.text)
+    merged.speak = _join(" ", first.speak, second.speak)
+    merged.attachments = (first.attachments or []) + (second.attachments or [])
+    merged.attachment_layout = first.attachment_layout or second.attachment_layout
+    merged.input_hint = second.input_hint or first.input_hint
+    merged.suggested_actions = second.suggested_actions
+    return merged
+
+
+def coalesce_activities(activities: List[Activity]) -> List[Activity]:
+    """`activities` in order, each run of mergeable messages merged into one."""
+    coalesced = []
+    for activity in activities:
+        if coalesced and can_merge(coalesced[-1], activity):
+            coalesced[-1] = merge(coalesced[-1], activity)
+        else:
+            coalesced.append(activity)
+    return coalesced
@@ -0,0 +1,113 @@
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License.
+"""LRU + TTL cache for recognizer results."""
+
+import copy
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, Optional, Tuple
+
+from botbuilder.core import RecognizerResult
+
+
+class RecognitionCache:
+    """
+    Bounded cache of RecognizerResult keyed on the utterance and the LUIS
+    application id/version. The utterance is kept as typed: the entity text and
+    offsets of a result are those of its utterance, and its casing is what the
+    booking details are filled with.
+
+    Entries expire after `ttl` seconds and the least recently used entry is evicted
+    once `max_size` entries are stored. Results are copied in and out so callers
+    can never alter a cached entry.
+    """
+
+    def __init__(
+        self,
+        max_size: int = 1024,
+        ttl: float = 600.0,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._clock = clock
+        self._entries: "OrderedDict[Tuple[str, str, str], Tuple[float, RecognizerResult]]" = (
+            OrderedDict()
+        )
+        self._app_id = ""
+        self._version = ""
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_size > 0 and self.ttl > 0
+
+    def set_version(self, app_id: str, version: str) -> None:
+        """Bind the cache to a LUIS app/version, dropping every entry if it changed."""
+        if (app_id or "", version or "") != (self._app_id, self._version):
+            self._app_id = app_id or ""
+            self._version = version or ""
+            self.invalidate()
+
+    def invalidate(self) -> None:
+        """Drop every cached entry."""
+        if self._entries:
+            self.invalidations += 1
+        self._entries.clear()
+
+    def get(self, text: str) -> Optional[RecognizerResult]:
+        """Return a copy of the cached result for `text`, or None on a miss."""
+        if not self.enabled:
+            return None
+
+        key = self._key(text)
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+
+        expires_at, result = entry
+        if expires_at <= self._clock():
+            del self._entries[key]
+            self.expirations += 1
+            self.misses += 1
+            return None
+
+        self._entries.move_to_end(key)
+        self.hits += 1
+
+        return copy.deepcopy(result)
+
+    def set(self, text: str, result: RecognizerResult) -> None:
+        """Store a copy of `result` for `text`."""
+        if not self.enabled or result is None:
+            return
+
+        key = self._key(text)
+        self._entries[key] = (self._clock() + self.ttl, copy.deepcopy(result))
+        self._entries.move_to_end(key)
+
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "size": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "invalidations": self.invalidations,
+        }
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _key(self, text: str) -> Tuple[str, str, str]:
+        return self._app_id, self._version, text
@@ -0,0 +1,85 @@
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License.
+"""Coalesce identical concurrent calls into a single in-flight call."""
+
+import asyncio
+from typing import Awaitable, Callable, Dict, Hashable, TypeVar
+
+T = TypeVar("T")
+
+
+class _CallCancelled(Exception):
+    """The call was cancelled with the caller that made it."""
+
+
+class SingleFlight:
+    """
+    Runs at most one call per key at a time.
+
+    A caller arriving while a call with the same key is in flight awaits that call
+    instead of starting its own. The result is kept as set, and every caller, the one
+    that made the call included, receives its own `copy_result(result)`, so no two
+    callers share a mutable result. Errors are propagated to every waiting caller.
+    When the caller that made the call is cancelled, e.g. its client disconnected,
+    the call is made again by one of the waiting callers, the others wait on it.
+    """
+
+    def __init__(self, copy_result: Callable[[T], T] = None):
+        self._copy_result = copy_result or (lambda result: result)
+        self._in_flight: Dict[Hashable, asyncio.Future] = {}
+
+        self.calls = 0
+        self.coalesced = 0
+
+    async def do(self, key: Hashable, func: Callable[[], Awaitable[T]]) -> T:
+        self.calls += 1
+
+        while True:
+            future = self._in_flight.get(key)
+            if future is None:
+                return await self._call(key, func)
+            self.coalesced += 1
+            try:
+                return self._copy_result(await asyncio.shield(future))
+            except _CallCancelled:
+                # The first waiter back here makes the call again.
+                self.coalesced -= 1
+
+    async def _call(self, key: Hashable, func: Callable[[], Awaitable[T]]) -> T:
+        future = asyncio.get_event_loop().create_future()
+        self._in_flight[key] = future
+        try:
+            result = await func()
+        except asyncio.CancelledError:
+            # Not cancelled for the waiters, who are still waiting for a result.
+            self._fail(future, _CallCancelled())
+            raise
+        except Exception as error:
+            self._fail(future, error)
+            raise
+        else:
+            future.set_result(result)
+            # The caller may change its result before the waiters copy theirs.
+            return self._copy_result(result)
+        finally:
+            del self._in_flight[key]
+
+    @staticmethod
+    def _fail(future: asyncio.Future, error: Exception) -> None:
+        future.set_exception(error)
+        # Mark the exception as retrieved when nobody else was waiting.
+        future.exception()
+
+    @property
+    def in_flight(self) -> int:
+        return len(self._in_flight)
+
+    def is_in_flight(self, key: Hashable) -> bool:
+        return key in self._in_flight
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "calls": self.calls,
+            "coalesced": self.coalesced,
+            "in_flight": self.in_flight,
+        }
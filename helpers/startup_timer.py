@@ -0,0 +1,59 @@
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License.
+"""Per-phase timing of the bot startup."""
+
+import sys
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, Union
+
+
+class StartupTimer:
+    """
+    Records how long each startup phase took, from the process start given as
+    `started_at`, and whether the deferred warm-up has completed.
+    """
+
+    def __init__(
+        self, started_at: float = None, clock: Callable[[], float] = time.perf_counter
+    ):
+        self._clock = clock
+        self.started_at = clock() if started_at is None else started_at
+        self.phases: Dict[str, float] = {}
+        self.ready_after: float = None
+
+    @contextmanager
+    def phase(self, name: str):
+        start = self._clock()
+        try:
+            yield
+        finally:
+            self.record(name, self._clock() - start)
+
+    def record(self, name: str, seconds: float) -> None:
+        self.phases[name] = self.phases.get(name, 0.0) + seconds
+
+    def mark_ready(self) -> None:
+        self.ready_after = self._clock() - self.started_at
+
+    @property
+    def is_ready(self) -> bool:
+        return self.ready_after is not None
+
+    def report(self) -> Dict[str, Union[bool, float, Dict[str, float]]]:
+        return {
+            "ready": self.is_ready,
+            "ready_after": self.ready_after,
+            "uptime": self._clock() - self.started_at,
+            "phases": dict(self.phases),
+        }
+
+    def log(self) -> None:
+        print(
+            "Startup: "
+            + ", ".join(
+                "%s %.0f ms" % (name, seconds * 1000)
+                for name, seconds in self.phases.items()
+            ),
+            file=sys.stderr,
+        )
@@ -0,0 +1,115 @@
+import asyncio
+import io
+
+from aiounittest import AsyncTestCase
+
+from benchmarks.hot_paths_benchmark import (
+    FixtureRecognizer,
+    complete,
+    compare,
+    create_cases,
+    load_predictions,
+    recognizer_result,
+    run_pass,
+    turn_context,
+)
+from helpers.luis_helper import LuisHelper
+
+
+class HotPathsBenchmarkTest(AsyncTestCase):
+    """
+    This class contains tests of the hot path microbenchmarks:
+    - the recorded predictions read by LuisHelper like live ones, verbose ones included
+    - every function running over its whole corpus, both outcomes of the validators
+    - time and allocation regressions against the baseline
+    """
+
+    async def test_recorded_predictions(self):
+        predictions = load_predictions()
+        recognizer = FixtureRecognizer(
+            {item["query"]: recognizer_result(item) for item in predictions}
+        )
+
+        intent, booking_details = await LuisHelper.execute_luis_query(
+            recognizer, turn_context("book a flight from Amsterdam to Dublin")
+        )
+        self.assertEqual("book", intent)
+        self.assertEqual("Amsterdam", booking_details.origin)
+        self.assertEqual("Dublin", booking_details.destination)
+
+    async def test_verbose_prediction(self):
+        prediction = {
+            "query": "book a flight to Paris",
+            "topScoringIntent": {"intent": "book", "score": 0.9},
+            "intents": [
+                {"intent": "None", "score": 0.02},
+                {"intent": "book", "score": 0.9},
+                {"intent": "Cancel", "score": 0.08},
+            ],
+            "entities": [
+                {
+                    "entity": "paris",
+                    "type": "dst_city",
+                    "startIndex": 17,
+                    "endIndex": 21,
+                    "score": 1.0,
+                }
+            ],
+        }
+        recognizer = FixtureRecognizer({prediction["query"]: recognizer_result(prediction)})
+
+        intent, booking_details = await LuisHelper.execute_luis_query(
+            recognizer, turn_context(prediction["query"])
+        )
+        self.assertEqual("book", intent)
+        self.assertEqual("Paris", booking_details.destination)
+
+    def test_cases(self):
+        cases = {case.name: case for case in create_cases(load_predictions(), size=200)}
+        for case in cases.values():
+            with self.subTest(case.name):
+                self.assertGreater(len(case.corpus), 0)
+                self.assertGreaterEqual(run_pass(case, 1), 0)
+
+        budget = cases["BudgetDialog.budget_validator"]
+        self.assertEqual({True, False}, {budget.op(*args) for args in budget.corpus})
+        dates = cases["DateResolverDialog.datetime_prompt_validator"]
+        self.assertEqual({True, False}, {dates.op(*args) for args in dates.corpus})
+
+    def test_complete(self):
+        async def suspending():
+            await asyncio.sleep(0)
+
+        with self.assertRaises(RuntimeError):
+            complete(suspending())
+
+    def test_compare(self):
+        baseline = {
+            "python": "3.11.0",
+            "functions": {
+                "top_intent": {"ns_per_op": 1000.0, "allocated_bytes_per_op": 400.0},
+                "create_activity_reply": {
+                    "ns_per_op": 1000.0,
+                    "allocated_bytes_per_op": 2000.0,
+                },
+            },
+        }
+        report = {
+            "python": "3.11.0",
+            "functions": {
+                "top_intent": {"ns_per_op": 1200.0, "allocated_bytes_per_op": 480.0},
+                "create_activity_reply": {
+                    "ns_per_op": 1500.0,
+                    "allocated_bytes_per_op": 2000.0,
+                },
+            },
+        }
+
+        self.assertEqual(
+            [
+                "top_intent allocated_bytes_per_op",
+                "create_activity_reply ns_per_op",
+            ],
+            compare(report, baseline, 0.3, 0.1, io.StringIO()),
+        )
+        self.assertEqual([], compare(baseline, baseline, 0.3, 0.1, io.StringIO()))
@@ -0,0 +1,136 @@
+import json
+import os
+import subprocess
+import sys
+import unittest
+
+from aiohttp import ClientSession
+from aiohttp.test_utils import TestServer
+from aiounittest import AsyncTestCase
+
+from botbuilder.ai.luis import LuisApplication, LuisPredictionOptions
+from botbuilder.core import TurnContext
+from botbuilder.core.adapters import TestAdapter
+from botbuilder.schema import (
+    Activity,
+    ActivityTypes,
+    ChannelAccount,
+    ConversationAccount,
+)
+
+from benchmarks.stubs import StubConnector, StubLuis
+from helpers.luis_helper import LuisHelper
+from helpers.luis_transport import LuisPredictionTransport, PooledLuisRecognizer
+
+
+class LoadTestStubsTest(AsyncTestCase):
+    """
+    This class contains tests of the load test stand-ins:
+    - the LUIS stand-in answering v2 predictions LuisHelper reads like the real ones
+    - the connector stand-in queuing replies per conversation until forgotten
+    """
+
+    async def test_stub_luis(self):
+        stub = StubLuis(latency=0)
+        server = TestServer(stub.app())
+        await server.start_server()
+        transport = LuisPredictionTransport()
+        recognizer = PooledLuisRecognizer(
+            LuisApplication(
+                "00000000-0000-0000-0000-000000000000",
+                "00000000-0000-0000-0000-000000000001",
+                str(server.make_url("")),
+            ),
+            LuisPredictionOptions(),
+            transport,
+        )
+        try:
+            intent, booking_details = await LuisHelper.execute_luis_query(
+                recognizer, self._get_context("book a flight from Paris to Berlin")
+            )
+        finally:
+            await transport.close()
+            await server.close()
+
+        self.assertEqual("book", intent)
+        self.assertEqual("Berlin", booking_details.destination)
+        self.assertEqual("Paris", booking_details.origin)
+        self.assertEqual(1, stub.predictions)
+
+    async def test_stub_connector(self):
+        connector = StubConnector()
+        server = TestServer(connector.app())
+        await server.start_server()
+        replies = connector.replies("c1")
+        try:
+            async with ClientSession() as session:
+                for conversation_id in ("c1", "c2"):
+                    await session.post(
+                        server.make_url(f"/v3/conversations/{conversation_id}/activities/a"),
+                        json={"text": "hello " + conversation_id},
+                    )
+                unread = connector.forget("c1")
+                await session.post(
+                    server.make_url("/v3/conversations/c1/activities"),
+                    json={"text": "late"},
+                )
+        finally:
+            await server.close()
+
+        self.assertEqual(["hello c1"], [reply["text"] for reply in unread])
+        self.assertTrue(replies.empty())
+        self.assertEqual(3, connector.received)
+
+    @staticmethod
+    def _get_context(utterance: str) -> TurnContext:
+        activity = Activity(
+            type=ActivityTypes.message,
+            text=utterance,
+            conversation=ConversationAccount(),
+            recipient=ChannelAccount(),
+            from_property=ChannelAccount(),
+        )
+        return TurnContext(TestAdapter(), activity)
+
+
+class LoadTestTest(unittest.TestCase):
+    """
+    This class contains tests of the load test harness:
+    - a short offline run completing every conversation without errors
+    - one reply per turn with outbound batching
+    """
+
+    def test_offline_run(self):
+        report = self._run("--no-local-recognizer")
+
+        self.assertEqual(6, report["completed"])
+        self.assertEqual({}, report["errors"])
+        self.assertGreater(report["luis_predictions"], 0)
+        self.assertGreater(report["latency_ms"]["p99"], 0)
+
+    def test_outbound_batching(self):
+        report = self._run("--outbound-batching")
+
+        self.assertEqual(6, report["completed"])
+        self.assertEqual(report["turns"], report["replies"])
+
+    @staticmethod
+    def _run(*args: str) -> dict:
+        output = subprocess.run(
+            [
+                sys.executable,
+                "-m",
+                "benchmarks.load_test",
+                "--conversations",
+                "6",
+                "--concurrency",
+                "3",
+                "--json",
+                *args,
+            ],
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+            stdout=subprocess.PIPE,
+            check=True,
+            timeout=120,
+        ).stdout
+        return json.loads(output[output.index(b"{") :])
@@ -0,0 +1,144 @@
+from decimal import Decimal
+
+from aiounittest import AsyncTestCase
+
+from botbuilder.core import IntentScore, RecognizerResult, TurnContext
+from botbuilder.core.adapters import TestAdapter
+from botbuilder.schema import (
+    Activity,
+    ActivityTypes,
+    ChannelAccount,
+    ConversationAccount,
+)
+
+from config import DefaultConfig
+from flight_booking_recognizer import FlightBookingRecognizer
+from helpers.local_recognizer import LocalRecognizer
+from helpers.luis_helper import LuisHelper, Intent
+
+
+class FakeLuisRecognizer:
+    def __init__(self):
+        self.calls = 0
+
+    async def recognize(self, turn_context: TurnContext) -> RecognizerResult:
+        self.calls += 1
+        return RecognizerResult(
+            text=turn_context.activity.text,
+            intents={"None": IntentScore(0.9)},
+            entities={},
+        )
+
+
+class FixtureLuisRecognizer:
+    """Answers with the simple city entities of the deployed LUIS app."""
+
+    async def recognize(self, turn_context: TurnContext) -> RecognizerResult:
+        text = turn_context.activity.text
+        entities = {"$instance": {}}
+        for entity, city in (("or_city", "lisbon"), ("dst_city", "paris")):
+            start = text.lower().index(city)
+            entities[entity] = [city]
+            entities["$instance"][entity] = [
+                {
+                    "startIndex": start,
+                    "endIndex": start + len(city),
+                    "text": text[start : start + len(city)],
+                    "type": entity,
+                    "score": 1.0,
+                }
+            ]
+        return RecognizerResult(
+            text=text, intents={"book": IntentScore(0.99)}, entities=entities
+        )
+
+
+class LocalRecognizerTest(AsyncTestCase):
+    """
+    This class contains tests of the local recognizer:
+    - intent and entities of an in-domain query
+    - low score for an out-of-domain query
+    - LuisHelper consuming a local result
+    - FlightBookingRecognizer falling through to LUIS below the threshold
+    - the None intent for out-of-domain text
+    - the same unsupported cities whichever recognizer answers
+    """
+
+    recognizer = LocalRecognizer.from_luis_model(DefaultConfig.LOCAL_RECOGNIZER_MODEL)
+
+    def test_complete_booking_query(self):
+        result = self.recognizer.recognize_text(
+            "book a flight from London to Paris from feb 14th to feb 20th"
+        )
+
+        intent, score = next(iter(result.intents.items()))
+        self.assertEqual(Intent.BOOK_FLIGHT.value, intent)
+        self.assertGreater(score.score, 0.8)
+        self.assertEqual(["London"], result.entities["or_city"])
+        self.assertEqual(["Paris"], result.entities["dst_city"])
+        self.assertEqual(["feb 14th"], result.entities["str_date"])
+        self.assertEqual(["feb 20th"], result.entities["end_date"])
+
+    def test_not_book_intent_query(self):
+        result = self.recognizer.recognize_text("ljflgjldfk")
+
+        intent, score = next(iter(result.intents.items()))
+        self.assertEqual("None", intent)
+        self.assertLess(score.score, 0.5)
+
+    async def test_luis_helper_consumes_local_result(self):
+        config = DefaultConfig()
+        config.LUIS_APP_ID = ""
+        luis_recognizer = FlightBookingRecognizer(config)
+
+        context = self._get_context("travel to paris from berlin with 300 euros")
+        intent, luis_result = await LuisHelper.execute_luis_query(
+            luis_recognizer, context
+        )
+
+        self.assertTrue(luis_recognizer.is_configured)
+        self.assertEqual(Intent.BOOK_FLIGHT.value, intent)
+        self.assertEqual("Paris", luis_result.destination)
+        self.assertEqual("Berlin", luis_result.origin)
+        self.assertEqual(Decimal(300), luis_result.budget.amount)
+        self.assertEqual("EUR", luis_result.budget.currency)
+
+    async def test_low_score_falls_through_to_luis(self):
+        luis_recognizer = FlightBookingRecognizer(DefaultConfig())
+        fake = FakeLuisRecognizer()
+        luis_recognizer._recognizer = fake
+
+        await luis_recognizer.recognize(self._get_context("travel to paris"))
+        self.assertEqual(0, fake.calls)
+
+        await luis_recognizer.recognize(self._get_context("ljflgjldfk"))
+        self.assertEqual(1, fake.calls)
+
+    async def test_unsupported_cities(self):
+        config = DefaultConfig()
+        config.LUIS_APP_ID = ""
+        text = "book a flight from Lisbon to Paris"
+
+        local = FlightBookingRecognizer(config)
+        luis = FlightBookingRecognizer(config)
+        luis._local_recognizer = None
+        luis._recognizer = FixtureLuisRecognizer()
+
+        for luis_recognizer in (local, luis):
+            _, luis_result = await LuisHelper.execute_luis_query(
+                luis_recognizer, self._get_context(text)
+            )
+            self.assertEqual(["Lisbon"], luis_result.unsupported_airports)
+            self.assertEqual("Paris", luis_result.destination)
+            self.assertIsNone(luis_result.origin)
+
+    @staticmethod
+    def _get_context(utterance: str) -> TurnContext:
+        activity = Activity(
+            type=ActivityTypes.message,
+            text=utterance,
+            conversation=ConversationAccount(),
+            recipient=ChannelAccount(),
+            from_property=ChannelAccount(),
+        )
+        return TurnContext(TestAdapter(), activity)
@@ -0,0 +1,89 @@
+import uuid
+
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+from aiounittest import AsyncTestCase
+
+from botbuilder.ai.luis import LuisApplication, LuisPredictionOptions
+from botbuilder.core import TurnContext
+from botbuilder.core.adapters import TestAdapter
+from botbuilder.schema import (
+    Activity,
+    ActivityTypes,
+    ChannelAccount,
+    ConversationAccount,
+)
+
+from helpers.luis_transport import LuisPredictionTransport, PooledLuisRecognizer
+from helpers.luis_helper import LuisHelper
+
+
+async def predict(request: web.Request) -> web.Response:
+    query = await request.json()
+    request.app["requests"].append((request.match_info["app_id"], request.query, query))
+    return web.json_response(
+        {
+            "query": query,
+            "topScoringIntent": {"intent": "book", "score": 0.95},
+            "entities": [
+                {
+                    "entity": "paris",
+                    "type": "dst_city",
+                    "startIndex": 10,
+                    "endIndex": 14,
+                    "score": 0.9,
+                }
+            ],
+        }
+    )
+
+
+class LuisTransportTest(AsyncTestCase):
+    """
+    This class contains tests of the pooled LUIS transport against a local LUIS stand-in:
+    - prediction results reach LuisHelper unchanged
+    - connections are reused across calls
+    """
+
+    async def test_pooled_recognizer(self):
+        app = web.Application()
+        app["requests"] = []
+        app.router.add_post("/luis/v2.0/apps/{app_id}", predict)
+        server = TestServer(app)
+        await server.start_server()
+
+        app_id = str(uuid.uuid4())
+        transport = LuisPredictionTransport(pool_size=4, per_host_limit=2)
+        recognizer = PooledLuisRecognizer(
+            LuisApplication(app_id, str(uuid.uuid4()), str(server.make_url(""))),
+            LuisPredictionOptions(),
+            transport,
+        )
+
+        try:
+            for _ in range(3):
+                intent, luis_result = await LuisHelper.execute_luis_query(
+                    recognizer, self._get_context("flight to paris")
+                )
+                self.assertEqual("book", intent)
+                self.assertEqual("Paris", luis_result.destination)
+        finally:
+            await transport.close()
+            await server.close()
+
+        self.assertEqual(app_id, app["requests"][0][0])
+        self.assertEqual("flight to paris", app["requests"][0][2])
+        self.assertEqual(3, transport.requests)
+        self.assertEqual(1, transport.connections_created)
+        self.assertEqual(2, transport.connections_reused)
+
+    @staticmethod
+    def _get_context(utterance: str) -> TurnContext:
+        activity = Activity(
+            type=ActivityTypes.message,
+            text=utterance,
+            conversation=ConversationAccount(),
+            recipient=ChannelAccount(),
+            from_property=ChannelAccount(),
+        )
+        return TurnContext(TestAdapter(), activity)
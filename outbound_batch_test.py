@@ -0,0 +1,184 @@
+from aiohttp.test_utils import TestServer
+from aiounittest import AsyncTestCase
+
+from botbuilder.core import (
+    BotFrameworkAdapterSettings,
+    ConversationState,
+    InvokeResponse,
+    MemoryStorage,
+    MessageFactory,
+    TurnContext,
+)
+from botbuilder.schema import (
+    Activity,
+    ActivityTypes,
+    Attachment,
+    CardAction,
+    ChannelAccount,
+    ConversationAccount,
+    DeliveryModes,
+    ExpectedReplies,
+    InputHints,
+    SuggestedActions,
+)
+
+from adapter_with_error_handler import AdapterWithErrorHandler
+from benchmarks.stubs import StubConnector
+from helpers.outbound_batch import coalesce_activities
+
+
+def card(name: str) -> Attachment:
+    return Attachment(content_type="application/vnd.microsoft.card.adaptive", name=name)
+
+
+class OutboundBatchTest(AsyncTestCase):
+    """
+    This class contains tests of the outbound batching:
+    - consecutive messages merged, in order, the last one's input hint kept
+    - suggested actions, traces and other activities left apart
+    - one connector call for the replies of a turn, error messages included
+    - invoke and expectReplies turns answered as before
+    """
+
+    def test_coalesce(self):
+        warning = MessageFactory.text(
+            "Sorry but the following airports are not supported: Mars",
+            input_hint=InputHints.ignoring_input,
+        )
+        prompt = MessageFactory.text(
+            "To what city would you like to travel?",
+            input_hint=InputHints.expecting_input,
+        )
+        welcome_cards = [MessageFactory.attachment(card(name)) for name in ("a", "b")]
+
+        [merged] = coalesce_activities([warning, prompt])
+        self.assertEqual(f"{warning.text}\n\n{prompt.text}", merged.text)
+        self.assertEqual(InputHints.expecting_input, merged.input_hint)
+        self.assertNotIn("\n", warning.text)
+
+        [cards] = coalesce_activities(welcome_cards)
+        self.assertEqual(["a", "b"], [attachment.name for attachment in cards.attachments])
+        self.assertIsNone(cards.text)
+
+        suggested = MessageFactory.text("Pick one")
+        suggested.suggested_actions = SuggestedActions(
+            actions=[CardAction(type="imBack", title="yes", value="yes")]
+        )
+        trace = Activity(type=ActivityTypes.trace, name="TurnError")
+        self.assertEqual([suggested, prompt], coalesce_activities([suggested, prompt]))
+        self.assertEqual(
+            [warning, trace, prompt], coalesce_activities([warning, trace, prompt])
+        )
+
+    async def test_batched_turn(self):
+        async def book(turn_context: TurnContext):
+            await turn_context.send_activity("I have you booked to Paris")
+            await turn_context.send_activity("What else can I do for you?")
+
+        connector, replies = await self._run(book, batch_outbound=True)
+
+        self.assertEqual(
+            ["I have you booked to Paris\n\nWhat else can I do for you?"], replies
+        )
+        self.assertEqual(1, connector.received)
+        self.assertEqual(
+            {"activities_sent": 2, "connector_sends": 1}, self.adapter.outbound_stats()
+        )
+
+    async def test_unbatched_turn(self):
+        async def book(turn_context: TurnContext):
+            await turn_context.send_activity("I have you booked to Paris")
+            await turn_context.send_activity("What else can I do for you?")
+
+        connector, replies = await self._run(book, batch_outbound=False)
+
+        self.assertEqual(
+            ["I have you booked to Paris", "What else can I do for you?"], replies
+        )
+        self.assertEqual(2, connector.received)
+
+    async def test_failed_turn(self):
+        async def fail(turn_context: TurnContext):
+            # As the bot's turns do, so the error handler can clear the state.
+            await self.conversation_state.load(turn_context)
+            await turn_context.send_activity("To what city would you like to travel?")
+            raise ValueError("no city")
+
+        connector, replies = await self._run(fail, batch_outbound=True)
+
+        self.assertEqual(1, connector.received)
+        self.assertEqual(
+            [
+                "To what city would you like to travel?\n\n"
+                "The bot encountered an error or bug.\n\n"
+                "To continue to run this bot, please fix the bot source code."
+            ],
+            replies,
+        )
+
+    async def test_invoke_turn(self):
+        async def invoke(turn_context: TurnContext):
+            await turn_context.send_activity("Done")
+            await turn_context.send_activity(
+                Activity(
+                    type=ActivityTypes.invoke_response,
+                    value=InvokeResponse(status=200, body={"ok": True}),
+                )
+            )
+
+        connector, replies = await self._run(
+            invoke, batch_outbound=True, type=ActivityTypes.invoke, name="submit"
+        )
+
+        self.assertEqual(["Done"], replies)
+        self.assertEqual(200, self.response.status)
+        self.assertEqual({"ok": True}, self.response.body)
+
+    async def test_expect_replies_turn(self):
+        async def book(turn_context: TurnContext):
+            await turn_context.send_activity("I have you booked to Paris")
+            await turn_context.send_activity("What else can I do for you?")
+
+        connector, _ = await self._run(
+            book, batch_outbound=True, delivery_mode=DeliveryModes.expect_replies
+        )
+
+        self.assertEqual(0, connector.received)
+        activities = ExpectedReplies().deserialize(self.response.body).activities
+        self.assertEqual(
+            ["I have you booked to Paris", "What else can I do for you?"],
+            [activity.text for activity in activities],
+        )
+
+    async def _run(self, logic, batch_outbound: bool, **fields):
+        connector = StubConnector()
+        server = TestServer(connector.app())
+        await server.start_server()
+        replies = connector.replies("c1")
+        self.conversation_state = ConversationState(MemoryStorage())
+        self.adapter = AdapterWithErrorHandler(
+            BotFrameworkAdapterSettings("", ""),
+            self.conversation_state,
+            batch_outbound=batch_outbound,
+        )
+        activity = Activity(
+            type=ActivityTypes.message,
+            id="1",
+            text="yes",
+            channel_id="test",
+            service_url=str(server.make_url("")).rstrip("/"),
+            from_property=ChannelAccount(id="user"),
+            recipient=ChannelAccount(id="bot"),
+            conversation=ConversationAccount(id="c1"),
+        )
+        for name, value in fields.items():
+            setattr(activity, name, value)
+        try:
+            self.response = await self.adapter.process_activity(activity, "", logic)
+        finally:
+            await server.close()
+
+        texts = []
+        while not replies.empty():
+            texts.append(replies.get_nowait()["text"])
+        return connector, texts
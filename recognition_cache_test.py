@@ -0,0 +1,156 @@
+from aiounittest import AsyncTestCase
+
+from botbuilder.core import IntentScore, RecognizerResult, TurnContext
+from botbuilder.core.adapters import TestAdapter
+from botbuilder.schema import (
+    Activity,
+    ActivityTypes,
+    ChannelAccount,
+    ConversationAccount,
+)
+
+from config import DefaultConfig
+from flight_booking_recognizer import FlightBookingRecognizer
+from helpers.recognition_cache import RecognitionCache
+
+
+class LuisOnlyConfig(DefaultConfig):
+    LOCAL_RECOGNIZER_MODEL = ""
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+class CountingRecognizer:
+    def __init__(self):
+        self.calls = 0
+
+    async def recognize(self, turn_context: TurnContext) -> RecognizerResult:
+        self.calls += 1
+        return RecognizerResult(
+            text=turn_context.activity.text,
+            intents={"book": IntentScore(0.9)},
+            entities={},
+        )
+
+
+class RecognitionCacheTest(AsyncTestCase):
+    """
+    This class contains tests of the recognition cache:
+    - hit, miss, TTL expiration and LRU eviction
+    - invalidation on LUIS version change
+    - entity text and offsets of a hit, only for the utterance as typed
+    - FlightBookingRecognizer only calling LUIS once per utterance
+    """
+
+    @staticmethod
+    def _result(text: str) -> RecognizerResult:
+        return RecognizerResult(
+            text=text, intents={"book": IntentScore(0.9)}, entities={}
+        )
+
+    def test_hit_and_miss(self):
+        cache = RecognitionCache(max_size=10, ttl=60)
+
+        self.assertIsNone(cache.get("Paris"))
+        cache.set("Paris", self._result("Paris"))
+        cached = cache.get("Paris")
+
+        self.assertIsNotNone(cached)
+        self.assertEqual("Paris", cached.text)
+        self.assertIsNone(cache.get("  paris "))
+        self.assertEqual(1, cache.hits)
+        self.assertEqual(2, cache.misses)
+
+    def test_entity_offsets(self):
+        cache = RecognitionCache(max_size=10, ttl=60)
+        text = "Book a flight to Paris"
+        result = self._result(text)
+        result.entities = {
+            "dst_city": ["Paris"],
+            "$instance": {
+                "dst_city": [
+                    {"text": "Paris", "startIndex": 17, "endIndex": 22, "score": 0.9}
+                ]
+            },
+        }
+        cache.set(text, result)
+
+        [instance] = cache.get(text).entities["$instance"]["dst_city"]
+        self.assertEqual("Paris", instance["text"])
+        self.assertEqual("Paris", text[instance["startIndex"] : instance["endIndex"]])
+        # Offsets and casing would not fit another spelling.
+        self.assertIsNone(cache.get("book a flight to  paris"))
+
+    def test_cached_result_is_a_copy(self):
+        cache = RecognitionCache(max_size=10, ttl=60)
+        cache.set("Paris", self._result("Paris"))
+
+        cache.get("Paris").intents.clear()
+
+        self.assertIn("book", cache.get("Paris").intents)
+
+    def test_ttl_expiration(self):
+        clock = FakeClock()
+        cache = RecognitionCache(max_size=10, ttl=60, clock=clock)
+        cache.set("Paris", self._result("Paris"))
+
+        clock.now = 61
+
+        self.assertIsNone(cache.get("Paris"))
+        self.assertEqual(1, cache.expirations)
+        self.assertEqual(0, len(cache))
+
+    def test_lru_eviction(self):
+        cache = RecognitionCache(max_size=2, ttl=60)
+        cache.set("Paris", self._result("Paris"))
+        cache.set("London", self._result("London"))
+        cache.get("Paris")
+        cache.set("Berlin", self._result("Berlin"))
+
+        self.assertIsNone(cache.get("London"))
+        self.assertIsNotNone(cache.get("Paris"))
+        self.assertEqual(1, cache.evictions)
+
+    def test_version_change_invalidates(self):
+        cache = RecognitionCache(max_size=10, ttl=60)
+        cache.set_version("app", "0.1")
+        cache.set("Paris", self._result("Paris"))
+
+        cache.set_version("app", "0.1")
+        self.assertIsNotNone(cache.get("Paris"))
+
+        cache.set_version("app", "0.2")
+        self.assertIsNone(cache.get("Paris"))
+        self.assertEqual(1, cache.invalidations)
+
+    async def test_recognizer_uses_cache(self):
+        recognizer = FlightBookingRecognizer(LuisOnlyConfig())
+        fake = CountingRecognizer()
+        recognizer._recognizer = fake
+
+        first = await recognizer.recognize(self._get_context("Paris"))
+        second = await recognizer.recognize(self._get_context("Paris"))
+        other = await recognizer.recognize(self._get_context("PARIS"))
+
+        self.assertEqual(2, fake.calls)
+        self.assertEqual("Paris", first.text)
+        self.assertEqual("Paris", second.text)
+        self.assertEqual("PARIS", other.text)
+        self.assertEqual(1, recognizer.cache.hits)
+
+    @staticmethod
+    def _get_context(utterance: str) -> TurnContext:
+        activity = Activity(
+            type=ActivityTypes.message,
+            text=utterance,
+            conversation=ConversationAccount(),
+            recipient=ChannelAccount(),
+            from_property=ChannelAccount(),
+        )
+        return TurnContext(TestAdapter(), activity)
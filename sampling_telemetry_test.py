@@ -0,0 +1,112 @@
+import unittest
+
+from botbuilder.core import NullTelemetryClient, Severity
+
+from telemetry import SAMPLING_RATE_PROPERTY, SamplingTelemetryClient
+
+
+class RecordingClient(NullTelemetryClient):
+    def __init__(self):
+        super(RecordingClient, self).__init__()
+        self.items = []
+
+    def track_event(self, name, properties=None, measurements=None):
+        self.items.append((name, properties))
+
+    def track_trace(self, name, properties=None, severity=None):
+        self.items.append((name, properties))
+
+    def track_metric(self, name, value, *args, **kwargs):
+        self.items.append((name, value))
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+class SamplingTelemetryClientTest(unittest.TestCase):
+    """
+    This class contains tests of the sampling telemetry client:
+    - per name rates, recorded on the kept items
+    - items of one dialog run sampled together
+    - errors, metrics and "BOOKING NOT CONFIRMED" always kept
+    - rates scaled down to the target rate
+    """
+
+    def test_rates(self):
+        recorder = RecordingClient()
+        values = iter([0.1, 0.9])
+        client = SamplingTelemetryClient(
+            recorder, rates={"WaterfallStep": 0.5}, random_value=lambda: next(values)
+        )
+
+        client.track_event("WaterfallStep")
+        client.track_event("WaterfallStep")
+        client.track_event("WaterfallStart", {"DialogId": "BookingDialog"})
+
+        self.assertEqual(
+            [
+                ("WaterfallStep", {SAMPLING_RATE_PROPERTY: "0.5"}),
+                ("WaterfallStart", {"DialogId": "BookingDialog"}),
+            ],
+            recorder.items,
+        )
+        self.assertEqual({"kept": 2, "sampled_out": 1, "factor": 1.0}, client.stats())
+
+    def test_dialog_runs_sampled_together(self):
+        recorder = RecordingClient()
+        client = SamplingTelemetryClient(recorder, rates={"event": 0.5})
+
+        for instance in range(20):
+            for step in range(3):
+                client.track_event(
+                    "WaterfallStep", {"InstanceId": str(instance), "StepName": str(step)}
+                )
+
+        kept = [properties["InstanceId"] for _, properties in recorder.items]
+        self.assertTrue(0 < len(kept) < 60)
+        self.assertTrue(all(kept.count(instance) == 3 for instance in kept))
+
+    def test_always_kept(self):
+        recorder = RecordingClient()
+        client = SamplingTelemetryClient(
+            recorder, rates={"event": 0.0, "trace": 0.0}
+        )
+
+        client.track_trace("BOOKING NOT CONFIRMED", {"origin": "Paris"}, "ERROR")
+        client.track_trace("LUIS down", None, Severity.critical)
+        client.track_trace("turn", None, Severity.information)
+        client.track_metric("LuisCircuitTrips", 1)
+        client.track_event("WaterfallStep")
+
+        self.assertEqual(
+            ["BOOKING NOT CONFIRMED", "LUIS down", "LuisCircuitTrips"],
+            [name for name, _ in recorder.items],
+        )
+
+    def test_target(self):
+        recorder = RecordingClient()
+        clock = FakeClock()
+        client = SamplingTelemetryClient(
+            recorder,
+            target_per_second=10,
+            adjust_interval=1.0,
+            clock=clock,
+            random_value=lambda: 0.3,
+        )
+
+        for _ in range(40):
+            client.track_event("WaterfallStep")
+        clock.now = 1.0
+        client.track_event("WaterfallStep")
+        self.assertAlmostEqual(10 / 41, client.factor)
+
+        client.track_event("WaterfallStep")
+        client.track_trace("BOOKING NOT CONFIRMED")
+        # Only the trace is kept after the 40 events of the first second.
+        self.assertEqual(41, len(recorder.items))
+        self.assertEqual(2, client.sampled_out)
@@ -0,0 +1,19 @@
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License.
+"""HTTP server module."""
+
+from .background_turns import BackgroundTurns
+from .turn_scheduler import TurnRejected, TurnScheduler
+
+__all__ = ["BackgroundTurns", "TurnRejected", "TurnScheduler", "WorkerSupervisor"]
+
+
+def __getattr__(name: str):
+    # WorkerSupervisor is only imported when the bot runs more than one worker.
+    if name == "WorkerSupervisor":
+        from .workers import (  # pylint: disable=import-outside-toplevel
+            WorkerSupervisor,
+        )
+
+        return WorkerSupervisor
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
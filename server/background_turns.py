@@ -0,0 +1,91 @@
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License.
+"""Turns run after their HTTP request was acknowledged."""
+
+import asyncio
+import sys
+import time
+import traceback
+from typing import Awaitable, Callable, Dict, Set
+
+from botbuilder.core import BotTelemetryClient, NullTelemetryClient
+
+from .turn_scheduler import TurnScheduler
+
+
+class BackgroundTurns:
+    """
+    Hands turns to the scheduler's background queue, so their request can be answered
+    202 at once, and reports each turn's latency: "TurnQueueTime", from acceptance
+    to start, and "TurnDuration", in milliseconds.
+
+    A background turn replies through the conversation reference of its activity,
+    like a proactive message, and its errors can only be logged. `close` lets the
+    accepted turns finish.
+    """
+
+    def __init__(
+        self, scheduler: TurnScheduler, telemetry_client: BotTelemetryClient = None
+    ):
+        self.scheduler = scheduler
+        self.telemetry_client = telemetry_client or NullTelemetryClient()
+        self._tasks: Set[asyncio.Future] = set()
+
+        self.accepted = 0
+        self.completed = 0
+        self.failed = 0
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "pending": len(self._tasks),
+            "accepted": self.accepted,
+            "completed": self.completed,
+            "failed": self.failed,
+        }
+
+    def submit(self, conversation_id: str, turn: Callable[[], Awaitable]) -> None:
+        """Accept `turn`, or raise TurnRejected when the scheduler has no room for it."""
+        accepted_at = time.perf_counter()
+
+        async def timed_turn():
+            started_at = time.perf_counter()
+            self.telemetry_client.track_metric(
+                "TurnQueueTime", (started_at - accepted_at) * 1000
+            )
+            try:
+                await turn()
+            finally:
+                self.telemetry_client.track_metric(
+                    "TurnDuration", (time.perf_counter() - started_at) * 1000
+                )
+
+        task = self.scheduler.submit(conversation_id, timed_turn)
+        self.accepted += 1
+        self._tasks.add(task)
+        task.add_done_callback(self._done)
+
+    def _done(self, task: asyncio.Future) -> None:
+        self._tasks.discard(task)
+        if task.cancelled():
+            return
+        error = task.exception()
+        if error is None:
+            self.completed += 1
+            return
+        # The adapter's on_turn_error failed as well, e.g. the channel is unreachable.
+        self.failed += 1
+        print(f"\n [background turn] unhandled error: {error}", file=sys.stderr)
+        traceback.print_exception(type(error), error, error.__traceback__)
+        self.telemetry_client.track_exception(
+            type(error), error, error.__traceback__
+        )
+
+    async def close(self, timeout: float = 30.0) -> None:
+        """Wait for the accepted turns, cancelling those left after `timeout` seconds."""
+        if not self._tasks:
+            return
+        _, pending = await asyncio.wait(set(self._tasks), timeout=timeout)
+        for task in pending:
+            task.cancel()
+        if pending:
+            await asyncio.wait(pending)
@@ -0,0 +1,208 @@
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License.
+"""Admission and ordering of the turns of a process."""
+
+import asyncio
+import time
+from collections import deque
+from http import HTTPStatus
+from typing import Awaitable, Callable, Deque, Dict, Optional, TypeVar
+
+T = TypeVar("T")
+
+
+class TurnRejected(Exception):
+    """A turn refused for lack of capacity; `status` is the HTTP status to answer."""
+
+    def __init__(self, status: HTTPStatus, reason: str, retry_after: int = 1):
+        super(TurnRejected, self).__init__(reason)
+        self.status = status
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+class _Conversation:
+    __slots__ = ("waiters", "running")
+
+    def __init__(self):
+        self.waiters: Deque[asyncio.Future] = deque()
+        self.running = False
+
+
+class TurnScheduler:
+    """
+    Runs the turns of a conversation one at a time, in arrival order, and at most
+    `max_in_flight` turns of all conversations at once.
+
+    Waiting turns are admitted round-robin across conversations: a conversation whose
+    turn ends goes behind the others already waiting, so a chatty one cannot starve
+    them. A conversation is only tracked while it has a turn running or waiting.
+
+    A turn is rejected with 429 when its conversation already has
+    `max_queued_per_conversation` turns waiting, and with 503 when `max_queued`
+    turns wait in total or it waited `max_wait` seconds without being admitted.
+    """
+
+    def __init__(
+        self,
+        max_in_flight: int = 64,
+        max_queued: int = 256,
+        max_queued_per_conversation: int = 8,
+        max_wait: float = 10.0,
+    ):
+        self.max_in_flight = max_in_flight
+        self.max_queued = max_queued
+        self.max_queued_per_conversation = max_queued_per_conversation
+        self.max_wait = max_wait
+
+        self._conversations: Dict[str, _Conversation] = {}
+        # Conversations with a waiting turn and none running, in admission order.
+        self._ready: Deque[str] = deque()
+
+        self.in_flight = 0
+        self.queued = 0
+        self.queued_peak = 0
+        self.admitted = 0
+        self.rejected = 0
+        self.timed_out = 0
+        self.wait_seconds = 0.0
+
+    @property
+    def conversations(self) -> int:
+        return len(self._conversations)
+
+    def stats(self) -> Dict[str, float]:
+        return {
+            "in_flight": self.in_flight,
+            "queued": self.queued,
+            "queued_peak": self.queued_peak,
+            "conversations": self.conversations,
+            "admitted": self.admitted,
+            "rejected": self.rejected,
+            "timed_out": self.timed_out,
+            "wait_seconds": self.wait_seconds,
+        }
+
+    def reset_peak(self) -> None:
+        """Start measuring the queue peak of the next reporting period."""
+        self.queued_peak = self.queued
+
+    async def run(self, conversation_id: str, turn: Callable[[], Awaitable[T]]) -> T:
+        """Run `turn` once admitted, or raise TurnRejected."""
+        waiter = self._admit(conversation_id)
+        return await self._run_admitted(conversation_id, waiter, turn, self.max_wait)
+
+    def submit(
+        self, conversation_id: str, turn: Callable[[], Awaitable[T]]
+    ) -> "asyncio.Future[T]":
+        """
+        Admit `turn` now, or raise TurnRejected, and run it in the background when
+        admitted. Its caller no longer waits, so it may wait longer than `max_wait`.
+        """
+        waiter = self._admit(conversation_id)
+        return asyncio.ensure_future(
+            self._run_admitted(conversation_id, waiter, turn, None)
+        )
+
+    def _admit(self, conversation_id: str) -> Optional[asyncio.Future]:
+        """Start a turn or queue it; return the future resolved when a queued turn starts."""
+        conversation = self._conversations.get(conversation_id)
+        if conversation is None:
+            conversation = self._conversations[conversation_id] = _Conversation()
+
+        if (
+            not conversation.running
+            and not conversation.waiters
+            and self.in_flight < self.max_in_flight
+        ):
+            self._start(conversation)
+            return None
+
+        if len(conversation.waiters) >= self.max_queued_per_conversation:
+            self.rejected += 1
+            raise TurnRejected(
+                HTTPStatus.TOO_MANY_REQUESTS, "too many turns for this conversation"
+            )
+        if self.queued >= self.max_queued:
+            self.rejected += 1
+            self._forget_if_idle(conversation_id)
+            raise TurnRejected(HTTPStatus.SERVICE_UNAVAILABLE, "turn queue full")
+
+        waiter = asyncio.get_event_loop().create_future()
+        conversation.waiters.append(waiter)
+        self.queued += 1
+        self.queued_peak = max(self.queued_peak, self.queued)
+        if not conversation.running and len(conversation.waiters) == 1:
+            self._ready.append(conversation_id)
+        return waiter
+
+    async def _run_admitted(
+        self,
+        conversation_id: str,
+        waiter: Optional[asyncio.Future],
+        turn: Callable[[], Awaitable[T]],
+        max_wait: Optional[float],
+    ) -> T:
+        if waiter is not None:
+            await self._wait(conversation_id, waiter, max_wait)
+        try:
+            return await turn()
+        finally:
+            self._release(conversation_id)
+
+    async def _wait(
+        self, conversation_id: str, waiter: asyncio.Future, max_wait: Optional[float]
+    ) -> None:
+        queued_at = time.perf_counter()
+        try:
+            await asyncio.wait_for(waiter, max_wait)
+        except asyncio.TimeoutError:
+            self.timed_out += 1
+            self.rejected += 1
+            self._abandon(conversation_id, waiter)
+            raise TurnRejected(HTTPStatus.SERVICE_UNAVAILABLE, "turn queue timeout")
+        except asyncio.CancelledError:
+            if waiter.done() and not waiter.cancelled():
+                # Admitted just before the cancellation, hand the slot back.
+                self._release(conversation_id)
+            else:
+                self._abandon(conversation_id, waiter)
+            raise
+        finally:
+            self.wait_seconds += time.perf_counter() - queued_at
+
+    def _start(self, conversation: _Conversation) -> None:
+        conversation.running = True
+        self.in_flight += 1
+        self.admitted += 1
+
+    def _release(self, conversation_id: str) -> None:
+        self.in_flight -= 1
+        conversation = self._conversations[conversation_id]
+        conversation.running = False
+        if conversation.waiters:
+            self._ready.append(conversation_id)
+        else:
+            del self._conversations[conversation_id]
+        self._dispatch()
+
+    def _dispatch(self) -> None:
+        while self._ready and self.in_flight < self.max_in_flight:
+            conversation = self._conversations[self._ready.popleft()]
+            waiter = conversation.waiters.popleft()
+            self.queued -= 1
+            self._start(conversation)
+            waiter.set_result(None)
+
+    def _abandon(self, conversation_id: str, waiter: asyncio.Future) -> None:
+        conversation = self._conversations[conversation_id]
+        conversation.waiters.remove(waiter)
+        self.queued -= 1
+        if not conversation.waiters and not conversation.running:
+            self._ready.remove(conversation_id)
+        self._forget_if_idle(conversation_id)
+
+    def _forget_if_idle(self, conversation_id: str) -> None:
+        conversation = self._conversations[conversation_id]
+        if not conversation.running and not conversation.waiters:
+            del self._conversations[conversation_id]
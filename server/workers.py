@@ -0,0 +1,244 @@
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License.
+"""Pre-forking launcher running the bot in several worker processes on one port."""
+
+import asyncio
+import os
+import select
+import signal
+import socket
+import sys
+import time
+import traceback
+from typing import Callable, Dict, List, NamedTuple
+
+from aiohttp import web
+
+
+class _Worker(NamedTuple):
+    index: int
+    heartbeat_fd: int
+
+
+class WorkerSupervisor:
+    """
+    Forks `workers` processes, each serving the application of `app_factory` on the
+    same port, and keeps them running.
+
+    Whatever the parent built before `run` (the bot, its state and recognizer) is
+    inherited by every worker, so it must not have started threads, opened
+    connections or bound an event loop yet. Each worker listens with SO_REUSEPORT
+    where available, so the kernel spreads connections, or else shares the parent's
+    listening socket.
+
+    Workers send a heartbeat from their event loop. A worker that exits, or whose
+    loop stops beating for `heartbeat_timeout` seconds, is replaced, unless more than
+    `max_restarts` happened within `restart_window` seconds. SIGTERM or SIGINT stop
+    the workers gracefully, killing those still running after `shutdown_timeout`.
+    """
+
+    def __init__(
+        self,
+        app_factory: Callable[[], web.Application],
+        host: str,
+        port: int,
+        workers: int,
+        heartbeat_interval: float = 2.0,
+        heartbeat_timeout: float = 30.0,
+        shutdown_timeout: float = 30.0,
+        max_restarts: int = 10,
+        restart_window: float = 60.0,
+    ):
+        self.app_factory = app_factory
+        self.host = host
+        self.port = port
+        self.workers = workers
+        self.heartbeat_interval = heartbeat_interval
+        self.heartbeat_timeout = heartbeat_timeout
+        self.shutdown_timeout = shutdown_timeout
+        self.max_restarts = max_restarts
+        self.restart_window = restart_window
+
+        self.reuse_port = hasattr(socket, "SO_REUSEPORT")
+        self._socket: socket.socket = None
+        self._workers: Dict[int, _Worker] = {}
+        self._last_beat: Dict[int, float] = {}
+        self._restarts: List[float] = []
+        self._stopping = False
+
+    def run(self) -> int:
+        """Serve until a stop signal; return the exit status of the launcher."""
+        if not self.reuse_port:
+            self._socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+            self._socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+            self._socket.bind((self.host, self.port))
+            self._socket.listen(128)
+
+        signal.signal(signal.SIGTERM, self._stop)
+        signal.signal(signal.SIGINT, self._stop)
+
+        status = 0
+        for index in range(self.workers):
+            self._spawn(index)
+        while not self._stopping:
+            self._read_heartbeats(timeout=1.0)
+            if not self._reap_and_restart():
+                status = 1
+                break
+            self._kill_stale_workers()
+
+        self._shutdown()
+        return status
+
+    def _stop(self, *_) -> None:
+        self._stopping = True
+
+    def _spawn(self, index: int) -> None:
+        read_fd, write_fd = os.pipe()
+        pid = os.fork()
+        if pid == 0:
+            os.close(read_fd)
+            status = 0
+            try:
+                self._serve(write_fd)
+            except Exception:  # pylint: disable=broad-except
+                traceback.print_exc()
+                status = 1
+            finally:
+                os._exit(status)  # pylint: disable=protected-access
+
+        os.close(write_fd)
+        os.set_blocking(read_fd, False)
+        self._workers[pid] = _Worker(index, read_fd)
+        self._last_beat[pid] = time.monotonic()
+
+    def _serve(self, heartbeat_fd: int) -> None:
+        loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(loop)
+        try:
+            loop.run_until_complete(self._serve_async(self.app_factory(), heartbeat_fd))
+        finally:
+            loop.close()
+
+    async def _serve_async(self, app: web.Application, heartbeat_fd: int) -> None:
+        stopping = asyncio.Event()
+        loop = asyncio.get_event_loop()
+        loop.add_signal_handler(signal.SIGTERM, stopping.set)
+        loop.add_signal_handler(signal.SIGINT, stopping.set)
+
+        runner = web.AppRunner(app, handle_signals=False)
+        await runner.setup()
+        try:
+            if self._socket is not None:
+                site = web.SockSite(
+                    runner, self._socket, shutdown_timeout=self.shutdown_timeout
+                )
+            else:
+                site = web.TCPSite(
+                    runner,
+                    self.host,
+                    self.port,
+                    shutdown_timeout=self.shutdown_timeout,
+                    reuse_port=True,
+                )
+            await site.start()
+
+            # Beats from the event loop, so a blocked loop stops them.
+            while not stopping.is_set():
+                try:
+                    os.write(heartbeat_fd, b".")
+                except BrokenPipeError:
+                    # The supervisor is gone, nothing would replace or stop us.
+                    break
+                try:
+                    await asyncio.wait_for(stopping.wait(), self.heartbeat_interval)
+                except asyncio.TimeoutError:
+                    pass
+        finally:
+            # Stops accepting, lets pending requests finish, then runs on_cleanup.
+            await runner.cleanup()
+
+    def _read_heartbeats(self, timeout: float) -> None:
+        fds = {worker.heartbeat_fd: pid for pid, worker in self._workers.items()}
+        try:
+            readable, _, _ = select.select(list(fds), [], [], timeout)
+        except InterruptedError:
+            return
+        for heartbeat_fd in readable:
+            try:
+                if os.read(heartbeat_fd, 4096):
+                    self._last_beat[fds[heartbeat_fd]] = time.monotonic()
+            except BlockingIOError:
+                pass
+
+    def _reap_and_restart(self) -> bool:
+        """Replace exited workers; return False when they restart too often."""
+        while self._workers:
+            try:
+                pid, status = os.waitpid(-1, os.WNOHANG)
+            except ChildProcessError:
+                return True
+            if pid == 0:
+                return True
+
+            worker = self._forget(pid)
+            if worker is None or self._stopping:
+                continue
+            print(
+                f"\n [workers] worker {worker.index} (pid {pid}) exited with {status}",
+                file=sys.stderr,
+            )
+
+            now = time.monotonic()
+            self._restarts = [
+                at for at in self._restarts if now - at < self.restart_window
+            ] + [now]
+            if len(self._restarts) > self.max_restarts:
+                print("\n [workers] restarting too often, stopping", file=sys.stderr)
+                return False
+            self._spawn(worker.index)
+        return True
+
+    def _kill_stale_workers(self) -> None:
+        now = time.monotonic()
+        for pid in list(self._workers):
+            if now - self._last_beat[pid] > self.heartbeat_timeout:
+                print(
+                    f"\n [workers] pid {pid} missed its heartbeat, killing it",
+                    file=sys.stderr,
+                )
+                self._last_beat[pid] = now
+                self._signal(pid, signal.SIGKILL)
+
+    def _shutdown(self) -> None:
+        for pid in self._workers:
+            self._signal(pid, signal.SIGTERM)
+
+        deadline = time.monotonic() + self.shutdown_timeout
+        while self._workers and time.monotonic() < deadline:
+            pid, _ = os.waitpid(-1, os.WNOHANG)
+            if pid:
+                self._forget(pid)
+            else:
+                time.sleep(0.05)
+
+        for pid in list(self._workers):
+            self._signal(pid, signal.SIGKILL)
+            os.waitpid(pid, 0)
+            self._forget(pid)
+        if self._socket is not None:
+            self._socket.close()
+
+    def _forget(self, pid: int) -> _Worker:
+        worker = self._workers.pop(pid, None)
+        self._last_beat.pop(pid, None)
+        if worker is not None:
+            os.close(worker.heartbeat_fd)
+        return worker
+
+    @staticmethod
+    def _signal(pid: int, signum: int) -> None:
+        try:
+            os.kill(pid, signum)
+        except ProcessLookupError:
+            pass
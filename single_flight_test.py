@@ -0,0 +1,148 @@
+import asyncio
+import copy
+
+from aiounittest import AsyncTestCase
+
+from botbuilder.core import IntentScore, RecognizerResult, TurnContext
+from botbuilder.core.adapters import TestAdapter
+from botbuilder.schema import (
+    Activity,
+    ActivityTypes,
+    ChannelAccount,
+    ConversationAccount,
+)
+
+from config import DefaultConfig
+from flight_booking_recognizer import FlightBookingRecognizer
+from helpers.single_flight import SingleFlight
+
+
+class SlowRecognizer:
+    def __init__(self):
+        self.calls = 0
+
+    async def recognize(self, turn_context: TurnContext) -> RecognizerResult:
+        self.calls += 1
+        await asyncio.sleep(0.01)
+        return RecognizerResult(
+            text=turn_context.activity.text,
+            intents={"book": IntentScore(0.9)},
+            entities={},
+        )
+
+
+class SingleFlightTest(AsyncTestCase):
+    """
+    This class contains tests of the single-flight coalescing:
+    - concurrent calls with the same key run once and get their own copy
+    - the caller of the call changing its result before the waiters copy theirs
+    - errors reach every waiting caller
+    - a waiting caller making the call again when its caller is cancelled
+    - FlightBookingRecognizer coalescing in-flight LUIS queries of the same text
+    """
+
+    async def test_concurrent_calls_are_coalesced(self):
+        single_flight = SingleFlight(copy_result=copy.deepcopy)
+        calls = []
+
+        async def func():
+            calls.append(1)
+            await asyncio.sleep(0.01)
+            return {"value": 1}
+
+        results = await asyncio.gather(
+            *[single_flight.do("key", func) for _ in range(5)]
+        )
+
+        self.assertEqual(1, len(calls))
+        self.assertEqual(4, single_flight.coalesced)
+        self.assertEqual(5, len({id(result) for result in results}))
+        self.assertEqual(0, single_flight.in_flight)
+
+    async def test_caller_changes_its_result(self):
+        single_flight = SingleFlight(copy_result=copy.deepcopy)
+
+        async def func():
+            await asyncio.sleep(0.01)
+            return {"text": "paris"}
+
+        async def change():
+            result = await single_flight.do("key", func)
+            result["text"] = "Paris"
+            return result
+
+        results = await asyncio.gather(
+            change(), *[single_flight.do("key", func) for _ in range(2)]
+        )
+
+        self.assertEqual(
+            ["Paris", "paris", "paris"], [result["text"] for result in results]
+        )
+
+    async def test_errors_are_shared(self):
+        single_flight = SingleFlight()
+
+        async def func():
+            await asyncio.sleep(0.01)
+            raise ValueError("LUIS down")
+
+        results = await asyncio.gather(
+            *[single_flight.do("key", func) for _ in range(3)], return_exceptions=True
+        )
+
+        self.assertTrue(all(isinstance(result, ValueError) for result in results))
+
+    async def test_caller_cancelled(self):
+        single_flight = SingleFlight()
+        calls = []
+
+        async def func():
+            calls.append(1)
+            await asyncio.sleep(0.01)
+            return len(calls)
+
+        caller = asyncio.ensure_future(single_flight.do("key", func))
+        await asyncio.sleep(0)
+        waiters = [
+            asyncio.ensure_future(single_flight.do("key", func)) for _ in range(2)
+        ]
+        await asyncio.sleep(0)
+        caller.cancel()
+
+        self.assertEqual([2, 2], await asyncio.gather(*waiters))
+        self.assertTrue(caller.cancelled())
+        self.assertEqual(2, len(calls))
+        self.assertEqual(1, single_flight.coalesced)
+        self.assertEqual(0, single_flight.in_flight)
+
+    async def test_recognizer_coalesces_identical_queries(self):
+        config = DefaultConfig()
+        config.LOCAL_RECOGNIZER_MODEL = ""
+        config.LUIS_CACHE_SIZE = 0
+        recognizer = FlightBookingRecognizer(config)
+        fake = SlowRecognizer()
+        recognizer._recognizer = fake
+
+        results = await asyncio.gather(
+            recognizer.recognize(self._get_context("Paris")),
+            recognizer.recognize(self._get_context("Paris")),
+            recognizer.recognize(self._get_context("paris")),
+        )
+
+        # Another spelling gets results of its own text.
+        self.assertEqual(2, fake.calls)
+        self.assertEqual(1, recognizer.single_flight.coalesced)
+        self.assertEqual(
+            ["Paris", "Paris", "paris"], [result.text for result in results]
+        )
+
+    @staticmethod
+    def _get_context(utterance: str) -> TurnContext:
+        activity = Activity(
+            type=ActivityTypes.message,
+            text=utterance,
+            conversation=ConversationAccount(),
+            recipient=ChannelAccount(),
+            from_property=ChannelAccount(),
+        )
+        return TurnContext(TestAdapter(), activity)
@@ -0,0 +1,114 @@
+import asyncio
+import shutil
+import tempfile
+
+from aiounittest import AsyncTestCase
+
+from botbuilder.core import ConversationState, StoreItem, TurnContext
+from botbuilder.core.adapters import TestAdapter
+from botbuilder.schema import (
+    Activity,
+    ActivityTypes,
+    ChannelAccount,
+    ConversationAccount,
+)
+
+from booking_details import BookingDetails
+from storage import SqliteStorage
+
+
+def turn_context(adapter: TestAdapter, conversation_id: str) -> TurnContext:
+    return TurnContext(
+        adapter,
+        Activity(
+            type=ActivityTypes.message,
+            channel_id="test",
+            text="hi",
+            from_property=ChannelAccount(id="user"),
+            recipient=ChannelAccount(id="bot"),
+            conversation=ConversationAccount(id=conversation_id),
+        ),
+    )
+
+
+class SqliteStorageTest(AsyncTestCase):
+    """
+    This class contains tests of the SQLite state storage:
+    - write, read and delete, including across storage instances
+    - eTag conflicts
+    - concurrent writes batched in few transactions
+    - ConversationState round trip of a booking
+    """
+
+    def setUp(self):
+        self.path = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.path)
+
+    async def test_write_read_delete(self):
+        storage = SqliteStorage(self.path, shards=2)
+        await storage.write({"a": {"count": 1}, "b": StoreItem(count=2)})
+
+        items = await storage.read(["a", "b", "missing"])
+        self.assertEqual(1, items["a"]["count"])
+        self.assertEqual(2, items["b"].count)
+        self.assertNotIn("missing", items)
+        await storage.close()
+
+        storage = SqliteStorage(self.path, shards=2)
+        self.assertEqual(["a", "b"], sorted(await storage.read(["a", "b"])))
+        await storage.delete(["a"])
+        self.assertEqual(["b"], list(await storage.read(["a", "b"])))
+        await storage.close()
+
+    async def test_etag_conflict(self):
+        storage = SqliteStorage(self.path)
+        await storage.write({"a": {"count": 1}})
+        first = (await storage.read(["a"]))["a"]
+        second = (await storage.read(["a"]))["a"]
+
+        first["count"] = 2
+        await storage.write({"a": first})
+        # The written item took the new eTag and can be written again.
+        await storage.write({"a": first})
+
+        second["count"] = 3
+        with self.assertRaises(KeyError):
+            await storage.write({"a": second})
+        second["e_tag"] = "*"
+        await storage.write({"a": second})
+
+        self.assertEqual(3, (await storage.read(["a"]))["a"]["count"])
+        self.assertEqual(1, storage.stats()["conflicts"])
+        await storage.close()
+
+    async def test_batched_writes(self):
+        storage = SqliteStorage(self.path, shards=1, flush_interval=0.05)
+        await asyncio.gather(
+            *(storage.write({"key%d" % index: {"index": index}}) for index in range(50))
+        )
+
+        stats = storage.stats()
+        self.assertEqual(50, stats["operations"])
+        self.assertLess(stats["batches"], 5)
+        self.assertEqual(50, len(await storage.read(["key%d" % i for i in range(50)])))
+        await storage.close()
+
+    async def test_conversation_state(self):
+        storage = SqliteStorage(self.path)
+        adapter = TestAdapter()
+
+        conversation_state = ConversationState(storage)
+        accessor = conversation_state.create_property("booking")
+        context = turn_context(adapter, "conversation1")
+        await accessor.set(context, BookingDetails(destination="Paris"))
+        await conversation_state.save_changes(context)
+
+        conversation_state = ConversationState(storage)
+        accessor = conversation_state.create_property("booking")
+        booking = await accessor.get(turn_context(adapter, "conversation1"))
+
+        self.assertIsInstance(booking, BookingDetails)
+        self.assertEqual("Paris", booking.destination)
+        await storage.close()
@@ -0,0 +1,42 @@
+import unittest
+
+from helpers.startup_timer import StartupTimer
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 10.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+class StartupTimerTest(unittest.TestCase):
+    """
+    This class contains tests of the startup timer:
+    - phases timed with the context manager, repeated phases accumulated
+    - readiness measured from the process start
+    """
+
+    def test_phases(self):
+        clock = FakeClock()
+        timer = StartupTimer(started_at=9.0, clock=clock)
+        timer.record("imports", 1.0)
+        with timer.phase("dialogs"):
+            clock.now += 0.25
+        with timer.phase("dialogs"):
+            clock.now += 0.25
+
+        self.assertEqual({"imports": 1.0, "dialogs": 0.5}, timer.report()["phases"])
+
+    def test_ready(self):
+        clock = FakeClock()
+        timer = StartupTimer(started_at=9.0, clock=clock)
+        self.assertFalse(timer.is_ready)
+
+        clock.now = 12.0
+        timer.mark_ready()
+        report = timer.report()
+
+        self.assertTrue(report["ready"])
+        self.assertEqual(3.0, report["ready_after"])
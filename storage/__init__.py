@@ -0,0 +1,29 @@
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License.
+"""Bot state storage module."""
+
+from .tracked_state import (
+    SaveStats,
+    TrackedConversationState,
+    TrackedUserState,
+    TURN_SAVE_STATS_KEY,
+)
+
+__all__ = [
+    "SaveStats",
+    "SqliteStorage",
+    "TrackedConversationState",
+    "TrackedUserState",
+    "TURN_SAVE_STATS_KEY",
+]
+
+
+def __getattr__(name: str):
+    # SqliteStorage, and sqlite3, are only imported by the deployments using them.
+    if name == "SqliteStorage":
+        from .sqlite_storage import (  # pylint: disable=import-outside-toplevel
+            SqliteStorage,
+        )
+
+        return SqliteStorage
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
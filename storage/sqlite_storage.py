@@ -0,0 +1,285 @@
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License.
+"""Durable bot state storage on sharded SQLite files with batched writes."""
+
+import asyncio
+import os
+import sqlite3
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Tuple
+
+import jsonpickle
+from botbuilder.core import Storage, StoreItem
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS state (
+    key TEXT PRIMARY KEY,
+    etag INTEGER NOT NULL,
+    document TEXT NOT NULL
+)
+"""
+
+# Pending operation of a shard: (key, document or None to delete, expected eTag).
+_Operation = Tuple[str, Optional[str], Optional[str]]
+
+
+def _get_e_tag(item: object) -> Optional[str]:
+    if isinstance(item, dict):
+        return item.get("e_tag")
+    return getattr(item, "e_tag", None)
+
+
+def _set_e_tag(item: object, e_tag: str) -> None:
+    if isinstance(item, dict):
+        item["e_tag"] = e_tag
+    elif isinstance(item, StoreItem) or hasattr(item, "e_tag"):
+        item.e_tag = e_tag
+
+
+class _Shard:
+    """
+    One SQLite file, owned by a single worker thread. Writes queued by `submit` are
+    committed together in one transaction by a flush task.
+    """
+
+    def __init__(self, path: str, flush_interval: float, max_batch: int):
+        self.path = path
+        self.flush_interval = flush_interval
+        self.max_batch = max_batch
+        self._executor = ThreadPoolExecutor(
+            max_workers=1, thread_name_prefix="sqlite-storage"
+        )
+        self._connection: sqlite3.Connection = None
+        self._pending: List[Tuple[_Operation, asyncio.Future]] = []
+        self._flush_task: asyncio.Task = None
+        self._wakeup: asyncio.Event = None
+
+        self.batches = 0
+        self.operations = 0
+        self.conflicts = 0
+
+    async def run(self, func, *args):
+        loop = asyncio.get_event_loop()
+        return await loop.run_in_executor(self._executor, func, *args)
+
+    async def submit(self, operation: _Operation) -> str:
+        future = asyncio.get_event_loop().create_future()
+        self._pending.append((operation, future))
+        if self._flush_task is None or self._flush_task.done():
+            self._wakeup = asyncio.Event()
+            self._flush_task = asyncio.ensure_future(self._flush())
+        if len(self._pending) >= self.max_batch:
+            self._wakeup.set()
+        return await future
+
+    async def drain(self) -> None:
+        while self._flush_task is not None and not self._flush_task.done():
+            self._wakeup.set()
+            await asyncio.shield(self._flush_task)
+
+    async def _flush(self) -> None:
+        while self._pending:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+
+            batch, self._pending = self._pending[: self.max_batch], self._pending[
+                self.max_batch :
+            ]
+            if self._pending:
+                self._wakeup.set()
+            try:
+                outcomes = await self.run(self._commit, [op for op, _ in batch])
+            except Exception as error:  # pylint: disable=broad-except
+                outcomes = [error] * len(batch)
+
+            self.batches += 1
+            self.operations += len(batch)
+            for (_, future), outcome in zip(batch, outcomes):
+                if future.done():
+                    continue
+                if isinstance(outcome, Exception):
+                    if isinstance(outcome, KeyError):
+                        self.conflicts += 1
+                    future.set_exception(outcome)
+                else:
+                    future.set_result(outcome)
+
+    # Worker thread side.
+    def _connect(self) -> sqlite3.Connection:
+        if self._connection is None:
+            connection = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            connection.execute(_SCHEMA)
+            self._connection = connection
+        return self._connection
+
+    def read(self, keys: List[str]) -> Dict[str, Tuple[int, str]]:
+        connection = self._connect()
+        rows = connection.execute(
+            "SELECT key, etag, document FROM state WHERE key IN (%s)"
+            % ",".join("?" * len(keys)),
+            keys,
+        )
+        return {key: (etag, document) for key, etag, document in rows}
+
+    def _commit(self, operations: List[_Operation]) -> List[object]:
+        connection = self._connect()
+        outcomes = []
+        connection.execute("BEGIN IMMEDIATE")
+        try:
+            for key, document, expected in operations:
+                row = connection.execute(
+                    "SELECT etag FROM state WHERE key = ?", (key,)
+                ).fetchone()
+                if document is None:
+                    connection.execute("DELETE FROM state WHERE key = ?", (key,))
+                    outcomes.append(None)
+                    continue
+
+                current = str(row[0]) if row else None
+                if expected not in (None, "*", current) and current is not None:
+                    outcomes.append(
+                        KeyError(
+                            "Etag conflict.\nOriginal: %s\r\nCurrent: %s"
+                            % (expected, current)
+                        )
+                    )
+                    continue
+
+                etag = row[0] + 1 if row else 1
+                connection.execute(
+                    "INSERT OR REPLACE INTO state (key, etag, document) VALUES (?, ?, ?)",
+                    (key, etag, document),
+                )
+                outcomes.append(str(etag))
+            connection.execute("COMMIT")
+        except BaseException:
+            connection.execute("ROLLBACK")
+            raise
+        return outcomes
+
+    def close_connection(self) -> None:
+        if self._connection is not None:
+            self._connection.close()
+            self._connection = None
+
+    async def close(self) -> None:
+        await self.drain()
+        await self.run(self.close_connection)
+        self._executor.shutdown(wait=True)
+
+
+class SqliteStorage(Storage):
+    """
+    Storage keeping bot state in `shards` SQLite files under `path`.
+
+    A key always maps to the same shard, so all the state of a conversation lives
+    in one file, and processes sharing `path` share the state. Every shard runs its
+    SQLite calls on its own worker thread, off the event loop. Writes issued within
+    `flush_interval` seconds are committed in one transaction; `write` returns once
+    its batch is committed. Items carry an eTag: writing an item whose eTag is stale
+    raises KeyError, as MemoryStorage does.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        shards: int = 4,
+        flush_interval: float = 0.005,
+        max_batch: int = 256,
+    ):
+        super(SqliteStorage, self).__init__()
+        os.makedirs(path, exist_ok=True)
+        self.path = path
+        self._shards = [
+            _Shard(
+                os.path.join(path, "state-%d.sqlite3" % index),
+                flush_interval,
+                max_batch,
+            )
+            for index in range(shards)
+        ]
+
+    def shard_index(self, key: str) -> int:
+        # crc32 rather than hash(): the mapping must not change between processes.
+        return zlib.crc32(key.encode("utf-8")) % len(self._shards)
+
+    async def read(self, keys: List[str]):
+        data = {}
+        if not keys:
+            return data
+
+        by_shard: Dict[int, List[str]] = {}
+        for key in keys:
+            by_shard.setdefault(self.shard_index(key), []).append(key)
+
+        results = await asyncio.gather(
+            *(
+                self._shards[index].run(self._read_shard, self._shards[index], shard_keys)
+                for index, shard_keys in by_shard.items()
+            )
+        )
+        for items in results:
+            data.update(items)
+        return data
+
+    async def write(self, changes: Dict[str, StoreItem]):
+        if changes is None:
+            raise Exception("Changes are required when writing")
+        if not changes:
+            return
+
+        operations = []
+        for key, change in changes.items():
+            e_tag = _get_e_tag(change)
+            if e_tag == "":
+                raise Exception("sqlite_storage.write(): etag missing")
+            # Encoded now, so later changes to the item are not written.
+            operation = (key, jsonpickle.encode(change), e_tag)
+            operations.append(self._shards[self.shard_index(key)].submit(operation))
+
+        # The items take their new eTag, so they can be written again this turn.
+        e_tags = await asyncio.gather(*operations)
+        for change, e_tag in zip(changes.values(), e_tags):
+            _set_e_tag(change, e_tag)
+
+    async def delete(self, keys: List[str]):
+        await asyncio.gather(
+            *(
+                self._shards[self.shard_index(key)].submit((key, None, None))
+                for key in keys
+            )
+        )
+
+    async def flush(self) -> None:
+        """Wait for every queued write to be committed."""
+        await asyncio.gather(*(shard.drain() for shard in self._shards))
+
+    async def close(self) -> None:
+        await asyncio.gather(*(shard.close() for shard in self._shards))
+
+    def stats(self) -> Dict[str, int]:
+        batches = sum(shard.batches for shard in self._shards)
+        operations = sum(shard.operations for shard in self._shards)
+        return {
+            "shards": len(self._shards),
+            "batches": batches,
+            "operations": operations,
+            "operations_per_batch": operations // batches if batches else 0,
+            "conflicts": sum(shard.conflicts for shard in self._shards),
+            "pending": sum(len(shard._pending) for shard in self._shards),
+        }
+
+    @staticmethod
+    def _read_shard(shard: _Shard, keys: List[str]) -> Dict[str, object]:
+        items = {}
+        for key, (etag, document) in shard.read(keys).items():
+            item = jsonpickle.decode(document)
+            _set_e_tag(item, str(etag))
+            items[key] = item
+        return items
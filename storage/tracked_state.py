@@ -0,0 +1,111 @@
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License.
+"""Bot state scopes skipping the storage write of turns that changed nothing."""
+
+import hashlib
+from typing import Dict, Tuple
+
+import jsonpickle
+from botbuilder.core import ConversationState, TurnContext, UserState
+from botbuilder.core.bot_state import CachedBotState
+
+# Turn state entry holding the SaveStats of the current turn.
+TURN_SAVE_STATS_KEY = "StateSaveStats"
+
+
+def fingerprint(state: Dict[str, object]) -> Tuple[str, int]:
+    """
+    Return the digest and serialized size of `state`. The eTag is left out, as the
+    storage rewrites it on every write.
+    """
+    if isinstance(state, dict) and "e_tag" in state:
+        state = {key: value for key, value in state.items() if key != "e_tag"}
+    document = jsonpickle.encode(state).encode("utf-8")
+    return hashlib.blake2b(document, digest_size=16).hexdigest(), len(document)
+
+
+class SaveStats:
+    """Counts of state saves, either for one turn or for the process."""
+
+    def __init__(self):
+        self.saves = 0
+        self.skipped = 0
+        self.bytes = 0
+
+    def add(self, saved: bool, size: int = 0) -> None:
+        if saved:
+            self.saves += 1
+            self.bytes += size
+        else:
+            self.skipped += 1
+
+    def stats(self) -> Dict[str, int]:
+        return {"saves": self.saves, "skipped": self.skipped, "bytes": self.bytes}
+
+
+class _FingerprintedState(CachedBotState):
+    def compute_hash(self, obj: object) -> str:
+        # Missing state is loaded as {}, which must not count as a change.
+        return fingerprint(obj if obj is not None else {})[0]
+
+
+class _ChangeTrackingMixin:
+    """
+    Loads the state with a fingerprint and serializes it once per save to decide
+    whether it changed, where BotState flattens it once to compare and once more
+    after the write. Saves and skipped saves are counted per turn, in the turn state,
+    and for the process in `save_stats`.
+    """
+
+    save_stats: SaveStats
+
+    async def load(self, turn_context: TurnContext, force: bool = False) -> None:
+        cached_state = self.get_cached_state(turn_context)
+        if force or not cached_state or not cached_state.state:
+            storage_key = self.get_storage_key(turn_context)
+            items = await self._storage.read([storage_key])
+            turn_context.turn_state[self._context_service_key] = _FingerprintedState(
+                items.get(storage_key)
+            )
+
+    async def save_changes(
+        self, turn_context: TurnContext, force: bool = False
+    ) -> None:
+        cached_state = self.get_cached_state(turn_context)
+        if cached_state is None:
+            self._count(turn_context, False)
+            return
+
+        digest, size = fingerprint(cached_state.state)
+        if not force and digest == cached_state.hash:
+            self._count(turn_context, False)
+            return
+
+        await self._storage.write(
+            {self.get_storage_key(turn_context): cached_state.state}
+        )
+        cached_state.hash = digest
+        self._count(turn_context, True, size)
+
+    def _count(self, turn_context: TurnContext, saved: bool, size: int = 0) -> None:
+        self.save_stats.add(saved, size)
+        turn_stats = turn_context.turn_state.get(TURN_SAVE_STATS_KEY)
+        if turn_stats is None:
+            turn_stats = turn_context.turn_state[TURN_SAVE_STATS_KEY] = SaveStats()
+        turn_stats.add(saved, size)
+
+
+class TrackedConversationState(_ChangeTrackingMixin, ConversationState):
+    """ConversationState skipping the write of unchanged state."""
+
+    def __init__(self, storage):
+        super(TrackedConversationState, self).__init__(storage)
+        self.save_stats = SaveStats()
+
+
+class TrackedUserState(_ChangeTrackingMixin, UserState):
+    """UserState skipping the write of unchanged state."""
+
+    def __init__(self, storage, namespace=""):
+        super(TrackedUserState, self).__init__(storage, namespace)
+        self.save_stats = SaveStats()
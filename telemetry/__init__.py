@@ -0,0 +1,38 @@
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License.
+"""Telemetry module."""
+
+from .activity_context import ActivityContext, current_activity
+from .batching_telemetry_client import BatchingTelemetryClient, DropPolicy
+from .exporters import (
+    BotTelemetryClientExporter,
+    FileExporter,
+    HttpExporter,
+    TelemetryExporter,
+    TelemetryItem,
+    replayed_activity,
+)
+from .prometheus import render_metrics
+from .sampling_telemetry_client import SAMPLING_RATE_PROPERTY, SamplingTelemetryClient
+from .tracing import SLOW_TURN_EVENT, TRACER, LatencyHistogram, Tracer, TurnTrace
+
+__all__ = [
+    "ActivityContext",
+    "BatchingTelemetryClient",
+    "BotTelemetryClientExporter",
+    "DropPolicy",
+    "FileExporter",
+    "HttpExporter",
+    "LatencyHistogram",
+    "SAMPLING_RATE_PROPERTY",
+    "SamplingTelemetryClient",
+    "SLOW_TURN_EVENT",
+    "TRACER",
+    "TelemetryExporter",
+    "TelemetryItem",
+    "Tracer",
+    "TurnTrace",
+    "current_activity",
+    "render_metrics",
+    "replayed_activity",
+]
@@ -0,0 +1,55 @@
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License.
+"""The activity of the running turn, kept with the telemetry tracked during it."""
+
+from contextvars import ContextVar
+from typing import Optional
+
+from botbuilder.schema import Activity
+
+_CURRENT_ACTIVITY: ContextVar[Optional[dict]] = ContextVar(
+    "current_activity", default=None
+)
+
+
+def current_activity() -> Optional[dict]:
+    """The correlation fields of the activity whose turn is running, if any."""
+    return _CURRENT_ACTIVITY.get()
+
+
+def correlation_fields(activity: Activity) -> dict:
+    """
+    The fields Application Insights correlates telemetry with, in the activity's JSON
+    shape as its telemetry processors read the request body.
+    """
+    fields = {
+        "conversation": {"id": activity.conversation.id}
+        if activity.conversation
+        else {}
+    }
+    if activity.id:
+        fields["id"] = activity.id
+    if activity.type:
+        fields["type"] = activity.type
+    if activity.channel_id:
+        fields["channelId"] = activity.channel_id
+    if activity.from_property:
+        fields["from"] = {"id": activity.from_property.id}
+    return fields
+
+
+class ActivityContext:
+    """Context manager making `activity` the current activity, across awaits."""
+
+    __slots__ = ("_fields", "_token")
+
+    def __init__(self, activity: Activity):
+        self._fields = correlation_fields(activity)
+
+    def __enter__(self) -> dict:
+        self._token = _CURRENT_ACTIVITY.set(self._fields)
+        return self._fields
+
+    def __exit__(self, *exc_info):
+        _CURRENT_ACTIVITY.reset(self._token)
+        return False
@@ -0,0 +1,40 @@
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License.
+"""
+Application Insights telemetry processor for the batched telemetry.
+
+Not imported by the package: Application Insights loads its Django and Flask
+integrations, import it only when telemetry is exported there.
+"""
+
+from botbuilder.applicationinsights.processor.telemetry_processor import (
+    TelemetryProcessor,
+)
+
+from .exporters import replayed_activity
+
+
+class ActivityTelemetryProcessor(TelemetryProcessor):
+    """
+    Sets the user and session ids, activity id, channel id and activity type of each
+    item from the activity it was tracked for, as AiohttpTelemetryProcessor does from
+    the request body. That body is only known on the request's own thread, while
+    BotTelemetryClientExporter replays the items on a worker thread.
+    """
+
+    def __call__(self, data, context) -> bool:
+        # The client's context is shared by its items: the ids of the previous one
+        # would stay on items tracked outside of a turn.
+        context.user.id = None
+        context.session.id = None
+        return super().__call__(data, context)
+
+    def can_process(self) -> bool:
+        return True
+
+    def get_request_body(self) -> dict:
+        activity = replayed_activity()
+        # The processor needs both to build the user id.
+        if activity is None or "from" not in activity or "channelId" not in activity:
+            return None
+        return activity
@@ -0,0 +1,295 @@
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License.
+"""Telemetry client buffering its items and exporting them in batches."""
+
+import asyncio
+import sys
+import time
+import traceback
+from collections import deque
+from enum import Enum
+from typing import Deque, Dict, List
+
+from botbuilder.core import BotTelemetryClient, Severity
+from botbuilder.core.bot_telemetry_client import TelemetryDataPointType
+
+from .activity_context import current_activity
+from .exporters import TelemetryExporter, TelemetryItem
+
+
+class DropPolicy(Enum):
+    # Discard the oldest buffered item to make room for the new one.
+    OLDEST = "oldest"
+    # Discard the new item while the buffer is full.
+    NEWEST = "newest"
+
+
+class BatchingTelemetryClient(BotTelemetryClient):
+    """
+    BotTelemetryClient whose track calls only append to a bounded buffer.
+
+    A background task, started by `start`, hands the buffer to the exporter in
+    batches of up to `batch_size` items, every `flush_interval` seconds or as soon as
+    a batch is full. When the exporter falls behind and the buffer holds
+    `max_queue_size` items, `drop_policy` decides which item is lost. `close` exports
+    what is left before returning. Each item keeps the activity of the turn it was
+    tracked in, see ActivityContext.
+    """
+
+    def __init__(
+        self,
+        exporter: TelemetryExporter,
+        max_queue_size: int = 10000,
+        batch_size: int = 500,
+        flush_interval: float = 5.0,
+        drop_policy: DropPolicy = DropPolicy.OLDEST,
+    ):
+        self.exporter = exporter
+        self.max_queue_size = max_queue_size
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.drop_policy = drop_policy
+
+        self._queue: Deque[TelemetryItem] = deque()
+        self._task: asyncio.Task = None
+        self._wakeup: asyncio.Event = None
+        self._closing = False
+
+        self.enqueued = 0
+        self.dropped = 0
+        self.exported = 0
+        self.batches = 0
+        self.export_failures = 0
+
+    def start(self) -> None:
+        """Start the export task on the running event loop."""
+        self._closing = False
+        if self._task is None or self._task.done():
+            self._wakeup = asyncio.Event()
+            self._task = asyncio.ensure_future(self._run())
+
+    async def flush_async(self) -> None:
+        """Export every buffered item now."""
+        while self._queue:
+            await self._export(self._next_batch())
+
+    def flush(self) -> None:
+        # Non-blocking: only brings the next export forward.
+        if self._wakeup is not None:
+            self._wakeup.set()
+
+    async def close(self, timeout: float = 10.0) -> None:
+        """Export the buffered items, waiting at most `timeout` seconds, and stop."""
+        self._closing = True
+        try:
+            if self._task is not None:
+                self._wakeup.set()
+                await asyncio.wait_for(self._task, timeout)
+            await asyncio.wait_for(self.flush_async(), timeout)
+        except asyncio.TimeoutError:
+            self.dropped += len(self._queue)
+            self._queue.clear()
+        finally:
+            self._task = None
+            await self.exporter.close()
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "queued": len(self._queue),
+            "enqueued": self.enqueued,
+            "dropped": self.dropped,
+            "exported": self.exported,
+            "batches": self.batches,
+            "export_failures": self.export_failures,
+        }
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            while self._queue:
+                await self._export(self._next_batch())
+            if self._closing:
+                return
+
+    def _next_batch(self) -> List[TelemetryItem]:
+        return [
+            self._queue.popleft()
+            for _ in range(min(self.batch_size, len(self._queue)))
+        ]
+
+    async def _export(self, batch: List[TelemetryItem]) -> None:
+        try:
+            await self.exporter.export(batch)
+        except Exception as error:  # pylint: disable=broad-except
+            # Lost rather than retried, so a failing exporter cannot grow the backlog.
+            self.export_failures += 1
+            self.dropped += len(batch)
+            print(f"\n [telemetry] export failed: {error}", file=sys.stderr)
+            return
+        self.batches += 1
+        self.exported += len(batch)
+
+    def _enqueue(self, kind: str, arguments: Dict[str, object]) -> None:
+        if len(self._queue) >= self.max_queue_size:
+            self.dropped += 1
+            if self.drop_policy == DropPolicy.NEWEST:
+                return
+            self._queue.popleft()
+
+        # Callers may reuse their dictionaries once the call returns.
+        for name in ("properties", "measurements"):
+            if arguments.get(name):
+                arguments[name] = dict(arguments[name])
+        # The activity is read now: the export runs outside of the turn.
+        self._queue.append(
+            TelemetryItem(kind, arguments, time.time(), current_activity())
+        )
+        self.enqueued += 1
+        if len(self._queue) >= self.batch_size and self._wakeup is not None:
+            self._wakeup.set()
+
+    def track_pageview(
+        self,
+        name: str,
+        url,
+        duration: int = 0,
+        properties: Dict[str, object] = None,
+        measurements: Dict[str, object] = None,
+    ) -> None:
+        self._enqueue(
+            "pageview",
+            {
+                "name": name,
+                "url": url,
+                "duration": duration,
+                "properties": properties,
+                "measurements": measurements,
+            },
+        )
+
+    def track_exception(
+        self,
+        exception_type: type = None,
+        value: Exception = None,
+        trace: traceback = None,
+        properties: Dict[str, object] = None,
+        measurements: Dict[str, object] = None,
+    ) -> None:
+        if exception_type is None and value is None and trace is None:
+            # The exception being handled now, which is gone once exported.
+            exception_type, value, trace = sys.exc_info()
+        self._enqueue(
+            "exception",
+            {
+                "exception_type": exception_type,
+                "value": value,
+                "trace": trace,
+                "properties": properties,
+                "measurements": measurements,
+            },
+        )
+
+    def track_event(
+        self,
+        name: str,
+        properties: Dict[str, object] = None,
+        measurements: Dict[str, object] = None,
+    ) -> None:
+        self._enqueue(
+            "event",
+            {"name": name, "properties": properties, "measurements": measurements},
+        )
+
+    def track_metric(
+        self,
+        name: str,
+        value: float,
+        tel_type: TelemetryDataPointType = None,
+        count: int = None,
+        min_val: float = None,
+        max_val: float = None,
+        std_dev: float = None,
+        properties: Dict[str, object] = None,
+    ) -> None:
+        self._enqueue(
+            "metric",
+            {
+                "name": name,
+                "value": value,
+                "tel_type": tel_type,
+                "count": count,
+                "min_val": min_val,
+                "max_val": max_val,
+                "std_dev": std_dev,
+                "properties": properties,
+            },
+        )
+
+    def track_trace(
+        self, name: str, properties: Dict[str, object] = None, severity: Severity = None
+    ):
+        self._enqueue(
+            "trace", {"name": name, "properties": properties, "severity": severity}
+        )
+
+    def track_request(
+        self,
+        name: str,
+        url: str,
+        success: bool,
+        start_time: str = None,
+        duration: int = None,
+        response_code: str = None,
+        http_method: str = None,
+        properties: Dict[str, object] = None,
+        measurements: Dict[str, object] = None,
+        request_id: str = None,
+    ):
+        self._enqueue(
+            "request",
+            {
+                "name": name,
+                "url": url,
+                "success": success,
+                "start_time": start_time,
+                "duration": duration,
+                "response_code": response_code,
+                "http_method": http_method,
+                "properties": properties,
+                "measurements": measurements,
+                "request_id": request_id,
+            },
+        )
+
+    def track_dependency(
+        self,
+        name: str,
+        data: str,
+        type_name: str = None,
+        target: str = None,
+        duration: int = None,
+        success: bool = None,
+        result_code: str = None,
+        properties: Dict[str, object] = None,
+        measurements: Dict[str, object] = None,
+        dependency_id: str = None,
+    ):
+        self._enqueue(
+            "dependency",
+            {
+                "name": name,
+                "data": data,
+                "type_name": type_name,
+                "target": target,
+                "duration": duration,
+                "success": success,
+                "result_code": result_code,
+                "properties": properties,
+                "measurements": measurements,
+                "dependency_id": dependency_id,
+            },
+        )
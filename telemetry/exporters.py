@@ -0,0 +1,142 @@
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License.
+"""Destinations of the telemetry batches."""
+
+import asyncio
+import json
+import threading
+from abc import ABC, abstractmethod
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, NamedTuple, Optional
+
+import aiohttp
+from botbuilder.core import BotTelemetryClient
+
+
+class TelemetryItem(NamedTuple):
+    """
+    One BotTelemetryClient call: `track_<kind>(**arguments)`, with the correlation
+    fields of the activity whose turn made it.
+    """
+
+    kind: str
+    arguments: Dict[str, object]
+    timestamp: float
+    activity: Optional[dict] = None
+
+    def to_json(self) -> dict:
+        item = {
+            "kind": self.kind,
+            "timestamp": self.timestamp,
+            "arguments": self.arguments,
+        }
+        if self.activity is not None:
+            item["activity"] = self.activity
+        return item
+
+
+# The item BotTelemetryClientExporter is replaying on the current thread.
+_REPLAYING = threading.local()
+
+
+def replayed_activity() -> Optional[dict]:
+    """
+    The activity of the item being replayed on this thread, for the client's telemetry
+    processor: the request the item was tracked for is long gone.
+    """
+    return getattr(_REPLAYING, "activity", None)
+
+
+def _json_default(value: object) -> object:
+    # Severity and TelemetryDataPointType enums, exceptions, tracebacks.
+    return getattr(value, "name", None) or str(value)
+
+
+class TelemetryExporter(ABC):
+    @abstractmethod
+    async def export(self, items: List[TelemetryItem]) -> None:
+        raise NotImplementedError()
+
+    async def close(self) -> None:
+        pass
+
+
+class BotTelemetryClientExporter(TelemetryExporter):
+    """
+    Replays the batch on a BotTelemetryClient, e.g. ApplicationInsightsTelemetryClient,
+    then flushes it. Both run on a worker thread, as the client sends synchronously.
+    The client stamps the items when they are replayed, up to one flush interval late;
+    its telemetry processor reads the activity of each from `replayed_activity`.
+    """
+
+    def __init__(self, client: BotTelemetryClient):
+        self.client = client
+        self._executor = ThreadPoolExecutor(
+            max_workers=1, thread_name_prefix="telemetry"
+        )
+
+    async def export(self, items: List[TelemetryItem]) -> None:
+        loop = asyncio.get_event_loop()
+        await loop.run_in_executor(self._executor, self._send, items)
+
+    def _send(self, items: List[TelemetryItem]) -> None:
+        try:
+            for item in items:
+                _REPLAYING.activity = item.activity
+                getattr(self.client, "track_" + item.kind)(**item.arguments)
+        finally:
+            _REPLAYING.activity = None
+        if hasattr(self.client, "flush"):
+            self.client.flush()
+
+    async def close(self) -> None:
+        self._executor.shutdown(wait=True)
+
+
+class FileExporter(TelemetryExporter):
+    """Appends each item as a JSON line to `path`, a local stand-in for the service."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._executor = ThreadPoolExecutor(
+            max_workers=1, thread_name_prefix="telemetry"
+        )
+
+    async def export(self, items: List[TelemetryItem]) -> None:
+        lines = "".join(
+            json.dumps(item.to_json(), default=_json_default) + "\n" for item in items
+        )
+        loop = asyncio.get_event_loop()
+        await loop.run_in_executor(self._executor, self._append, lines)
+
+    def _append(self, lines: str) -> None:
+        with open(self.path, "a", encoding="utf-8") as telemetry_file:
+            telemetry_file.write(lines)
+
+    async def close(self) -> None:
+        self._executor.shutdown(wait=True)
+
+
+class HttpExporter(TelemetryExporter):
+    """POSTs each batch as a JSON list to `url`, e.g. a local collector."""
+
+    def __init__(self, url: str, timeout: float = 10.0):
+        self.url = url
+        self.timeout = timeout
+        self._session: aiohttp.ClientSession = None
+
+    async def export(self, items: List[TelemetryItem]) -> None:
+        if self._session is None or self._session.closed:
+            self._session = aiohttp.ClientSession(
+                timeout=aiohttp.ClientTimeout(total=self.timeout)
+            )
+        body = json.dumps([item.to_json() for item in items], default=_json_default)
+        async with self._session.post(
+            self.url, data=body, headers={"Content-Type": "application/json"}
+        ) as response:
+            response.raise_for_status()
+
+    async def close(self) -> None:
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
@@ -0,0 +1,70 @@
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License.
+"""Prometheus text exposition of the span histograms and component counters."""
+
+import math
+import re
+from typing import Callable, List, Mapping
+
+from .tracing import Tracer
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+SPAN_METRIC = "bot_span_duration_seconds"
+
+
+def _number(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+def _label(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _metric_name(*parts: str) -> str:
+    return re.sub(r"[^a-zA-Z0-9_:]", "_", "_".join(parts))
+
+
+def render_histograms(tracer: Tracer) -> List[str]:
+    lines = [
+        f"# HELP {SPAN_METRIC} Duration of the request, turn and dialog spans.",
+        f"# TYPE {SPAN_METRIC} histogram",
+    ]
+    for name, histogram in sorted(tracer.histograms.items()):
+        span = _label(name)
+        for bound, total in histogram.buckets():
+            lines.append(
+                f'{SPAN_METRIC}_bucket{{span="{span}",le="{_number(bound)}"}} {total}'
+            )
+        lines.append(f'{SPAN_METRIC}_sum{{span="{span}"}} {_number(histogram.sum)}')
+        lines.append(f'{SPAN_METRIC}_count{{span="{span}"}} {histogram.count}')
+    return lines
+
+
+def render_stats(component: str, stats: Mapping[str, object]) -> List[str]:
+    """One untyped sample per numeric statistic, named bot_<component>_<statistic>."""
+    lines = []
+    for key, value in stats.items():
+        if isinstance(value, bool):
+            value = int(value)
+        if not isinstance(value, (int, float)):
+            continue
+        name = _metric_name("bot", component, key)
+        lines.append(f"# TYPE {name} untyped")
+        lines.append(f"{name} {_number(value)}")
+    return lines
+
+
+def render_metrics(
+    tracer: Tracer, sources: Mapping[str, Callable[[], Mapping[str, object]]] = None
+) -> str:
+    """
+    The span histograms of `tracer`, then the statistics of each component of
+    `sources`, a stats() method by component name.
+    """
+    lines = render_histograms(tracer)
+    for component, stats in (sources or {}).items():
+        lines.extend(render_stats(component, stats()))
+    return "\n".join(lines) + "\n"
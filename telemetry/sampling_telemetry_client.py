@@ -0,0 +1,240 @@
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License.
+"""Telemetry client forwarding a sample of the high-volume items."""
+
+import random
+import time
+import traceback
+import zlib
+from typing import Callable, Dict, Iterable, Tuple
+
+from botbuilder.core import BotTelemetryClient, Severity
+from botbuilder.core.bot_telemetry_client import TelemetryDataPointType
+
+# Property recorded on every sampled item: the rate it was kept at, so counts can
+# be re-weighted by 1 / rate.
+SAMPLING_RATE_PROPERTY = "samplingRate"
+
+
+def _is_error(severity: object) -> bool:
+    if isinstance(severity, Severity):
+        return severity.value >= Severity.error.value
+    return str(severity).lower() in ("error", "critical")
+
+
+class SamplingTelemetryClient(BotTelemetryClient):
+    """
+    BotTelemetryClient keeping a sample of the events, traces, requests, dependencies
+    and page views before handing them to `client`.
+
+    `rates` gives the rate of an item by its name, e.g. "WaterfallStep", or else its
+    kind, e.g. "event"; other items have rate 1. Every `adjust_interval` seconds, all
+    rates are scaled down so the kept items stay within `target_per_second`. Items of
+    one dialog run (same InstanceId) are kept or dropped together. Exceptions,
+    metrics, error traces, failures and the names in `always_keep` are never sampled.
+    """
+
+    def __init__(
+        self,
+        client: BotTelemetryClient,
+        rates: Dict[str, float] = None,
+        target_per_second: float = None,
+        always_keep: Iterable[str] = ("BOOKING NOT CONFIRMED",),
+        adjust_interval: float = 5.0,
+        clock: Callable[[], float] = time.monotonic,
+        random_value: Callable[[], float] = random.random,
+    ):
+        self.client = client
+        self.rates = dict(rates or {})
+        self.target_per_second = target_per_second
+        self.always_keep = frozenset(always_keep)
+        self.adjust_interval = adjust_interval
+        self._clock = clock
+        self._random = random_value
+
+        # Scale applied to every rate to meet the target, 1 below it.
+        self.factor = 1.0
+        self._window_start = clock()
+        # Items the static rates would have kept during the current window.
+        self._window_expected = 0.0
+
+        self.kept = 0
+        self.sampled_out = 0
+
+    def stats(self) -> Dict[str, float]:
+        return {
+            "kept": self.kept,
+            "sampled_out": self.sampled_out,
+            "factor": self.factor,
+        }
+
+    def flush(self) -> None:
+        if hasattr(self.client, "flush"):
+            self.client.flush()
+
+    def _sample(
+        self, kind: str, name: str, properties: Dict[str, object]
+    ) -> Tuple[bool, Dict[str, object]]:
+        """Return whether to keep the item, and the properties to forward it with."""
+        if name in self.always_keep:
+            self.kept += 1
+            return True, properties
+
+        rate = self.rates.get(name, self.rates.get(kind, 1.0))
+        self._adjust(rate)
+        rate = min(1.0, rate * self.factor)
+        if rate >= 1.0:
+            self.kept += 1
+            return True, properties
+
+        instance_id = properties.get("InstanceId") if properties else None
+        if instance_id:
+            value = zlib.crc32(str(instance_id).encode("utf-8")) / 2 ** 32
+        else:
+            value = self._random()
+        if value >= rate:
+            self.sampled_out += 1
+            return False, properties
+
+        self.kept += 1
+        properties = dict(properties or {})
+        properties[SAMPLING_RATE_PROPERTY] = "%g" % rate
+        return True, properties
+
+    def _adjust(self, rate: float) -> None:
+        if not self.target_per_second:
+            return
+        self._window_expected += rate
+        now = self._clock()
+        elapsed = now - self._window_start
+        if elapsed >= self.adjust_interval:
+            expected_per_second = self._window_expected / elapsed
+            self.factor = (
+                min(1.0, self.target_per_second / expected_per_second)
+                if expected_per_second
+                else 1.0
+            )
+            self._window_start = now
+            self._window_expected = 0.0
+
+    def track_pageview(
+        self,
+        name: str,
+        url,
+        duration: int = 0,
+        properties: Dict[str, object] = None,
+        measurements: Dict[str, object] = None,
+    ) -> None:
+        keep, properties = self._sample("pageview", name, properties)
+        if keep:
+            self.client.track_pageview(name, url, duration, properties, measurements)
+
+    def track_exception(
+        self,
+        exception_type: type = None,
+        value: Exception = None,
+        trace: traceback = None,
+        properties: Dict[str, object] = None,
+        measurements: Dict[str, object] = None,
+    ) -> None:
+        self.client.track_exception(
+            exception_type, value, trace, properties, measurements
+        )
+
+    def track_event(
+        self,
+        name: str,
+        properties: Dict[str, object] = None,
+        measurements: Dict[str, object] = None,
+    ) -> None:
+        keep, properties = self._sample("event", name, properties)
+        if keep:
+            self.client.track_event(name, properties, measurements)
+
+    def track_metric(
+        self,
+        name: str,
+        value: float,
+        tel_type: TelemetryDataPointType = None,
+        count: int = None,
+        min_val: float = None,
+        max_val: float = None,
+        std_dev: float = None,
+        properties: Dict[str, object] = None,
+    ) -> None:
+        # Metrics are aggregates already, sampling them would skew them.
+        self.client.track_metric(
+            name, value, tel_type, count, min_val, max_val, std_dev, properties
+        )
+
+    def track_trace(
+        self, name: str, properties: Dict[str, object] = None, severity: Severity = None
+    ):
+        if _is_error(severity):
+            self.kept += 1
+        else:
+            keep, properties = self._sample("trace", name, properties)
+            if not keep:
+                return
+        self.client.track_trace(name, properties, severity)
+
+    def track_request(
+        self,
+        name: str,
+        url: str,
+        success: bool,
+        start_time: str = None,
+        duration: int = None,
+        response_code: str = None,
+        http_method: str = None,
+        properties: Dict[str, object] = None,
+        measurements: Dict[str, object] = None,
+        request_id: str = None,
+    ):
+        # Failed requests are errors, always kept.
+        keep = True
+        if success:
+            keep, properties = self._sample("request", name, properties)
+        if keep:
+            self.client.track_request(
+                name,
+                url,
+                success,
+                start_time,
+                duration,
+                response_code,
+                http_method,
+                properties,
+                measurements,
+                request_id,
+            )
+
+    def track_dependency(
+        self,
+        name: str,
+        data: str,
+        type_name: str = None,
+        target: str = None,
+        duration: int = None,
+        success: bool = None,
+        result_code: str = None,
+        properties: Dict[str, object] = None,
+        measurements: Dict[str, object] = None,
+        dependency_id: str = None,
+    ):
+        keep = True
+        if success is not False:
+            keep, properties = self._sample("dependency", name, properties)
+        if keep:
+            self.client.track_dependency(
+                name,
+                data,
+                type_name,
+                target,
+                duration,
+                success,
+                result_code,
+                properties,
+                measurements,
+                dependency_id,
+            )
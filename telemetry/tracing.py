@@ -0,0 +1,239 @@
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License.
+"""Per-turn latency spans, aggregated into in-process histograms."""
+
+from bisect import bisect_left
+from contextvars import ContextVar
+from time import perf_counter
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from botbuilder.core import BotTelemetryClient
+
+# Upper bounds in seconds of the histogram buckets, from a cached recognition to a
+# LUIS call running into its deadline.
+DEFAULT_BUCKETS = (
+    0.0005,
+    0.001,
+    0.0025,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+)
+
+# Event tracked for a turn over the slow turn threshold, with its spans.
+SLOW_TURN_EVENT = "SlowTurn"
+
+
+class LatencyHistogram:
+    """Durations counted per bucket, with their count and sum, as Prometheus reads them."""
+
+    __slots__ = ("bounds", "counts", "count", "sum")
+
+    def __init__(self, bounds: Iterable[float] = DEFAULT_BUCKETS):
+        self.bounds = tuple(bounds)
+        # The last count is the +Inf bucket.
+        self.counts = [0] * (len(self.bounds) + 1)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, seconds: float) -> None:
+        self.counts[bisect_left(self.bounds, seconds)] += 1
+        self.count += 1
+        self.sum += seconds
+
+    def buckets(self) -> List[Tuple[float, int]]:
+        """Cumulative counts of the durations up to each bound, +Inf last."""
+        buckets = []
+        total = 0
+        for bound, count in zip(self.bounds + (float("inf"),), self.counts):
+            total += count
+            buckets.append((bound, total))
+        return buckets
+
+    def quantile(self, q: float) -> float:
+        """Upper bound of the bucket holding the `q` quantile, 0 when empty."""
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        for bound, total in self.buckets():
+            if total >= rank:
+                return bound
+        return float("inf")
+
+
+class TurnTrace:
+    """The spans of one turn, in the order they started, with their nesting depth."""
+
+    __slots__ = ("name", "spans", "dropped", "_depth")
+
+    def __init__(self, name: str):
+        self.name = name
+        # [name, depth, seconds] per span, seconds set when the span ends.
+        self.spans: List[list] = []
+        self.dropped = 0
+        self._depth = 0
+
+    def breakdown(self) -> str:
+        """One line per span, indented by depth, e.g. "  recognize 12.3ms"."""
+        return "\n".join(
+            f"{'  ' * depth}{name} {seconds * 1000:.1f}ms"
+            for name, depth, seconds in self.spans
+        )
+
+    def totals(self) -> Dict[str, float]:
+        """Milliseconds per span name, summed over its occurrences."""
+        totals = {}
+        for name, _, seconds in self.spans:
+            totals[name] = totals.get(name, 0.0) + seconds * 1000
+        return totals
+
+
+_CURRENT_TRACE: ContextVar[Optional[TurnTrace]] = ContextVar(
+    "current_trace", default=None
+)
+
+
+class _Span:
+    __slots__ = ("_tracer", "_name", "_start", "_trace", "_record")
+
+    def __init__(self, tracer: "Tracer", name: str):
+        self._tracer = tracer
+        self._name = name
+
+    def __enter__(self):
+        trace = self._trace = _CURRENT_TRACE.get()
+        self._record = None
+        if trace is not None:
+            if len(trace.spans) < self._tracer.max_spans_per_trace:
+                self._record = [self._name, trace._depth, 0.0]
+                trace.spans.append(self._record)
+            else:
+                trace.dropped += 1
+            trace._depth += 1
+        self._start = self._tracer.clock()
+        return self
+
+    def __exit__(self, *exc_info):
+        seconds = self._tracer.clock() - self._start
+        self._tracer.observe(self._name, seconds)
+        if self._record is not None:
+            self._record[2] = seconds
+        if self._trace is not None:
+            self._trace._depth -= 1
+        return False
+
+
+class _Trace:
+    __slots__ = ("_tracer", "_trace", "_token", "_start")
+
+    def __init__(self, tracer: "Tracer", name: str):
+        self._tracer = tracer
+        self._trace = TurnTrace(name)
+
+    def __enter__(self) -> TurnTrace:
+        self._token = _CURRENT_TRACE.set(self._trace)
+        self._start = self._tracer.clock()
+        return self._trace
+
+    def __exit__(self, *exc_info):
+        seconds = self._tracer.clock() - self._start
+        _CURRENT_TRACE.reset(self._token)
+        self._tracer.observe(self._trace.name, seconds)
+        threshold = self._tracer.slow_turn_threshold
+        if threshold and seconds >= threshold:
+            self._tracer.report_slow_turn(self._trace, seconds)
+        return False
+
+
+class _Disabled:
+    __slots__ = ()
+
+    def __enter__(self):
+        return None
+
+    def __exit__(self, *exc_info):
+        return False
+
+
+_DISABLED = _Disabled()
+
+
+class Tracer:
+    """
+    Times spans of the turns into one LatencyHistogram per span name.
+
+    `trace(name)` times a whole request or turn and collects the spans started
+    within it, across awaits, so a turn over `slow_turn_threshold` seconds is tracked
+    as a SlowTurn event with the time of each span. `span(name)` times a part of it,
+    and may be used outside of any trace. A span costs two perf_counter calls and a
+    histogram update; with `enabled` false, nothing is timed.
+    """
+
+    def __init__(
+        self,
+        telemetry_client: BotTelemetryClient = None,
+        slow_turn_threshold: float = None,
+        enabled: bool = True,
+        buckets: Iterable[float] = DEFAULT_BUCKETS,
+        max_spans_per_trace: int = 256,
+        clock: Callable[[], float] = perf_counter,
+    ):
+        self.telemetry_client = telemetry_client
+        self.slow_turn_threshold = slow_turn_threshold
+        self.enabled = enabled
+        self.buckets = tuple(buckets)
+        self.max_spans_per_trace = max_spans_per_trace
+        self.clock = clock
+
+        self.histograms: Dict[str, LatencyHistogram] = {}
+        self.slow_turns = 0
+
+    def span(self, name: str):
+        """Context manager timing `name`."""
+        if not self.enabled:
+            return _DISABLED
+        return _Span(self, name)
+
+    def trace(self, name: str):
+        """Context manager timing `name` and collecting the spans started within it."""
+        if not self.enabled:
+            return _DISABLED
+        return _Trace(self, name)
+
+    def observe(self, name: str, seconds: float) -> None:
+        histogram = self.histograms.get(name)
+        if histogram is None:
+            histogram = self.histograms[name] = LatencyHistogram(self.buckets)
+        histogram.observe(seconds)
+
+    def report_slow_turn(self, trace: TurnTrace, seconds: float) -> None:
+        self.slow_turns += 1
+        if self.telemetry_client is None:
+            return
+        measurements = trace.totals()
+        measurements[trace.name] = seconds * 1000
+        self.telemetry_client.track_event(
+            SLOW_TURN_EVENT,
+            properties={
+                "trace": trace.name,
+                "spans": trace.breakdown(),
+                "droppedSpans": str(trace.dropped),
+            },
+            measurements=measurements,
+        )
+
+    def reset(self) -> None:
+        self.histograms.clear()
+        self.slow_turns = 0
+
+
+# Tracer of the process, set up by app.py.
+TRACER = Tracer()
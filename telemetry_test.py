@@ -0,0 +1,199 @@
+import asyncio
+import json
+import os
+import shutil
+import tempfile
+from typing import List
+
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+from aiounittest import AsyncTestCase
+
+from applicationinsights import TelemetryClient
+from applicationinsights.channel import SenderBase, SynchronousQueue, TelemetryChannel
+from botbuilder.applicationinsights import ApplicationInsightsTelemetryClient
+from botbuilder.core import Severity
+from botbuilder.schema import Activity, ChannelAccount, ConversationAccount
+
+from telemetry import (
+    ActivityContext,
+    BatchingTelemetryClient,
+    BotTelemetryClientExporter,
+    DropPolicy,
+    FileExporter,
+    HttpExporter,
+    TelemetryExporter,
+    TelemetryItem,
+)
+
+
+class ListExporter(TelemetryExporter):
+    def __init__(self, fail: bool = False):
+        self.batches: List[List[TelemetryItem]] = []
+        self.fail = fail
+
+    async def export(self, items: List[TelemetryItem]) -> None:
+        if self.fail:
+            raise ConnectionError("telemetry service down")
+        self.batches.append(items)
+
+
+class RecordingSender(SenderBase):
+    def __init__(self):
+        super().__init__(None)
+        self.envelopes = []
+
+    def send(self, data_to_send):
+        self.envelopes.extend(data_to_send)
+
+
+async def collect(request: web.Request) -> web.Response:
+    request.app["items"].extend(await request.json())
+    return web.Response()
+
+
+class BatchingTelemetryClientTest(AsyncTestCase):
+    """
+    This class contains tests of the batching telemetry client:
+    - track calls only buffer, batches are exported by size, interval and on close
+    - drop policies and failing exporters
+    - file and HTTP stand-in exporters
+    - items replayed on Application Insights with the ids of their activity
+    """
+
+    async def test_batches(self):
+        exporter = ListExporter()
+        client = BatchingTelemetryClient(exporter, batch_size=3, flush_interval=60)
+        client.start()
+
+        properties = {"step": "1"}
+        client.track_event("first", properties)
+        properties["step"] = "2"
+        client.track_trace("BOOKING NOT CONFIRMED", severity=Severity.warning)
+        self.assertEqual([], exporter.batches)
+
+        client.track_metric("LuisCircuitTrips", 1)
+        await asyncio.sleep(0.01)
+        self.assertEqual([["event", "trace", "metric"]], self.kinds(exporter))
+        self.assertEqual({"step": "1"}, exporter.batches[0][0].arguments["properties"])
+
+        client.track_event("last")
+        await client.close()
+        self.assertEqual(["event"], self.kinds(exporter)[1])
+        self.assertEqual(4, client.stats()["exported"])
+
+    async def test_interval(self):
+        exporter = ListExporter()
+        client = BatchingTelemetryClient(exporter, flush_interval=0.01)
+        client.start()
+        client.track_event("event")
+        await asyncio.sleep(0.05)
+
+        self.assertEqual([["event"]], self.kinds(exporter))
+        await client.close()
+
+    async def test_drop_policies(self):
+        for policy, kept in ((DropPolicy.OLDEST, "3"), (DropPolicy.NEWEST, "1")):
+            exporter = ListExporter()
+            client = BatchingTelemetryClient(
+                exporter, max_queue_size=1, drop_policy=policy
+            )
+            for name in ("1", "2", "3"):
+                client.track_event(name)
+            await client.close()
+
+            self.assertEqual(kept, exporter.batches[0][0].arguments["name"])
+            self.assertEqual(2, client.stats()["dropped"])
+
+    async def test_failing_exporter(self):
+        client = BatchingTelemetryClient(ListExporter(fail=True))
+        client.track_event("event")
+        await client.close()
+
+        self.assertEqual(1, client.stats()["export_failures"])
+        self.assertEqual(1, client.stats()["dropped"])
+
+    async def test_file_exporter(self):
+        path = tempfile.mkdtemp()
+        try:
+            file_path = os.path.join(path, "telemetry.jsonl")
+            client = BatchingTelemetryClient(FileExporter(file_path))
+            client.track_trace("BOOKING NOT CONFIRMED", severity=Severity.warning)
+            client.track_metric("StateSaveBytes", 42)
+            await client.close()
+
+            with open(file_path) as telemetry_file:
+                lines = [json.loads(line) for line in telemetry_file]
+        finally:
+            shutil.rmtree(path)
+
+        self.assertEqual(["trace", "metric"], [line["kind"] for line in lines])
+        self.assertEqual("warning", lines[0]["arguments"]["severity"])
+
+    async def test_http_exporter(self):
+        app = web.Application()
+        app["items"] = []
+        app.router.add_post("/telemetry", collect)
+        server = TestServer(app)
+        await server.start_server()
+
+        try:
+            client = BatchingTelemetryClient(
+                HttpExporter(str(server.make_url("/telemetry")))
+            )
+            client.track_event("event", {"intent": "book"})
+            await client.close()
+        finally:
+            await server.close()
+
+        self.assertEqual("event", app["items"][0]["kind"])
+        self.assertEqual({"intent": "book"}, app["items"][0]["arguments"]["properties"])
+
+    async def test_activity_ids(self):
+        # pylint: disable=import-outside-toplevel
+        from telemetry.application_insights import ActivityTelemetryProcessor
+
+        sender = RecordingSender()
+        client = BatchingTelemetryClient(
+            BotTelemetryClientExporter(
+                ApplicationInsightsTelemetryClient(
+                    "00000000-0000-0000-0000-000000000000",
+                    telemetry_client=TelemetryClient(
+                        "00000000-0000-0000-0000-000000000000",
+                        TelemetryChannel(queue=SynchronousQueue(sender)),
+                    ),
+                    telemetry_processor=ActivityTelemetryProcessor(),
+                )
+            )
+        )
+        activity = Activity(
+            id="activity-1",
+            type="message",
+            channel_id="test",
+            from_property=ChannelAccount(id="user-1"),
+            conversation=ConversationAccount(id="conversation-1"),
+        )
+
+        with ActivityContext(activity):
+            client.track_event("BookingConfirmed", {"intent": "book"})
+        client.track_metric("TurnsInFlight", 1)
+        await client.close()
+
+        event, metric = sender.envelopes
+        self.assertEqual(
+            {
+                "intent": "book",
+                "activityId": "activity-1",
+                "channelId": "test",
+                "activityType": "message",
+            },
+            event.data.base_data.properties,
+        )
+        self.assertEqual("testuser-1", event.tags["ai.user.id"])
+        self.assertTrue(event.tags["ai.session.id"])
+        self.assertNotIn("activityId", metric.data.base_data.properties or {})
+        self.assertNotIn("ai.user.id", metric.tags)
+
+    @staticmethod
+    def kinds(exporter: ListExporter) -> List[List[str]]:
+        return [[item.kind for item in batch] for batch in exporter.batches]
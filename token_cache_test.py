@@ -0,0 +1,157 @@
+import asyncio
+
+from aiounittest import AsyncTestCase
+
+from botbuilder.core import BotFrameworkAdapterSettings, ConversationState, MemoryStorage
+from botframework.connector.auth import MicrosoftAppCredentials
+
+from adapter_with_error_handler import AdapterWithErrorHandler
+from auth import AccessToken, CachedAppCredentials, ConnectorClientCache, TokenCache
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+class FakeAppCredentials(CachedAppCredentials):
+    """Credentials handing out numbered tokens instead of asking AAD."""
+
+    def __init__(self, token_cache: TokenCache):
+        super().__init__("app-id", "app-password", token_cache)
+        self.acquired = 0
+
+    def _acquire_token(self) -> AccessToken:
+        self.acquired += 1
+        return AccessToken(f"token-{self.acquired}", 3600)
+
+
+class TokenCacheTest(AsyncTestCase):
+    """
+    This class contains tests of the reply tokens and connector clients:
+    - one fetch for concurrent callers, cached until the refresh margin
+    - refresh in the background before expiry, the token kept while it fails
+    - credentials signing requests with the cached token
+    - connector clients reused per service URL, the least recently used dropped
+    """
+
+    async def test_single_fetch(self):
+        cache = TokenCache(refresh_margin=300, clock=FakeClock())
+        fetches = []
+
+        async def fetch():
+            fetches.append(1)
+            await asyncio.sleep(0.01)
+            return AccessToken("token", 3600)
+
+        tokens = await asyncio.gather(*(cache.get("app", fetch) for _ in range(5)))
+        self.assertEqual(["token"] * 5, tokens)
+        self.assertEqual("token", await cache.get("app", fetch))
+
+        self.assertEqual(1, len(fetches))
+        self.assertEqual(
+            {
+                "tokens": 1,
+                "hits": 1,
+                "misses": 5,
+                "fetches": 1,
+                "background_refreshes": 0,
+                "fetch_failures": 0,
+            },
+            cache.stats(),
+        )
+
+    async def test_background_refresh(self):
+        clock = FakeClock()
+        cache = TokenCache(refresh_margin=300, clock=clock)
+        tokens = iter(["first", "second"])
+        failing = False
+
+        async def fetch():
+            if failing:
+                raise PermissionError("AAD unreachable")
+            return AccessToken(next(tokens), 3600)
+
+        self.assertEqual("first", await cache.get("app", fetch))
+
+        # Within the margin, the current token is handed out while failing to refresh.
+        clock.now = 3400
+        failing = True
+        self.assertEqual("first", await cache.get("app", fetch))
+        await asyncio.sleep(0)
+        self.assertEqual(1, cache.fetch_failures)
+
+        failing = False
+        self.assertEqual("first", await cache.get("app", fetch))
+        await asyncio.sleep(0)
+        self.assertEqual("second", await cache.get("app", fetch))
+        self.assertEqual(2, cache.background_refreshes)
+
+        # Expired, the token is waited for.
+        clock.now = 3400 + 3600
+        failing = True
+        with self.assertRaises(PermissionError):
+            await cache.get("app", fetch)
+        self.assertIsNone(cache.peek("app"))
+        await cache.close()
+
+    async def test_credentials(self):
+        cache = TokenCache()
+        credentials = FakeAppCredentials(cache)
+
+        self.assertTrue(await credentials.warm())
+        session = credentials.signed_session()
+        self.assertEqual("Bearer token-1", session.headers["Authorization"])
+        self.assertEqual("token-1", await credentials.ensure_token())
+        self.assertEqual(1, credentials.acquired)
+
+        # Without a cached token, e.g. signing a proactive message.
+        other = FakeAppCredentials(TokenCache())
+        self.assertEqual("token-1", other.get_access_token())
+        self.assertEqual("token-1", other.get_access_token())
+        self.assertEqual(1, other.acquired)
+
+    async def test_adapter_connector_clients(self):
+        cache = TokenCache()
+        credentials = FakeAppCredentials(cache)
+        clients = ConnectorClientCache(max_size=2)
+        adapter = AdapterWithErrorHandler(
+            BotFrameworkAdapterSettings(
+                "app-id", "app-password", app_credentials=credentials
+            ),
+            ConversationState(MemoryStorage()),
+            connector_clients=clients,
+        )
+
+        first = await adapter.create_connector_client("https://channel-1/")
+        self.assertIs(first, await adapter.create_connector_client("https://channel-1/"))
+        self.assertIs(credentials, first.config.credentials)
+        await adapter.create_connector_client("https://channel-2/")
+        await adapter.create_connector_client("https://channel-3/")
+        self.assertIsNot(first, await adapter.create_connector_client("https://channel-1/"))
+
+        self.assertEqual(
+            {"size": 2, "hits": 1, "misses": 4, "evictions": 2}, clients.stats()
+        )
+        self.assertEqual(1, credentials.acquired)
+        self.assertEqual(4, cache.hits)
+        await clients.close()
+
+    def test_anonymous_clients(self):
+        clients = ConnectorClientCache()
+        adapter = AdapterWithErrorHandler(
+            BotFrameworkAdapterSettings("", ""),
+            ConversationState(MemoryStorage()),
+            connector_clients=clients,
+        )
+
+        client = adapter._get_or_create_connector_client("https://channel/", None)
+        self.assertIs(
+            client,
+            adapter._get_or_create_connector_client(
+                "https://channel/", MicrosoftAppCredentials.empty()
+            ),
+        )
@@ -0,0 +1,153 @@
+import asyncio
+import random
+
+from aiounittest import AsyncTestCase
+
+from botbuilder.core import NullTelemetryClient
+
+from benchmarks.conversations import BookingScript
+from benchmarks.dialog_benchmark import ScriptedConversation, build_bot
+from telemetry import SLOW_TURN_EVENT, TRACER, LatencyHistogram, Tracer, render_metrics
+
+
+class RecordingTelemetryClient(NullTelemetryClient):
+    def __init__(self):
+        super().__init__()
+        self.events = []
+
+    def track_event(self, name, properties=None, measurements=None):
+        self.events.append((name, properties, measurements))
+
+
+class TracingTest(AsyncTestCase):
+    """
+    This class contains tests of the turn tracing:
+    - durations counted in the bucket of the first bound at or above them
+    - spans nested in a trace, kept apart between concurrent turns
+    - slow turns tracked with the time of each span, and a disabled tracer
+    - the Prometheus text of the histograms and statistics
+    - the spans of a booking conversation, down to each waterfall step
+    """
+
+    def test_histogram(self):
+        histogram = LatencyHistogram((0.01, 0.1, 1.0))
+        for seconds in (0.005, 0.01, 0.05, 0.5, 3.0):
+            histogram.observe(seconds)
+
+        self.assertEqual(
+            [(0.01, 2), (0.1, 3), (1.0, 4), (float("inf"), 5)], histogram.buckets()
+        )
+        self.assertEqual(5, histogram.count)
+        self.assertAlmostEqual(3.565, histogram.sum)
+        self.assertEqual(0.1, histogram.quantile(0.5))
+        self.assertEqual(float("inf"), histogram.quantile(1.0))
+        self.assertEqual(0.0, LatencyHistogram().quantile(0.5))
+
+    async def test_concurrent_traces(self):
+        tracer = Tracer()
+
+        async def turn(name: str):
+            with tracer.trace("request") as trace:
+                with tracer.span("turn"):
+                    await asyncio.sleep(0)
+                    with tracer.span(name):
+                        await asyncio.sleep(0)
+                    with tracer.span("send"):
+                        await asyncio.sleep(0)
+            return trace
+
+        first, second = await asyncio.gather(turn("dialog"), turn("recognize"))
+
+        self.assertEqual(
+            [["turn", 0], ["dialog", 1], ["send", 1]],
+            [span[:2] for span in first.spans],
+        )
+        self.assertEqual("recognize", second.spans[1][0])
+        self.assertEqual(2, tracer.histograms["request"].count)
+        self.assertEqual(2, tracer.histograms["send"].count)
+        self.assertEqual(1, tracer.histograms["dialog"].count)
+
+    def test_slow_turn(self):
+        telemetry_client = RecordingTelemetryClient()
+        # The times read as the traces and spans below start and end.
+        clock = iter([0.0, 0.1, 0.2, 0.2, 0.25, 0.3, 0.3, 0.3, 0.35, 0.6, 1.0, 1.1])
+        tracer = Tracer(
+            telemetry_client,
+            slow_turn_threshold=0.5,
+            max_spans_per_trace=2,
+            clock=lambda: next(clock),
+        )
+
+        with tracer.trace("request"):
+            with tracer.span("deserialize"):
+                pass
+            with tracer.span("turn"):
+                with tracer.span("dialog"):
+                    pass
+            with tracer.span("send"):
+                pass
+        with tracer.trace("request"):
+            pass
+
+        self.assertEqual(1, tracer.slow_turns)
+        [(name, properties, measurements)] = telemetry_client.events
+        self.assertEqual(SLOW_TURN_EVENT, name)
+        self.assertEqual("deserialize 100.0ms\nturn 100.0ms", properties["spans"])
+        self.assertEqual("2", properties["droppedSpans"])
+        self.assertAlmostEqual(600.0, measurements["request"])
+        self.assertAlmostEqual(100.0, measurements["turn"])
+        self.assertNotIn("dialog", measurements)
+        self.assertEqual(2, tracer.histograms["request"].count)
+        self.assertEqual(1, tracer.histograms["dialog"].count)
+
+    def test_disabled(self):
+        tracer = Tracer(enabled=False)
+        with tracer.trace("request") as trace:
+            with tracer.span("turn"):
+                pass
+
+        self.assertIsNone(trace)
+        self.assertEqual({}, tracer.histograms)
+
+    def test_render_metrics(self):
+        tracer = Tracer(buckets=(0.1, 1.0))
+        tracer.observe("step BookingDialog.budget_step", 0.05)
+        tracer.observe("step BookingDialog.budget_step", 2.0)
+
+        text = render_metrics(
+            tracer,
+            {
+                "turn_scheduler": lambda: {"in_flight": 3, "wait_seconds": 0.25},
+                "luis_breaker": lambda: {"state": 0, "open": True, "name": "LUIS"},
+            },
+        )
+
+        span = 'span="step BookingDialog.budget_step"'
+        self.assertIn("# TYPE bot_span_duration_seconds histogram\n", text)
+        self.assertIn(f'bot_span_duration_seconds_bucket{{{span},le="0.1"}} 1\n', text)
+        self.assertIn(f'bot_span_duration_seconds_bucket{{{span},le="+Inf"}} 2\n', text)
+        self.assertIn(f"bot_span_duration_seconds_sum{{{span}}} 2.05\n", text)
+        self.assertIn(f"bot_span_duration_seconds_count{{{span}}} 2\n", text)
+        self.assertIn("# TYPE bot_turn_scheduler_in_flight untyped\n", text)
+        self.assertIn("bot_turn_scheduler_in_flight 3\n", text)
+        self.assertIn("bot_turn_scheduler_wait_seconds 0.25\n", text)
+        self.assertIn("bot_luis_breaker_open 1\n", text)
+        self.assertNotIn("bot_luis_breaker_name", text)
+
+    async def test_conversation_spans(self):
+        TRACER.reset()
+        conversation = ScriptedConversation(
+            build_bot(), BookingScript("book a flight", "booking", random.Random(0)), 0
+        )
+        await conversation.run()
+
+        # Every turn but the conversation update runs the dialog.
+        messages = conversation.turns - 1
+        spans = {name: histogram.count for name, histogram in TRACER.histograms.items()}
+        self.assertEqual(messages, spans["dialog"])
+        self.assertEqual(messages, spans["state.load"])
+        self.assertEqual(messages, spans["state.save"])
+        self.assertGreater(spans["recognize"], 0)
+        self.assertEqual(1, spans["step BookingDialog.budget_step"])
+        self.assertEqual(2, spans["step CityDialog.initial_step"])
+        self.assertGreater(spans["step MainDialog.act_step"], 0)
@@ -0,0 +1,99 @@
+from aiounittest import AsyncTestCase
+
+from botbuilder.core import MemoryStorage, TurnContext
+from botbuilder.core.adapters import TestAdapter
+from botbuilder.schema import (
+    Activity,
+    ActivityTypes,
+    ChannelAccount,
+    ConversationAccount,
+)
+
+from storage import TURN_SAVE_STATS_KEY, TrackedConversationState, TrackedUserState
+
+
+class CountingStorage(MemoryStorage):
+    def __init__(self):
+        super(CountingStorage, self).__init__()
+        self.writes = 0
+
+    async def write(self, changes):
+        self.writes += 1
+        await super(CountingStorage, self).write(changes)
+
+
+def turn_context(adapter: TestAdapter) -> TurnContext:
+    return TurnContext(
+        adapter,
+        Activity(
+            type=ActivityTypes.message,
+            channel_id="test",
+            text="help",
+            from_property=ChannelAccount(id="user"),
+            recipient=ChannelAccount(id="bot"),
+            conversation=ConversationAccount(id="conversation"),
+        ),
+    )
+
+
+class TrackedStateTest(AsyncTestCase):
+    """
+    This class contains tests of the change tracking state scopes:
+    - changed state is written, unchanged state and state never loaded are not
+    - an eTag rewritten by the storage does not count as a change
+    - per turn and process save counters
+    """
+
+    async def test_skips_unchanged_turns(self):
+        storage = CountingStorage()
+        adapter = TestAdapter()
+        conversation_state = TrackedConversationState(storage)
+        user_state = TrackedUserState(storage)
+        accessor = conversation_state.create_property("count")
+
+        context = turn_context(adapter)
+        await accessor.set(context, 1)
+        await conversation_state.save_changes(context)
+        await user_state.save_changes(context)
+
+        turn_stats = context.turn_state[TURN_SAVE_STATS_KEY]
+        self.assertEqual(1, storage.writes)
+        self.assertEqual(1, turn_stats.saves)
+        self.assertEqual(1, turn_stats.skipped)
+        self.assertGreater(turn_stats.bytes, 0)
+
+        context = turn_context(adapter)
+        self.assertEqual(1, await accessor.get(context))
+        await conversation_state.save_changes(context)
+        await user_state.save_changes(context)
+
+        self.assertEqual(1, storage.writes)
+        self.assertEqual(2, context.turn_state[TURN_SAVE_STATS_KEY].skipped)
+        self.assertEqual(
+            {"saves": 1, "skipped": 1, "bytes": turn_stats.bytes},
+            conversation_state.save_stats.stats(),
+        )
+
+    async def test_etag_is_not_a_change(self):
+        storage = CountingStorage()
+        conversation_state = TrackedConversationState(storage)
+        context = turn_context(TestAdapter())
+        await conversation_state.create_property("count").set(context, 1)
+        await conversation_state.save_changes(context)
+
+        conversation_state.get(context)["e_tag"] = "2"
+        await conversation_state.save_changes(context)
+
+        self.assertEqual(1, storage.writes)
+        self.assertEqual(1, conversation_state.save_stats.skipped)
+
+    async def test_force(self):
+        storage = CountingStorage()
+        conversation_state = TrackedConversationState(storage)
+        context = turn_context(TestAdapter())
+        await conversation_state.load(context)
+
+        await conversation_state.save_changes(context)
+        await conversation_state.save_changes(context, force=True)
+
+        self.assertEqual(1, storage.writes)
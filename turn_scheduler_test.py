@@ -0,0 +1,155 @@
+import asyncio
+from http import HTTPStatus
+
+from aiounittest import AsyncTestCase
+
+from server import TurnRejected, TurnScheduler
+
+
+class Turns:
+    """Turns recording their start and end, each ended by `finish`."""
+
+    def __init__(self):
+        self.log = []
+        self._ends = {}
+
+    def turn(self, name: str):
+        async def run():
+            self.log.append(("start", name))
+            self._ends[name] = asyncio.get_event_loop().create_future()
+            await self._ends[name]
+            self.log.append(("end", name))
+            return name
+
+        return run
+
+    def finish(self, name: str) -> None:
+        self._ends[name].set_result(None)
+
+    def started(self):
+        return [name for event, name in self.log if event == "start"]
+
+
+async def settle():
+    for _ in range(10):
+        await asyncio.sleep(0)
+
+
+class TurnSchedulerTest(AsyncTestCase):
+    """
+    This class contains tests of the turn scheduler:
+    - turns of one conversation run one at a time in order, others in parallel
+    - the in-flight limit, with waiting turns admitted round-robin across conversations
+    - 429 and 503 rejections, queue timeouts
+    - conversations forgotten once idle, cancelled turns giving their place back
+    """
+
+    async def test_serializes_conversation(self):
+        scheduler = TurnScheduler()
+        turns = Turns()
+        tasks = [
+            asyncio.ensure_future(scheduler.run("a", turns.turn("a1"))),
+            asyncio.ensure_future(scheduler.run("a", turns.turn("a2"))),
+            asyncio.ensure_future(scheduler.run("b", turns.turn("b1"))),
+        ]
+        await settle()
+        self.assertEqual(["a1", "b1"], turns.started())
+
+        turns.finish("a1")
+        await settle()
+        self.assertEqual(["a1", "b1", "a2"], turns.started())
+
+        turns.finish("a2")
+        turns.finish("b1")
+        self.assertEqual(["a1", "a2", "b1"], await asyncio.gather(*tasks))
+        self.assertEqual(0, scheduler.conversations)
+        self.assertEqual(
+            {"in_flight": 0, "queued": 0, "admitted": 3},
+            {
+                key: value
+                for key, value in scheduler.stats().items()
+                if key in ("in_flight", "queued", "admitted")
+            },
+        )
+
+    async def test_round_robin(self):
+        scheduler = TurnScheduler(max_in_flight=1)
+        turns = Turns()
+        names = ["a1", "a2", "a3", "b1", "c1"]
+        tasks = [
+            asyncio.ensure_future(scheduler.run(name[0], turns.turn(name)))
+            for name in names
+        ]
+        await settle()
+        self.assertEqual(4, scheduler.queued)
+
+        for _ in names:
+            await settle()
+            turns.finish(turns.started()[-1])
+        await asyncio.gather(*tasks)
+
+        # a's later turns wait behind the conversations that were waiting already.
+        self.assertEqual(["a1", "b1", "c1", "a2", "a3"], turns.started())
+
+    async def test_rejections(self):
+        scheduler = TurnScheduler(
+            max_in_flight=1, max_queued=2, max_queued_per_conversation=1
+        )
+        turns = Turns()
+        running = asyncio.ensure_future(scheduler.run("a", turns.turn("a1")))
+        waiting = asyncio.ensure_future(scheduler.run("a", turns.turn("a2")))
+        await settle()
+
+        with self.assertRaises(TurnRejected) as rejection:
+            await scheduler.run("a", turns.turn("a3"))
+        self.assertEqual(HTTPStatus.TOO_MANY_REQUESTS, rejection.exception.status)
+
+        other = asyncio.ensure_future(scheduler.run("b", turns.turn("b1")))
+        await settle()
+        with self.assertRaises(TurnRejected) as rejection:
+            await scheduler.run("c", turns.turn("c1"))
+        self.assertEqual(HTTPStatus.SERVICE_UNAVAILABLE, rejection.exception.status)
+        self.assertEqual(2, scheduler.rejected)
+        self.assertEqual(2, scheduler.conversations)
+
+        for name in ("a1", "b1", "a2"):
+            turns.finish(name)
+            await settle()
+        await asyncio.gather(running, waiting, other)
+
+    async def test_queue_timeout(self):
+        scheduler = TurnScheduler(max_in_flight=1, max_wait=0.01)
+        turns = Turns()
+        running = asyncio.ensure_future(scheduler.run("a", turns.turn("a1")))
+        await settle()
+
+        with self.assertRaises(TurnRejected) as rejection:
+            await scheduler.run("b", turns.turn("b1"))
+        self.assertEqual(HTTPStatus.SERVICE_UNAVAILABLE, rejection.exception.status)
+        self.assertEqual(1, scheduler.timed_out)
+        self.assertEqual(0, scheduler.queued)
+        self.assertEqual(1, scheduler.conversations)
+
+        turns.finish("a1")
+        await running
+        self.assertEqual(0, scheduler.conversations)
+
+    async def test_cancelled_waiter(self):
+        scheduler = TurnScheduler(max_in_flight=1)
+        turns = Turns()
+        running = asyncio.ensure_future(scheduler.run("a", turns.turn("a1")))
+        cancelled = asyncio.ensure_future(scheduler.run("b", turns.turn("b1")))
+        waiting = asyncio.ensure_future(scheduler.run("c", turns.turn("c1")))
+        await settle()
+
+        cancelled.cancel()
+        await settle()
+        turns.finish("a1")
+        await settle()
+        turns.finish("c1")
+        await asyncio.gather(running, waiting)
+
+        self.assertEqual(["a1", "c1"], turns.started())
+        self.assertTrue(cancelled.cancelled())
+        self.assertEqual(0, scheduler.conversations)
+        self.assertEqual(0, scheduler.in_flight)
@@ -85,7 +85,7 @@ class LuisRecognizerTest(AsyncTestCase):
         self.assertEqual("Paris", luis_result.origin)
         self.assertEqual("august 18 2022", luis_result.str_date)
         self.assertEqual("august 29", luis_result.end_date)
-        self.assertEqual("500 $", luis_result.budget)
+        self.assertEqual("500 USD", str(luis_result.budget))
 
 
     async def test_partial_booking_query(self):
@@ -111,7 +111,7 @@ class LuisRecognizerTest(AsyncTestCase):
         self.assertIsNone(luis_result.end_date)
         self.assertIsNotNone(luis_result.budget)
         self.assertEqual("London", luis_result.destination)
-        self.assertEqual("1500 $", luis_result.budget)
+        self.assertEqual("1500 USD", str(luis_result.budget))
 
 
     async def test_not_book_intent_query(self):
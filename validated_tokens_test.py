@@ -0,0 +1,179 @@
+from aiohttp.test_utils import TestServer
+from aiounittest import AsyncTestCase
+
+from botbuilder.core import BotFrameworkAdapterSettings, ConversationState, MemoryStorage
+from botbuilder.schema import (
+    Activity,
+    ActivityTypes,
+    ChannelAccount,
+    ConversationAccount,
+)
+from botframework.connector.auth import (
+    ChannelValidation,
+    ClaimsIdentity,
+    JwtTokenExtractor,
+)
+
+from adapter_with_error_handler import AdapterWithErrorHandler
+from auth import OpenIdMetadataCache, ValidatedTokenCache
+from benchmarks.stubs import StubKeyServer
+
+
+class FakeClock:
+    def __init__(self, now: float = 0.0):
+        self.now = now
+
+    def __call__(self) -> float:
+        return self.now
+
+
+class ValidatedTokensTest(AsyncTestCase):
+    """
+    This class contains tests of the inbound authentication:
+    - a token verified once, then its identity reused until it expires
+    - the identity only reused for the channel and service URL it was validated for
+    - signing keys fetched ahead, again for a new key, at most every min interval
+    - the tokens of withdrawn keys verified again
+    """
+
+    async def test_validated_once(self):
+        await self._start()
+        try:
+            header = self.key_server.issue_token("app-id", "https://channel/")
+
+            identity = await self.adapter.authenticate_request(self._activity(), header)
+            self.assertEqual("app-id", identity.get_claim_value("aud"))
+            for _ in range(3):
+                self.assertIs(
+                    identity, await self.adapter.authenticate_request(self._activity(), header)
+                )
+
+            self.assertEqual(1, self.key_server.key_requests)
+            self.assertEqual(
+                {"size": 1, "hits": 3, "misses": 1, "evictions": 0, "revocations": 0},
+                self.tokens.stats(),
+            )
+
+            # The service URL claim is checked again for another activity.
+            with self.assertRaises(PermissionError):
+                await self.adapter.authenticate_request(
+                    self._activity(service_url="https://elsewhere/"), header
+                )
+            with self.assertRaises(PermissionError):
+                await self.adapter.authenticate_request(
+                    self._activity(),
+                    self.key_server.issue_token("other-app", "https://channel/"),
+                )
+            self.assertEqual(1, self.tokens.stats()["size"])
+        finally:
+            await self._stop()
+
+    async def test_expiry(self):
+        clock = FakeClock(1000.0)
+        tokens = ValidatedTokenCache(max_size=2, clock=clock)
+        identity = self._identity(exp=1600)
+
+        tokens.put("Bearer a", "test", "https://channel/", identity)
+        tokens.put("Bearer b", "test", "https://channel/", self._identity(exp=None))
+        self.assertIs(identity, tokens.get("Bearer a", "test", "https://channel/"))
+        self.assertIsNone(tokens.get("Bearer a", "webchat", "https://channel/"))
+        self.assertIsNone(tokens.get("Bearer b", "test", "https://channel/"))
+
+        clock.now = 1600
+        self.assertIsNone(tokens.get("Bearer a", "test", "https://channel/"))
+        self.assertEqual(0, tokens.stats()["size"])
+
+        for name in "cde":
+            tokens.put(f"Bearer {name}", "test", "", self._identity(exp=2000))
+        self.assertEqual(
+            {"size": 2, "hits": 1, "misses": 3, "evictions": 1, "revocations": 0},
+            tokens.stats(),
+        )
+
+    async def test_key_rotation(self):
+        clock = FakeClock()
+        await self._start(clock=clock)
+        try:
+            self.assertTrue(await self.signing_keys.warm())
+            old_header = self.key_server.issue_token("app-id", "https://channel/")
+            await self.adapter.authenticate_request(self._activity(), old_header)
+
+            # A token signed with a key published since the last refresh.
+            self.key_server.rotate()
+            header = self.key_server.issue_token("app-id", "https://channel/")
+            with self.assertRaises(PermissionError):
+                await self.adapter.authenticate_request(self._activity(), header)
+            self.assertEqual(1, self.signing_keys.refreshes)
+
+            clock.now = 300
+            await self.adapter.authenticate_request(self._activity(), header)
+            self.assertEqual(2, self.signing_keys.refreshes)
+            self.assertEqual(2, self.tokens.stats()["size"])
+
+            # The first key is withdrawn: its tokens are forgotten.
+            self.key_server.rotate()
+            clock.now = 300 + 24 * 3600
+            await self.signing_keys.refresh()
+            self.assertEqual(1, self.tokens.revocations)
+            with self.assertRaises(PermissionError):
+                await self.adapter.authenticate_request(self._activity(), old_header)
+            self.assertEqual(
+                {"keys": 2, "refreshes": 3, "refresh_failures": 0, "unknown_keys": 2},
+                self.signing_keys.stats(),
+            )
+        finally:
+            await self._stop()
+
+    async def test_unreachable_keys(self):
+        signing_keys = OpenIdMetadataCache("http://127.0.0.1:9/metadata", timeout=1)
+        self.assertFalse(await signing_keys.warm())
+        with self.assertRaises(Exception):
+            await signing_keys.get("kid")
+        self.assertEqual(2, signing_keys.refresh_failures)
+        await signing_keys.close()
+
+    async def _start(self, clock: FakeClock = None):
+        self.key_server = StubKeyServer()
+        server = TestServer(self.key_server.app())
+        await server.start_server()
+        url = str(server.make_url(StubKeyServer.METADATA_PATH))
+
+        self.signing_keys = OpenIdMetadataCache(
+            url, on_keys_removed=self._discard, clock=clock or FakeClock()
+        )
+        self.tokens = ValidatedTokenCache()
+        self.adapter = AdapterWithErrorHandler(
+            BotFrameworkAdapterSettings("app-id", "app-password"),
+            ConversationState(MemoryStorage()),
+            validated_tokens=self.tokens,
+        )
+
+        self.server = server
+        self.previous_url = ChannelValidation.open_id_metadata_endpoint
+        ChannelValidation.open_id_metadata_endpoint = url
+        self.signing_keys.install()
+
+    async def _stop(self):
+        ChannelValidation.open_id_metadata_endpoint = self.previous_url
+        JwtTokenExtractor.metadataCache.pop(self.signing_keys.url, None)
+        await self.signing_keys.close()
+        await self.server.close()
+
+    def _discard(self, key_ids):
+        self.tokens.discard_signed_by(key_ids)
+
+    @staticmethod
+    def _activity(service_url: str = "https://channel/") -> Activity:
+        return Activity(
+            type=ActivityTypes.message,
+            text="hi",
+            channel_id="test",
+            service_url=service_url,
+            from_property=ChannelAccount(id="user"),
+            recipient=ChannelAccount(id="bot"),
+            conversation=ConversationAccount(id="c1"),
+        )
+
+    @staticmethod
+    def _identity(exp: float) -> ClaimsIdentity:
+        return ClaimsIdentity({"aud": "app-id", "exp": exp}, True)
@@ -0,0 +1,126 @@
+import json
+import os
+import signal
+import socket
+import subprocess
+import sys
+import textwrap
+import time
+import unittest
+import urllib.request
+
+# Launcher serving its worker's pid on "/" and blocking the event loop on "/hang".
+LAUNCHER = textwrap.dedent(
+    """
+    import sys
+    import time
+
+    from aiohttp import web
+
+    from server import WorkerSupervisor
+
+    async def pid(request):
+        import os
+        return web.json_response(os.getpid())
+
+    async def hang(request):
+        time.sleep(60)
+
+    def create_app():
+        app = web.Application()
+        app.router.add_get("/", pid)
+        app.router.add_get("/hang", hang)
+        return app
+
+    sys.exit(
+        WorkerSupervisor(
+            create_app,
+            "127.0.0.1",
+            int(sys.argv[1]),
+            workers=2,
+            heartbeat_interval=0.2,
+            heartbeat_timeout=1.0,
+            shutdown_timeout=5.0,
+        ).run()
+    )
+    """
+)
+
+
+def free_port() -> int:
+    with socket.socket() as probe:
+        probe.bind(("127.0.0.1", 0))
+        return probe.getsockname()[1]
+
+
+class WorkerSupervisorTest(unittest.TestCase):
+    """
+    This class contains tests of the multi-worker launcher:
+    - requests served by several worker processes on one port
+    - exited and hung workers replaced
+    - graceful shutdown of every worker on SIGTERM
+    """
+
+    def setUp(self):
+        self.port = free_port()
+        self.launcher = subprocess.Popen(
+            [sys.executable, "-c", LAUNCHER, str(self.port)],
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+        )
+        self.addCleanup(self._stop)
+
+    def _stop(self):
+        if self.launcher.poll() is None:
+            self.launcher.terminate()
+            self.launcher.wait(timeout=10)
+
+    def _get(self, path: str = "/", timeout: float = 2.0):
+        url = f"http://127.0.0.1:{self.port}{path}"
+        with urllib.request.urlopen(url, timeout=timeout) as response:
+            return json.loads(response.read())
+
+    def _pids(self, attempts: int = 100) -> set:
+        deadline = time.monotonic() + 15
+        while time.monotonic() < deadline:
+            try:
+                return {self._get() for _ in range(attempts)}
+            except OSError:
+                time.sleep(0.1)
+        self.fail("no worker answered")
+
+    def _wait_for(self, condition, timeout: float = 15.0):
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            if condition():
+                return
+            time.sleep(0.2)
+        self.fail("condition not met in time")
+
+    def test_workers_share_the_port(self):
+        pids = self._pids()
+        self.assertEqual(2, len(pids))
+        self.assertNotIn(self.launcher.pid, pids)
+
+    def test_exited_worker_replaced(self):
+        pids = self._pids()
+        os.kill(pids.pop(), signal.SIGKILL)
+
+        self._wait_for(lambda: len(self._pids() - pids) == 1)
+
+    def test_hung_worker_replaced(self):
+        pids = self._pids()
+        try:
+            self._get("/hang", timeout=0.3)
+        except OSError:
+            pass
+
+        self._wait_for(lambda: len(self._pids() - pids) == 1)
+
+    def test_graceful_shutdown(self):
+        pids = self._pids()
+        self.launcher.send_signal(signal.SIGTERM)
+
+        self.assertEqual(0, self.launcher.wait(timeout=10))
+        for pid in pids:
+            with self.assertRaises(ProcessLookupError):
+                os.kill(pid, 0)